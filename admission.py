@@ -0,0 +1,174 @@
+"""Admission control: per-client token buckets and a global concurrency limit
+
+Both are shared by every worker process on the host without an external
+service. Buckets live in a small SQLite database; concurrency slots are
+lock files held with flock, so a crashed worker's slot frees itself.
+"""
+
+import fcntl
+import functools
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import jsonify, request
+
+
+class TokenBucketStore:
+    """Token buckets refilled at ``rate`` tokens per second up to ``burst``, one per client."""
+
+    def __init__(self, path, rate, burst, prune_every=1000):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._calls = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket (client TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def take(self, client, now=None):
+        """Spend one token; returns (allowed, seconds until a token is available)."""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM bucket WHERE client = ?", (client,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                "INSERT OR REPLACE INTO bucket (client, tokens, updated) VALUES (?, ?, ?)", (client, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self._calls += 1
+        if self.prune_every and self._calls % self.prune_every == 0:
+            self.prune(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+    def prune(self, now=None):
+        """Forget clients whose bucket has been full for a while."""
+        now = time.time() if now is None else now
+        self._connection().execute("DELETE FROM bucket WHERE updated < ?", (now - 2 * self.burst / self.rate,))
+
+
+class ConcurrencySlots:
+    """At most ``limit`` requests at once across all processes sharing ``directory``."""
+
+    def __init__(self, directory, limit):
+        self.directory = directory
+        self.limit = limit
+        os.makedirs(directory, exist_ok=True)
+
+    def acquire(self):
+        """Return a held slot, or None when all slots are busy."""
+        start = os.getpid() % self.limit
+        for offset in range(self.limit):
+            path = os.path.join(self.directory, f"slot-{(start + offset) % self.limit}")
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def key_digest(api_key):
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def client_id(trust_proxy=False, api_keys=frozenset()):
+    """Identify the caller by API key when it is a known one, else by address.
+
+    ``api_keys`` holds SHA-256 hex digests of the accepted keys; any other key
+    is ignored, so inventing keys does not buy fresh buckets. Behind a proxy
+    the address is the last X-Forwarded-For entry, the one our proxy added;
+    earlier entries come from the client and can be forged.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        digest = key_digest(api_key)
+        if digest in api_keys:
+            return 'key:' + digest[:32]
+    address = request.access_route[-1] if trust_proxy and request.access_route else request.remote_addr
+    return f"ip:{address}"
+
+
+class AdmissionControl:
+    """Rejects over-quota clients with 429 and sheds load with 503 when all slots are busy."""
+
+    def __init__(self, buckets=None, slots=None, trust_proxy=False, shed_retry_after=1, api_keys=()):
+        self.buckets = buckets
+        self.slots = slots
+        self.trust_proxy = trust_proxy
+        self.api_keys = frozenset(key_digest(key) for key in api_keys)
+        self.shed_retry_after = shed_retry_after
+        self.rejected = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def limit(self, view):
+        if self.buckets is None and self.slots is None:
+            return view
+
+        @functools.wraps(view)
+        def limited_view(*args, **kwargs):
+            if request.method == 'OPTIONS':
+                return view(*args, **kwargs)
+            if self.buckets is not None:
+                try:
+                    allowed, retry_after = self.buckets.take(client_id(self.trust_proxy, self.api_keys))
+                except sqlite3.Error as e:
+                    # Fail open: a busy limiter store must not take the service down
+                    logging.warning(f"Rate limiter unavailable, admitting request: {str(e)}")
+                    allowed, retry_after = True, 0.0
+                if not allowed:
+                    with self._lock:
+                        self.rejected += 1
+                    return self._reject(429, "Too many submissions. Please wait before trying again.", retry_after)
+            slot = self.slots.acquire() if self.slots is not None else None
+            if self.slots is not None and slot is None:
+                with self._lock:
+                    self.shed += 1
+                return self._reject(503, "The analyzer is busy. Please try again shortly.", self.shed_retry_after)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                if slot is not None:
+                    self.slots.release(slot)
+
+        return limited_view
+
+    @staticmethod
+    def _reject(status, message, retry_after):
+        response = jsonify({"error": message, "status": "error", "retry_after": math.ceil(retry_after)})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+        return response
+
+    def metrics(self):
+        return {'rejected': self.rejected, 'shed': self.shed}
@@ -0,0 +1,121 @@
+"""Compact, versioned storage of vision analyses with indexed theme/symbol queries
+
+Analyses are stored as JSON (JSONB on PostgreSQL) with short keys and with
+symbols reduced to their catalogue names. On PostgreSQL a GIN index on the
+column answers theme/symbol containment queries; other databases get the
+same filters from an indexed ``vision_tag`` side table.
+"""
+
+import json
+
+from sqlalchemy import JSON, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+ANALYSIS_VERSION = 1
+
+# Column type: JSONB on PostgreSQL, JSON (JSON1 text) elsewhere
+AnalysisJSON = JSON().with_variant(JSONB(), 'postgresql')
+
+# Analysis keys and their stored short names; 'found_symbols' is stored as names under 's'
+PAYLOAD_KEYS = {
+    'themes': 't',
+    'theme_scores': 'ts',
+    'emotion_scores': 'e',
+    'pattern_insights': 'i',
+    'scripture_references': 'r',
+    'application_points': 'a',
+    'prayer_points': 'p',
+    'partial': 'x',
+    'coverage': 'c',
+    'analyzer_tier': 'at',
+}
+ANALYSIS_KEYS = {short: key for key, short in PAYLOAD_KEYS.items()}
+
+THEME_TAG = 't'
+SYMBOL_TAG = 's'
+
+
+def pack(analysis):
+    """Convert an analysis response into the stored payload."""
+    payload = {'v': ANALYSIS_VERSION}
+    for key, value in analysis.items():
+        if key == 'found_symbols':
+            payload['s'] = [symbol['symbol'] for symbol in value]
+        elif key == 'theme_scores':
+            payload['ts'] = [[entry['theme'], entry['score'], entry['confidence']] for entry in value]
+        else:
+            payload[PAYLOAD_KEYS.get(key, key)] = value
+    if 't' in payload:
+        payload['t'] = sorted(payload['t'])
+    return payload
+
+
+def unpack(payload, symbol_by_name):
+    """Rebuild the analysis response from a stored payload.
+
+    Accepts payloads from before versioning, which are the full response as
+    JSON text.
+    """
+    if payload is None:
+        return None
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if 'v' not in payload:
+        return payload
+    analysis = {}
+    for short, value in payload.items():
+        if short == 'v':
+            continue
+        if short == 's':
+            analysis['found_symbols'] = [symbol_by_name[name] for name in value if name in symbol_by_name]
+        elif short == 'ts':
+            analysis['theme_scores'] = [
+                {'theme': theme, 'score': score, 'confidence': confidence} for theme, score, confidence in value
+            ]
+        elif short == 'r':
+            analysis['scripture_references'] = [tuple(reference) for reference in value]
+        else:
+            analysis[ANALYSIS_KEYS.get(short, short)] = value
+    return analysis
+
+
+def tag_rows(VisionTag, vision_id, payload):
+    """Side-table rows indexing a payload's themes and symbols, for databases without JSONB."""
+    rows = [VisionTag(kind=THEME_TAG, value=theme, vision_id=vision_id) for theme in set(payload.get('t', ()))]
+    rows.extend(VisionTag(kind=SYMBOL_TAG, value=name, vision_id=vision_id) for name in set(payload.get('s', ())))
+    return rows
+
+
+def uses_jsonb(bind):
+    return bind.dialect.name == 'postgresql'
+
+
+def search_visions(session, Vision, VisionTag, themes=(), symbols=(), since=None, until=None,
+                   before_id=None, limit=50):
+    """Newest-first visions having every given theme and symbol, submitted in [since, until).
+
+    Pages with ``before_id`` (the last id of the previous page) rather than
+    an offset, so deep pages cost the same as the first.
+    """
+    query = select(Vision.id, Vision.title, Vision.date_submitted, Vision.interpretation)
+    if themes or symbols:
+        if uses_jsonb(session.get_bind()):
+            criteria = {}
+            if themes:
+                criteria['t'] = list(themes)
+            if symbols:
+                criteria['s'] = list(symbols)
+            query = query.where(type_coerce(Vision.interpretation, JSONB).contains(criteria))
+        else:
+            for kind, values in ((THEME_TAG, themes), (SYMBOL_TAG, symbols)):
+                for value in values:
+                    query = query.where(Vision.id.in_(
+                        select(VisionTag.vision_id).where(VisionTag.kind == kind, VisionTag.value == value)
+                    ))
+    if since is not None:
+        query = query.where(Vision.date_submitted >= since)
+    if until is not None:
+        query = query.where(Vision.date_submitted < until)
+    if before_id is not None:
+        query = query.where(Vision.id < before_id)
+    return session.execute(query.order_by(Vision.id.desc()).limit(limit)).all()
@@ -1,19 +1,60 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 from flask_cors import CORS
+from collections import namedtuple
 from datetime import datetime
-from biblical_symbols import populate_database, BIBLICAL_SYMBOLS
+from biblical_symbols import populate_database, BIBLICAL_SYMBOLS, SYMBOL_ALIASES
 from vision_analyzer import VisionAnalyzer
+from fast_analyzer import RuleAnalyzer, TierSelector
+from memory_guard import MemoryGuard
+from shadow import ShadowAnalyzer, ShadowEvaluator, load_ruleset
+from similarity_index import SimilarityIndex
+from symbol_graph import SymbolGraph
+from vision_rules import symbol_phrases
+from admission import AdmissionControl, ConcurrencySlots, TokenBucketStore
+from db_pool import PoolMetrics, REPLICA_BIND, has_replica, read_session
+from profiling import RequestProfiler
+from warmup import WarmUp, WARMUP_CORPUS
+from structured_logging import setup_logging, init_app as init_request_logging, log_stage, redact
+import analysis_store
+import click
+import responses
+import export
+import rollups
+import static_assets
+import near_duplicate
+import hmac
+import json
 import os
+import signal
 import sys
+import tempfile
+import threading
+import time
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON lines written from a background thread, with only a
+# sample of routine success logs kept (warnings and errors are always logged)
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+LOG_DESCRIPTION_CHARS = int(os.environ.get('LOG_DESCRIPTION_CHARS', 0))
+setup_logging(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    sample_rate=LOG_SAMPLE_RATE,
+    fmt=os.environ.get('LOG_FORMAT', 'json')
+)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+# Responses: orjson when installed, MessagePack for clients that ask for it in
+# Accept, and zstd/gzip for bodies of at least RESPONSE_COMPRESSION_MIN_BYTES (0 disables)
+app.config['RESPONSE_COMPRESSION_MIN_BYTES'] = int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+responses.init_app(app, min_bytes=app.config['RESPONSE_COMPRESSION_MIN_BYTES'])
+init_request_logging(app, sample_rate=LOG_SAMPLE_RATE)
+# CSS/JS are served from content-fingerprinted /assets URLs with long-lived
+# cache headers, precompressed once at startup
+asset_manifest = static_assets.init_app(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 
 # Database configuration
@@ -27,26 +68,207 @@ if os.environ.get('RENDER'):
         logger.error("DATABASE_URL not set in environment")
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 else:
-    # Use SQLite locally
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///visions.db'
+    # Use SQLite locally unless DATABASE_URL points elsewhere
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///visions.db').replace('postgres://', 'postgresql://')
     logger.info("Using SQLite database")
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# PostgreSQL connection pool: connections are checked with a ping before use,
+# recycled before server-side idle timeouts, and every statement is capped
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': app.config['DB_POOL_PRE_PING'],
+    }
+    if app.config['DB_STATEMENT_TIMEOUT_MS']:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {
+            'options': f"-c statement_timeout={app.config['DB_STATEMENT_TIMEOUT_MS']}"
+        }
+
+# Optional read replica used by read-only endpoints (symbol listings, status, vision search)
+replica_url = os.environ.get('DATABASE_REPLICA_URL', '')
+if replica_url:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: replica_url.replace('postgres://', 'postgresql://')}
+    logger.info(f"Using read replica: {replica_url.split('@')[-1]}")
+
+# Similar-vision index configuration
+app.config['SIMILARITY_INDEX_PATH'] = os.environ.get('SIMILARITY_INDEX_PATH', 'similarity_index.npz')
+app.config['SIMILARITY_LSH_BITS'] = int(os.environ.get('SIMILARITY_LSH_BITS', 0))
+app.config['SIMILARITY_SAVE_EVERY'] = int(os.environ.get('SIMILARITY_SAVE_EVERY', 50))
+# Visions stored by other workers are read into the index, and the index is
+# saved, by a background thread at most this often (never on the request path);
+# 0 leaves both to warm-up and the update-similarity-index command
+app.config['SIMILARITY_CATCH_UP_SECONDS'] = float(os.environ.get('SIMILARITY_CATCH_UP_SECONDS', 30))
+
+# Default analysis time budget in milliseconds (0 = unlimited); clients may lower
+# it per request with the X-Time-Budget-Ms header
+app.config['ANALYSIS_TIME_BUDGET_MS'] = int(os.environ.get('ANALYSIS_TIME_BUDGET_MS', 0))
+
+# Fast analyzer tier: 'auto' switches under load, 'always' forces it, 'off' disables it
+app.config['ANALYZER_FAST_TIER'] = os.environ.get('ANALYZER_FAST_TIER', 'auto')
+app.config['ANALYZER_MAX_IN_FLIGHT'] = int(os.environ.get('ANALYZER_MAX_IN_FLIGHT', 4))
+app.config['ANALYZER_MAX_LATENCY_MS'] = int(os.environ.get('ANALYZER_MAX_LATENCY_MS', 1000))
+app.config['ANALYZER_MAX_QUEUE_WAIT_MS'] = int(os.environ.get('ANALYZER_MAX_QUEUE_WAIT_MS', 500))
+
+# Worker memory control: reload the spaCy model after this many newly interned
+# strings, and recycle the worker gracefully above this RSS (0 disables either)
+app.config['MODEL_MAX_NEW_STRINGS'] = int(os.environ.get('MODEL_MAX_NEW_STRINGS', 200000))
+app.config['WORKER_MAX_RSS_MB'] = int(os.environ.get('WORKER_MAX_RSS_MB', 0))
+app.config['MEMORY_CHECK_EVERY'] = int(os.environ.get('MEMORY_CHECK_EVERY', 100))
+
+# Near-duplicate submissions: 'reuse' returns the stored analysis, 'link' re-analyzes
+# but records the match, 'off' disables detection
+app.config['NEAR_DUPLICATE_MODE'] = os.environ.get('NEAR_DUPLICATE_MODE', 'reuse')
+app.config['NEAR_DUPLICATE_THRESHOLD'] = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.8))
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')
+
+# On-demand profiling: requests carrying "X-Profile: <ADMIN_TOKEN>", plus a random
+# PROFILE_SAMPLE_RATE share of requests, are profiled into PROFILE_DIR.
+# PROFILE_MODE 'sample' writes flamegraph stacks, 'cprofile' writes pstats files
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_MODE'] = os.environ.get('PROFILE_MODE', 'sample')
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+
+# Admission control for /submit_vision, shared by all workers on the host:
+# RATE_LIMIT_PER_MINUTE submissions per client (API key or address) with bursts
+# of RATE_LIMIT_BURST, and at most MAX_CONCURRENT_ANALYSES in flight (0 disables either).
+# Only keys listed in RATE_LIMIT_API_KEYS (comma-separated) get their own bucket
+app.config['RATE_LIMIT_PER_MINUTE'] = float(os.environ.get('RATE_LIMIT_PER_MINUTE', 30))
+app.config['RATE_LIMIT_BURST'] = int(os.environ.get('RATE_LIMIT_BURST', 10))
+app.config['RATE_LIMIT_DB'] = os.environ.get('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'vision-rate-limits.db'))
+app.config['RATE_LIMIT_TRUST_PROXY'] = os.environ.get('RATE_LIMIT_TRUST_PROXY', '1' if os.environ.get('RENDER') else '0') == '1'
+app.config['RATE_LIMIT_API_KEYS'] = [key.strip() for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(',') if key.strip()]
+app.config['MAX_CONCURRENT_ANALYSES'] = int(os.environ.get('MAX_CONCURRENT_ANALYSES', 8))
+app.config['CONCURRENCY_SLOT_DIR'] = os.environ.get('CONCURRENCY_SLOT_DIR', os.path.join(tempfile.gettempdir(), 'vision-slots'))
+
+admission = AdmissionControl(
+    buckets=TokenBucketStore(
+        app.config['RATE_LIMIT_DB'], app.config['RATE_LIMIT_PER_MINUTE'] / 60.0, app.config['RATE_LIMIT_BURST']
+    ) if app.config['RATE_LIMIT_PER_MINUTE'] else None,
+    slots=ConcurrencySlots(
+        app.config['CONCURRENCY_SLOT_DIR'], app.config['MAX_CONCURRENT_ANALYSES']
+    ) if app.config['MAX_CONCURRENT_ANALYSES'] else None,
+    trust_proxy=app.config['RATE_LIMIT_TRUST_PROXY'],
+    api_keys=app.config['RATE_LIMIT_API_KEYS']
+)
+
+request_profiler = RequestProfiler(
+    directory=app.config['PROFILE_DIR'],
+    token=app.config['ADMIN_TOKEN'],
+    sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+    mode=app.config['PROFILE_MODE'],
+    keep=app.config['PROFILE_KEEP']
+)
+
 try:
     db = SQLAlchemy(app)
+    pool_metrics = PoolMetrics()
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            pool_metrics.attach(bind_key, engine)
     logger.info("SQLAlchemy initialized successfully")
 except Exception as e:
     logger.error(f"Error initializing SQLAlchemy: {str(e)}")
     raise
 
-# Initialize the vision analyzer
-try:
-    vision_analyzer = VisionAnalyzer(BIBLICAL_SYMBOLS)
-    logger.info("VisionAnalyzer initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing VisionAnalyzer: {str(e)}")
-    raise
+# Emotion intensities use the built-in lexicon, extended by an optional
+# term<TAB>emotion<TAB>weight file (e.g. the NRC Emotion Intensity Lexicon)
+app.config['EMOTION_LEXICON_PATH'] = os.environ.get('EMOTION_LEXICON_PATH', '')
+# Typo-tolerant symbol/keyword matching for words the exact lookups miss. Words
+# in the spaCy model's vocabulary or the ENGLISH_WORDS_PATH word list (one word
+# per line, /usr/share/dict/words by default; capitalized proper nouns are
+# ignored) are never corrected
+app.config['FUZZY_MATCHING'] = os.environ.get('FUZZY_MATCHING', 'true').lower() in ('1', 'true', 'yes')
+app.config['ENGLISH_WORDS_PATH'] = os.environ.get('ENGLISH_WORDS_PATH', '')
+
+# Analyzer tiers share one selector; the analyzers themselves load the spaCy
+# model, which takes seconds, so they are built on first use (normally by the
+# post-fork warm-up) instead of at import
+tier_selector = TierSelector(
+    mode=app.config['ANALYZER_FAST_TIER'],
+    max_in_flight=app.config['ANALYZER_MAX_IN_FLIGHT'],
+    max_latency=app.config['ANALYZER_MAX_LATENCY_MS'] / 1000.0,
+    max_queue_wait=app.config['ANALYZER_MAX_QUEUE_WAIT_MS'] / 1000.0
+)
+Analyzers = namedtuple('Analyzers', 'full fast memory_guard')
+_analyzers = None
+_analyzers_lock = threading.Lock()
+
+def get_analyzers():
+    """Return the full and fast analyzers and the memory guard, creating them once"""
+    global _analyzers
+    if _analyzers is None:
+        with _analyzers_lock:
+            if _analyzers is None:
+                try:
+                    options = {
+                        'emotion_lexicon_path': app.config['EMOTION_LEXICON_PATH'],
+                        'fuzzy_matching': app.config['FUZZY_MATCHING'],
+                        'english_words_path': app.config['ENGLISH_WORDS_PATH']
+                    }
+                    full = VisionAnalyzer(BIBLICAL_SYMBOLS, **options)
+                    guard = MemoryGuard(
+                        full,
+                        max_new_strings=app.config['MODEL_MAX_NEW_STRINGS'],
+                        max_rss_mb=app.config['WORKER_MAX_RSS_MB'],
+                        check_every=app.config['MEMORY_CHECK_EVERY']
+                    )
+                    # The fast tier has no model vocabulary of its own; it shares the full tier's
+                    fast = RuleAnalyzer(BIBLICAL_SYMBOLS, known_words=full.known_words, **options)
+                    _analyzers = Analyzers(full, fast, guard)
+                    logger.info("VisionAnalyzer initialized successfully")
+                except Exception as e:
+                    logger.error(f"Error initializing VisionAnalyzer: {str(e)}")
+                    raise
+    return _analyzers
+
+# Shadow evaluation: a SHADOW_SAMPLE_RATE share of full-tier submissions is
+# re-analyzed in the background with the candidate ruleset in SHADOW_RULESET_PATH
+app.config['SHADOW_SAMPLE_RATE'] = float(os.environ.get('SHADOW_SAMPLE_RATE', 0))
+app.config['SHADOW_RULESET_PATH'] = os.environ.get('SHADOW_RULESET_PATH', '')
+app.config['SHADOW_QUEUE_SIZE'] = int(os.environ.get('SHADOW_QUEUE_SIZE', 100))
+
+def _serving_live_requests():
+    return tier_selector.in_flight > 0
+
+shadow_evaluator = ShadowEvaluator(
+    lambda: ShadowAnalyzer(get_analyzers().full, load_ruleset(app.config['SHADOW_RULESET_PATH']),
+                           busy=_serving_live_requests),
+    sample_rate=app.config['SHADOW_SAMPLE_RATE'] if app.config['SHADOW_RULESET_PATH'] else 0.0,
+    queue_size=app.config['SHADOW_QUEUE_SIZE'],
+    busy=_serving_live_requests
+)
+
+# Catalogue lookups for search and export, which don't need the analyzers
+SYMBOL_BY_NAME = {symbol['symbol']: symbol for symbol in BIBLICAL_SYMBOLS}
+SYMBOL_PHRASES = symbol_phrases(BIBLICAL_SYMBOLS, SYMBOL_ALIASES)
+SYMBOLS_BY_CATEGORY = {}
+for _symbol in BIBLICAL_SYMBOLS:
+    SYMBOLS_BY_CATEGORY.setdefault(_symbol['category'], []).append(_symbol)
+
+# Related symbols: a graph of shared scripture references and categories built
+# at load, with co-occurrence counts from the rollups added by the warm-up and
+# every SYMBOL_GRAPH_REFRESH_SECONDS after; analyses list RELATED_SYMBOLS_K
+# neighbors per found symbol
+app.config['SYMBOL_GRAPH_MAX_NEIGHBORS'] = int(os.environ.get('SYMBOL_GRAPH_MAX_NEIGHBORS', 10))
+app.config['SYMBOL_GRAPH_REFRESH_SECONDS'] = float(os.environ.get('SYMBOL_GRAPH_REFRESH_SECONDS', 3600))
+app.config['RELATED_SYMBOLS_K'] = int(os.environ.get('RELATED_SYMBOLS_K', 3))
+symbol_graph = SymbolGraph(BIBLICAL_SYMBOLS, max_neighbors=app.config['SYMBOL_GRAPH_MAX_NEIGHBORS'])
+_symbol_graph_refreshed = None
+_symbol_graph_lock = threading.Lock()
 
 # Database Models
 class Vision(db.Model):
@@ -54,8 +276,52 @@ class Vision(db.Model):
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     context = db.Column(db.Text)
-    date_submitted = db.Column(db.DateTime, default=datetime.utcnow)
-    interpretation = db.Column(db.Text)
+    date_submitted = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Compact, versioned analysis payload (see analysis_store)
+    interpretation = db.Column(analysis_store.AnalysisJSON)
+    duplicate_of = db.Column(db.Integer, db.ForeignKey('vision.id'))
+
+    __table_args__ = (
+        # Answers theme/symbol containment (@>) queries on PostgreSQL
+        db.Index(
+            'ix_vision_interpretation', 'interpretation',
+            postgresql_using='gin', postgresql_ops={'interpretation': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+
+class VisionSignature(db.Model):
+    vision_id = db.Column(db.Integer, db.ForeignKey('vision.id'), primary_key=True)
+    minhash = db.Column(db.LargeBinary, nullable=False)
+
+class VisionSignatureBand(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.BigInteger, nullable=False, index=True)
+    vision_id = db.Column(db.Integer, db.ForeignKey('vision.id'), nullable=False)
+
+class VisionTag(db.Model):
+    """Indexed themes and symbols of each vision, for databases without JSONB containment"""
+    kind = db.Column(db.String(1), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    vision_id = db.Column(db.Integer, db.ForeignKey('vision.id'), primary_key=True)
+
+class ThemeDaily(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    theme = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class SymbolDaily(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    symbol = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class TagPairDaily(db.Model):
+    """Daily co-occurrence of two tags ("t:<theme>" or "s:<symbol>"), stored with first < second"""
+    day = db.Column(db.Date, primary_key=True)
+    first = db.Column(db.String(110), primary_key=True)
+    second = db.Column(db.String(110), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+ROLLUP_TABLES = rollups.RollupTables(ThemeDaily, SymbolDaily, TagPairDaily)
 
 class BiblicalSymbol(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -64,19 +330,198 @@ class BiblicalSymbol(db.Model):
     scripture_references = db.Column(db.Text)
     category = db.Column(db.String(50))
 
+# Columns added to existing tables after their first release: create_all only creates missing tables
+SCHEMA_UPGRADES = [
+    ('vision', 'duplicate_of', 'INTEGER REFERENCES vision (id)'),
+]
+
+# On PostgreSQL, analyses are JSONB behind a GIN index for containment (@>)
+# search; databases created before that keep a TEXT column until upgraded
+def _interpretation_is_jsonb(inspector):
+    column = next(column for column in inspector.get_columns('vision') if column['name'] == 'interpretation')
+    return isinstance(column['type'], JSONB)
+
+def _has_interpretation_index(inspector):
+    return 'ix_vision_interpretation' in {index['name'] for index in inspector.get_indexes('vision')}
+
+POSTGRESQL_UPGRADES = [
+    ('vision.interpretation JSONB', _interpretation_is_jsonb,
+     "ALTER TABLE vision ALTER COLUMN interpretation TYPE JSONB USING NULLIF(interpretation, '')::jsonb"),
+    ('ix_vision_interpretation', _has_interpretation_index,
+     'CREATE INDEX IF NOT EXISTS ix_vision_interpretation ON vision USING gin (interpretation jsonb_path_ops)'),
+]
+
+def pending_schema_upgrades(inspector, dialect):
+    """Return (name, statement) for every upgrade the inspected database still needs, in order"""
+    pending = []
+    for table, column, ddl in SCHEMA_UPGRADES:
+        if column not in {existing['name'] for existing in inspector.get_columns(table)}:
+            pending.append((f'{table}.{column}', f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    if dialect == 'postgresql':
+        pending.extend((name, statement) for name, applied, statement in POSTGRESQL_UPGRADES if not applied(inspector))
+    return pending
+
+def upgrade_schema():
+    """Create missing tables and apply pending upgrades without dropping data; returns the upgrades applied"""
+    db.create_all()
+    applied = []
+    for name, statement in pending_schema_upgrades(db.inspect(db.engine), db.engine.dialect.name):
+        with db.engine.begin() as connection:
+            connection.execute(db.text(statement))
+        logger.info(f"Applied schema upgrade {name}")
+        applied.append(name)
+    return applied
+
+def refresh_symbol_graph():
+    """Rebuild the symbol graph with co-occurrence counts from the analytics rollups"""
+    global symbol_graph, _symbol_graph_refreshed
+    _symbol_graph_refreshed = time.monotonic()
+    with app.app_context():
+        with read_session(db) as session:
+            co_occurrence = rollups.symbol_pair_counts(session, ROLLUP_TABLES)
+    symbol_graph = SymbolGraph(
+        BIBLICAL_SYMBOLS, co_occurrence, max_neighbors=app.config['SYMBOL_GRAPH_MAX_NEIGHBORS']
+    )
+    logger.info(f"Symbol graph rebuilt with {len(co_occurrence)} co-occurring symbol pairs")
+
+def _refresh_symbol_graph_in_background():
+    try:
+        refresh_symbol_graph()
+    except Exception as e:
+        logger.error(f"Error refreshing symbol graph: {str(e)}")
+    finally:
+        _symbol_graph_lock.release()
+
+def get_symbol_graph():
+    """Return the current symbol graph, starting a background refresh when it is due"""
+    interval = app.config['SYMBOL_GRAPH_REFRESH_SECONDS']
+    due = _symbol_graph_refreshed is None or time.monotonic() - _symbol_graph_refreshed >= interval
+    if interval and due and _symbol_graph_lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_symbol_graph_in_background, name='symbol-graph', daemon=True).start()
+    return symbol_graph
+
+def with_related_symbols(analysis):
+    """Copy of an analysis whose found symbols each list their closest related symbols"""
+    k = app.config['RELATED_SYMBOLS_K']
+    if not k or not analysis.get('found_symbols'):
+        return analysis
+    graph = get_symbol_graph()
+    return dict(analysis, found_symbols=[
+        dict(symbol, related=[neighbor.symbol for neighbor in graph.related(symbol['symbol'], k)])
+        for symbol in analysis['found_symbols']
+    ])
+
+similarity_index = None
+_similarity_index_lock = threading.Lock()
+_similarity_caught_up = None
+_similarity_catch_up_lock = threading.Lock()
+
+def load_similarity_index():
+    """Load the similar-vision index once per worker, or start an empty one"""
+    global similarity_index
+    if similarity_index is None:
+        with _similarity_index_lock:
+            if similarity_index is None:
+                path = app.config['SIMILARITY_INDEX_PATH']
+                index = SimilarityIndex.load(path) or SimilarityIndex(lsh_bits=app.config['SIMILARITY_LSH_BITS'])
+                logger.info(f"Similarity index loaded with {len(index)} visions")
+                similarity_index = index
+    return similarity_index
+
+def catch_up_similarity_index(force_save=False):
+    """Add visions stored since the index's watermark, then save it if enough changed; returns the number added"""
+    global _similarity_caught_up
+    index = load_similarity_index()
+    _similarity_caught_up = time.monotonic()
+    before = len(index)
+    with app.app_context():
+        new_rows = (
+            db.session.query(Vision.id, Vision.description)
+            .filter(Vision.id > index.last_id)
+            .order_by(Vision.id)
+            .yield_per(1000)
+        )
+        index.catch_up(new_rows)
+        db.session.remove()
+    save_similarity_index(force=force_save)
+    return len(index) - before
+
+def _catch_up_similarity_index_in_background():
+    try:
+        catch_up_similarity_index()
+    except Exception as e:
+        logger.error(f"Error catching up similarity index: {str(e)}")
+    finally:
+        _similarity_catch_up_lock.release()
+
+def schedule_similarity_catch_up():
+    """Start a background catch-up and save of the similarity index when one is due"""
+    interval = app.config['SIMILARITY_CATCH_UP_SECONDS']
+    due = _similarity_caught_up is None or time.monotonic() - _similarity_caught_up >= interval
+    if interval and due and _similarity_catch_up_lock.acquire(blocking=False):
+        threading.Thread(
+            target=_catch_up_similarity_index_in_background, name='similarity-catch-up', daemon=True
+        ).start()
+
+def get_similarity_index():
+    """Return the similar-vision index; catching up with other workers' visions happens in the background"""
+    index = load_similarity_index()
+    schedule_similarity_catch_up()
+    return index
+
+def save_similarity_index(force=False):
+    if similarity_index is None or not similarity_index.dirty:
+        return
+    if force or similarity_index.dirty >= app.config['SIMILARITY_SAVE_EVERY']:
+        try:
+            similarity_index.save(app.config['SIMILARITY_INDEX_PATH'])
+        except Exception as e:
+            logger.error(f"Error saving similarity index: {str(e)}")
+
+def similar_visions_payload(matches):
+    """Attach stored vision details to (vision_id, score) matches"""
+    with read_session(db) as session:
+        visions = {
+            v.id: v for v in session.query(Vision).filter(Vision.id.in_([vision_id for vision_id, _ in matches])).all()
+        }
+    return [
+        {
+            "id": vision_id,
+            "title": visions[vision_id].title,
+            "description": visions[vision_id].description,
+            "date_submitted": visions[vision_id].date_submitted.isoformat() if visions[vision_id].date_submitted else None,
+            "score": score
+        }
+        for vision_id, score in matches if vision_id in visions
+    ]
+
+@app.after_request
+def recycle_worker_if_needed(response):
+    """Ask gunicorn to replace this worker once the response is sent, if memory ran over"""
+    if _analyzers is not None and _analyzers.memory_guard.recycle_requested and request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        response.call_on_close(lambda: os.kill(os.getpid(), signal.SIGTERM))
+    return response
+
 # Routes
 @app.route('/')
 def home():
-    return render_template('index.html')
+    # The symbol catalogue is embedded so first paint needs no API call
+    return render_template('index.html', symbols_by_category=SYMBOLS_BY_CATEGORY)
 
 @app.route('/submit_vision', methods=['POST', 'OPTIONS'])
+@request_profiler.profile
+@admission.limit
 def submit_vision():
     if request.method == 'OPTIONS':
         return '', 204
         
     try:
         data = request.json
-        logger.info(f"Received vision submission: {data}")
+        if data:
+            logger.info("Received vision submission", extra={'sampled': True, 'fields': {
+                'description': redact(data.get('description'), LOG_DESCRIPTION_CHARS),
+                'context': redact(data.get('context'), LOG_DESCRIPTION_CHARS)
+            }})
         
         if not data or 'description' not in data:
             logger.error("Missing vision description in request")
@@ -85,21 +530,86 @@ def submit_vision():
                 "status": "error"
             }), 400
         
+        # Look for a stored near-duplicate of this submission
+        signature = None
+        duplicate = None
+        mode = app.config['NEAR_DUPLICATE_MODE']
+        if mode != 'off':
+            try:
+                with log_stage('near_duplicate'):
+                    signature = near_duplicate.minhash(data['description'])
+                    duplicate = near_duplicate.find_near_duplicate(
+                        db, VisionSignature, VisionSignatureBand, signature, app.config['NEAR_DUPLICATE_THRESHOLD']
+                    )
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error during near-duplicate lookup: {str(e)}")
+        
+        if duplicate and mode == 'reuse':
+            original = db.session.get(Vision, duplicate[0])
+            stored = analysis_store.unpack(original.interpretation, SYMBOL_BY_NAME) if original is not None else None
+            stored_tier = stored.pop('analyzer_tier', None) if stored else None
+            # Partial analyses cut short by a time budget and degraded fast-tier ones
+            # (or ones stored before the tier was recorded) are not worth reusing
+            if stored and not stored.get('partial') and stored_tier == 'full':
+                logger.info("Reusing analysis of near-duplicate vision %s", original.id, extra={'sampled': True})
+                analysis = stored
+                with log_stage('store'):
+                    vision_id = store_vision(data, analysis, signature=signature, duplicate_of=original.id,
+                                             tier=stored_tier)
+                return jsonify({
+                    "interpretation": with_related_symbols(analysis),
+                    "vision_id": vision_id,
+                    "analyzer_tier": stored_tier,
+                    "near_duplicate_of": original.id,
+                    "similarity": round(duplicate[1], 3),
+                    "status": "success"
+                })
+        
         # Analyze the vision
         try:
-            analysis = vision_analyzer.analyze_vision(
-                description=data['description'],
-                context=data.get('context', '')
-            )
-            logger.info("Vision analysis completed successfully")
+            analyzers = get_analyzers()
+            tier = tier_selector.acquire(queue_wait=request_queue_wait())
+            analyzer = analyzers.fast if tier == 'fast' else analyzers.full
+            started = time.monotonic()
+            try:
+                with log_stage('analysis'):
+                    analysis = analyzer.analyze_vision(
+                        description=data['description'],
+                        context=data.get('context', ''),
+                        time_budget=request_time_budget()
+                    )
+            finally:
+                tier_selector.release(tier, time.monotonic() - started)
+                analyzers.memory_guard.after_analysis()
+            if tier == 'full' and not analysis.get('partial'):
+                shadow_evaluator.maybe_submit(
+                    data['description'], data.get('context', ''), analysis, time.monotonic() - started
+                )
+            logger.info("Vision analysis completed successfully", extra={'sampled': True, 'fields': {
+                'tier': tier,
+                'themes': analysis.get('themes', []),
+                'partial': analysis.get('partial', False)
+            }})
             
-            return jsonify({
-                "interpretation": analysis,
+            with log_stage('store'):
+                vision_id = store_vision(
+                    data, analysis, signature=signature, duplicate_of=duplicate[0] if duplicate else None, tier=tier
+                )
+            
+            response = {
+                "interpretation": with_related_symbols(analysis),
+                "vision_id": vision_id,
+                "analyzer_tier": tier,
                 "status": "success"
-            })
+            }
+            if duplicate:
+                response["near_duplicate_of"] = duplicate[0]
+                response["similarity"] = round(duplicate[1], 3)
+            return jsonify(response)
             
         except Exception as e:
-            logger.error(f"Error during vision analysis: {str(e)}")
+            logger.exception(f"Error during vision analysis: {str(e)}")
             return jsonify({
                 "error": "An error occurred while analyzing your vision. Please try again.",
                 "status": "error",
@@ -115,24 +625,291 @@ def submit_vision():
             "details": str(e)
         }), 500
 
+def request_time_budget():
+    """Return the analysis time budget in seconds for this request, or None if unlimited"""
+    budget_ms = app.config['ANALYSIS_TIME_BUDGET_MS'] or None
+    header = request.headers.get('X-Time-Budget-Ms')
+    if header:
+        try:
+            requested = max(int(header), 1)
+            budget_ms = min(budget_ms, requested) if budget_ms else requested
+        except ValueError:
+            logger.warning(f"Ignoring invalid X-Time-Budget-Ms header: {header[:20]}")
+    return budget_ms / 1000.0 if budget_ms else None
+
+def request_queue_wait():
+    """Seconds the request waited before reaching this worker, from the router's X-Request-Start header"""
+    header = request.headers.get('X-Request-Start', '')
+    try:
+        started = float(header[2:] if header.startswith('t=') else header)
+    except ValueError:
+        return None
+    # Routers send seconds, milliseconds or microseconds since the epoch
+    while started > 1e11:
+        started /= 1000.0
+    return max(time.time() - started, 0.0)
+
+rollup_write_failures = 0
+_rollup_failures_lock = threading.Lock()
+
+def record_rollups(vision_id, payload, day):
+    """Add a stored analysis to the rollups in a savepoint, so a failed write (e.g. a deadlock) keeps the vision"""
+    global rollup_write_failures
+    try:
+        with db.session.begin_nested():
+            rollups.record_analysis(db.session, ROLLUP_TABLES, payload, day)
+    except Exception as e:
+        with _rollup_failures_lock:
+            rollup_write_failures += 1
+        logger.error(f"Error updating rollups for vision {vision_id}, run 'flask rebuild-rollups' to repair them: {str(e)}")
+
+def store_vision(data, analysis, signature=None, duplicate_of=None, tier=None):
+    """Store a submitted vision with its analysis and analyzer tier; returns the new id, or None on failure"""
+    try:
+        description = data['description']
+        payload = analysis_store.pack(dict(analysis, analyzer_tier=tier) if tier else analysis)
+        vision = Vision(
+            title=(data.get('title') or description)[:100],
+            description=description,
+            context=data.get('context', ''),
+            interpretation=payload,
+            duplicate_of=duplicate_of,
+            date_submitted=datetime.utcnow()
+        )
+        db.session.add(vision)
+        db.session.flush()
+        if not analysis_store.uses_jsonb(db.engine):
+            db.session.add_all(analysis_store.tag_rows(VisionTag, vision.id, payload))
+        if signature is not None:
+            db.session.add_all(near_duplicate.signature_rows(VisionSignature, VisionSignatureBand, vision.id, signature))
+        db.session.flush()
+        record_rollups(vision.id, payload, vision.date_submitted.date())
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error storing vision: {str(e)}")
+        return None
+    
+    if similarity_index is not None:
+        similarity_index.add(vision.id, description)
+        schedule_similarity_catch_up()
+    return vision.id
+
+@app.route('/visions/<int:vision_id>/similar')
+def get_similar_visions(vision_id):
+    """Return stored visions most similar to a stored vision"""
+    try:
+        k = min(int(request.args.get('k', 5)), 50)
+        vision = db.session.get(Vision, vision_id)
+        if vision is None:
+            return jsonify({"error": "Vision not found", "status": "error"}), 404
+        
+        index = get_similarity_index()
+        if vision_id not in index:
+            # Committed after the catch-up read past its id
+            index.add(vision.id, vision.description)
+        matches = index.query_id(vision_id, k=k)
+        return jsonify({
+            "vision_id": vision_id,
+            "similar": similar_visions_payload(matches),
+            "status": "success"
+        })
+    except Exception as e:
+        error_msg = f"Error finding similar visions: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"error": error_msg, "status": "error"}), 500
+
+@app.route('/visions/similar', methods=['GET', 'POST'])
+def get_similar_visions_for_text():
+    """Return stored visions most similar to a free-text description"""
+    try:
+        if request.method == 'POST':
+            data = request.json or {}
+            text = data.get('description', '')
+            k = data.get('k', 5)
+        else:
+            text = request.args.get('text', '')
+            k = request.args.get('k', 5)
+        k = min(int(k), 50)
+        
+        if not text.strip():
+            return jsonify({"error": "Please provide a vision description", "status": "error"}), 400
+        
+        matches = get_similarity_index().query(text, k=k)
+        return jsonify({
+            "similar": similar_visions_payload(matches),
+            "status": "success"
+        })
+    except Exception as e:
+        error_msg = f"Error finding similar visions: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"error": error_msg, "status": "error"}), 500
+
+def parse_date(value):
+    """Parse an ISO date or datetime query parameter; None when absent"""
+    return datetime.fromisoformat(value) if value else None
+
+@app.route('/visions/search')
+def search_visions():
+    """Find visions by theme, symbol and submission date, newest first"""
+    try:
+        themes = [theme.lower() for theme in request.args.getlist('theme')]
+        symbols = []
+        for value in request.args.getlist('symbol'):
+            # Accept any phrase that names a catalogue symbol ("snake" -> "Serpent/Snake")
+            name = SYMBOL_PHRASES.get(value.lower())
+            if name is None:
+                return jsonify({"error": f"Unknown symbol: {value}", "status": "error"}), 400
+            symbols.append(name)
+        limit = min(int(request.args.get('limit', 50)), 500)
+        before_id = request.args.get('before_id', type=int)
+        since = parse_date(request.args.get('since'))
+        until = parse_date(request.args.get('until'))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid search parameter: {str(e)}", "status": "error"}), 400
+    
+    try:
+        with read_session(db) as session:
+            rows = analysis_store.search_visions(
+                session, Vision, VisionTag, themes=themes, symbols=symbols,
+                since=since, until=until, before_id=before_id, limit=limit
+            )
+        visions = []
+        for vision_id, title, date_submitted, payload in rows:
+            payload = payload if isinstance(payload, dict) else json.loads(payload or '{}')
+            visions.append({
+                "id": vision_id,
+                "title": title,
+                "date_submitted": date_submitted.isoformat() if date_submitted else None,
+                "themes": payload.get('t', payload.get('themes', [])),
+                "symbols": payload.get('s', [symbol['symbol'] for symbol in payload.get('found_symbols', [])])
+            })
+        return jsonify({
+            "visions": visions,
+            "next_before_id": visions[-1]["id"] if len(visions) == limit else None,
+            "status": "success"
+        })
+    except Exception as e:
+        error_msg = f"Error searching visions: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"error": error_msg, "status": "error"}), 500
+
+@app.route('/analytics')
+def get_analytics():
+    """Daily theme and symbol frequencies and top co-occurring tags, read from the rollups"""
+    try:
+        since = parse_date(request.args.get('since'))
+        until = parse_date(request.args.get('until'))
+        top = min(int(request.args.get('top', 20)), 200)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid analytics parameter: {str(e)}", "status": "error"}), 400
+    
+    try:
+        with read_session(db) as session:
+            report = rollups.analytics(
+                session, ROLLUP_TABLES,
+                since=since.date() if since else None, until=until.date() if until else None, top_pairs=top
+            )
+        report["status"] = "success"
+        return jsonify(report)
+    except Exception as e:
+        error_msg = f"Error reading analytics: {str(e)}"
+        logger.error(error_msg)
+        return jsonify({"error": error_msg, "status": "error"}), 500
+
+def admin_authorized():
+    """True when admin endpoints are enabled and the request carries the admin token"""
+    token = app.config['ADMIN_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+@app.route('/export')
+def export_visions():
+    """Stream stored visions with their analyses as JSONL or CSV, optionally since an id or date"""
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized", "status": "error"}), 403
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in ('jsonl', 'csv'):
+        return jsonify({"error": "format must be 'jsonl' or 'csv'", "status": "error"}), 400
+    try:
+        since_id = request.args.get('since_id', type=int)
+        since = parse_date(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid export parameter: {str(e)}", "status": "error"}), 400
+    
+    def generate():
+        with read_session(db) as session:
+            records = export.iter_visions(
+                session, Vision, SYMBOL_BY_NAME, since_id=since_id, since=since
+            )
+            yield from (export.csv_chunks(records) if fmt == 'csv' else export.jsonl_chunks(records))
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=visions.{fmt}'
+    })
+
+@app.route('/admin/shadow')
+def shadow_summary():
+    """Summarize this worker's shadow comparison of the candidate ruleset against the live analyzer"""
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized", "status": "error"}), 403
+    summary = shadow_evaluator.summary()
+    summary.update({"pid": os.getpid(), "status": "success"})
+    return jsonify(summary)
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """List the most recent request profiles written by this host"""
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized", "status": "error"}), 403
+    return jsonify({"profiles": request_profiler.list_profiles(), "status": "success"})
+
+@app.route('/admin/profiles/<name>')
+def download_profile(name):
+    """Download one request profile"""
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized", "status": "error"}), 403
+    return send_from_directory(os.path.abspath(app.config['PROFILE_DIR']), name, as_attachment=True)
+
+@app.route('/worker_metrics')
+def worker_metrics():
+    """Report this worker's memory, vocabulary and analyzer statistics"""
+    analyzers = get_analyzers()
+    metrics = analyzers.memory_guard.metrics()
+    metrics.update({
+        "segment_cache_size": len(analyzers.full._segment_cache),
+        "segment_cache_hits": analyzers.full.segment_cache_hits,
+        "segment_cache_misses": analyzers.full.segment_cache_misses,
+        "analyzer_tiers": tier_selector.stats(),
+        "admission": admission.metrics(),
+        "rollup_write_failures": rollup_write_failures
+    })
+    return jsonify(metrics)
+
 @app.route('/symbols')
 def get_symbols():
     """Return biblical symbols organized by category"""
-    from biblical_symbols import BIBLICAL_SYMBOLS
-    
-    # Organize symbols by category
-    symbols_by_category = {}
-    for symbol in BIBLICAL_SYMBOLS:
-        category = symbol['category']
-        if category not in symbols_by_category:
-            symbols_by_category[category] = []
-        symbols_by_category[category].append(symbol)
-    
-    return jsonify(symbols_by_category)
+    return jsonify(SYMBOLS_BY_CATEGORY)
+
+@app.route('/symbols/<path:name>/related')
+def related_symbols(name):
+    """Return the symbols most closely linked to one symbol, strongest first"""
+    graph = get_symbol_graph()
+    if name not in graph:
+        return jsonify({"error": f"Unknown symbol: {name}", "status": "error"}), 404
+    symbol = SYMBOL_BY_NAME[graph.names[graph.index[name.lower()]]]
+    k = min(request.args.get('k', 5, type=int), graph.max_neighbors)
+    related = []
+    for neighbor in graph.related(name, k):
+        entry = dict(SYMBOL_BY_NAME[neighbor.symbol], weight=neighbor.weight)
+        entry.update(graph.explain(name, neighbor.symbol))
+        related.append(entry)
+    return jsonify({"symbol": symbol, "related": related, "status": "success"})
 
 @app.route('/symbols_by_category')
 def get_symbols_by_category():
-    symbols = BiblicalSymbol.query.all()
+    with read_session(db) as session:
+        symbols = session.query(BiblicalSymbol).all()
     symbols_by_category = {}
     for symbol in symbols:
         category = symbol.category
@@ -201,16 +978,16 @@ def initialize_database():
 def database_status():
     """Check database status and symbol count"""
     try:
-        with app.app_context():
+        with app.app_context(), read_session(db) as session:
             # Check if tables exist
-            inspector = db.inspect(db.engine)
+            inspector = db.inspect(session.get_bind())
             tables = inspector.get_table_names()
             
             # Count symbols
-            symbol_count = BiblicalSymbol.query.count()
+            symbol_count = session.query(BiblicalSymbol).count()
             
             # Get sample symbols
-            sample_symbols = BiblicalSymbol.query.limit(3).all()
+            sample_symbols = session.query(BiblicalSymbol).limit(3).all()
             sample_data = [
                 {
                     "symbol": s.symbol,
@@ -224,7 +1001,9 @@ def database_status():
                 "database_url": app.config['SQLALCHEMY_DATABASE_URI'].split('@')[-1] if '@' in app.config['SQLALCHEMY_DATABASE_URI'] else 'sqlite',
                 "tables": tables,
                 "symbol_count": symbol_count,
-                "sample_symbols": sample_data
+                "sample_symbols": sample_data,
+                "read_replica": has_replica(db),
+                "pool": pool_metrics.snapshot(db.engines)
             }), 200
             
     except Exception as e:
@@ -236,16 +1015,93 @@ def database_status():
             "database_url": app.config['SQLALCHEMY_DATABASE_URI'].split('@')[-1] if '@' in app.config['SQLALCHEMY_DATABASE_URI'] else 'sqlite'
         }), 500
 
+def warm_database():
+    """Open a pooled connection and touch the symbol table"""
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))
+        BiblicalSymbol.query.first()
+        db.session.remove()
+
+def warm_similarity_index():
+    # Warm-up runs before the worker takes traffic, so it can catch up in place
+    catch_up_similarity_index()
+
+# Required warm-up steps that fail are retried with exponential backoff; after
+# WARMUP_MAX_ATTEMPTS the worker stays unready and /ready keeps answering 503
+app.config['WARMUP_MAX_ATTEMPTS'] = int(os.environ.get('WARMUP_MAX_ATTEMPTS', 3))
+app.config['WARMUP_RETRY_BACKOFF_SECONDS'] = float(os.environ.get('WARMUP_RETRY_BACKOFF_SECONDS', 1.0))
+
+worker_warmup = WarmUp([
+    ('database', warm_database, False),
+    ('full_analyzer', lambda: [get_analyzers().full.analyze_vision(text) for text in WARMUP_CORPUS], True),
+    ('fast_analyzer', lambda: [get_analyzers().fast.analyze_vision(text) for text in WARMUP_CORPUS], False),
+    ('near_duplicate', lambda: near_duplicate.minhash(WARMUP_CORPUS[0]), False),
+    ('similarity_index', warm_similarity_index, False),
+    ('symbol_graph', refresh_symbol_graph, False),
+], max_attempts=app.config['WARMUP_MAX_ATTEMPTS'], backoff=app.config['WARMUP_RETRY_BACKOFF_SECONDS'])
+
+@app.route('/ready')
+def readiness():
+    """Report 200 once this worker has warmed up, 503 until then"""
+    # Servers without the gunicorn post-fork hook start warming up on the first probe
+    worker_warmup.start_in_background()
+    report = worker_warmup.report()
+    return jsonify(report), 200 if report['ready'] else 503
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the analytics rollups from all stored visions"""
+    started = time.monotonic()
+    visions = rollups.rebuild(db.session, ROLLUP_TABLES, Vision)
+    click.echo(f"Rebuilt rollups from {visions} visions in {time.monotonic() - started:.1f}s")
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Bring an existing database up to the current schema without dropping data"""
+    applied = upgrade_schema()
+    click.echo(f"Applied upgrades: {', '.join(applied)}" if applied else "Schema is up to date")
+
+@app.cli.command('update-similarity-index')
+def update_similarity_index_command():
+    """Add stored visions missing from the similarity index file and save it"""
+    started = time.monotonic()
+    added = catch_up_similarity_index(force_save=True)
+    click.echo(f"Added {added} visions to the similarity index in {time.monotonic() - started:.1f}s")
+
+@app.cli.command('export')
+@click.option('--format', 'fmt', type=click.Choice(export.EXPORT_FORMATS), default='jsonl')
+@click.option('--output', '-o', default='-', help="output file; '-' writes to stdout (not for parquet)")
+@click.option('--since-id', type=int, default=None, help="only visions with a larger id")
+@click.option('--since', default=None, help="only visions submitted on or after this ISO date")
+def export_command(fmt, output, since_id, since):
+    """Export stored visions and analyses as JSONL, CSV or Parquet"""
+    records = export.iter_visions(
+        db.session, Vision, SYMBOL_BY_NAME, since_id=since_id, since=parse_date(since)
+    )
+    if fmt == 'parquet':
+        if output == '-':
+            raise click.UsageError("Parquet export needs --output")
+        try:
+            count = export.write_parquet(records, output)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Exported {count} visions to {output}", err=True)
+        return
+    chunks = export.csv_chunks(records) if fmt == 'csv' else export.jsonl_chunks(records)
+    with click.open_file(output, 'w', encoding='utf-8') as stream:
+        for chunk in chunks:
+            stream.write(chunk)
+
 def init_db():
     with app.app_context():
-        db.create_all()
+        upgrade_schema()
         # Use the new populate_database function
         populate_database(db, BiblicalSymbol)
 
 if __name__ == '__main__':
     with app.app_context():
         try:
-            db.create_all()
+            upgrade_schema()
             logger.info("Database tables created successfully")
             
             # Initialize biblical symbols in the database
@@ -255,13 +1111,11 @@ if __name__ == '__main__':
             except Exception as e:
                 logger.error(f"Error populating biblical symbols: {str(e)}")
             
-            # Test the vision analyzer
-            test_vision = "Test vision"
-            try:
-                result = vision_analyzer.analyze_vision(test_vision)
-                logger.info("Vision analyzer test successful")
-            except Exception as e:
-                logger.error(f"Vision analyzer test failed: {str(e)}")
+            # Warm up the analyzers, caches and connection pool before serving
+            if worker_warmup.run():
+                logger.info("Vision analyzer warm-up successful")
+            else:
+                logger.error(f"Vision analyzer warm-up failed: {worker_warmup.errors}")
                 
         except Exception as e:
             logger.error(f"Error during initialization: {str(e)}")
@@ -0,0 +1,449 @@
+"""Benchmarks for the Biblical Vision Analyzer
+
+Run with ``python benchmarks.py <name>``; ``python benchmarks.py --help`` lists them.
+Benchmarks that use the full analyzer need the spaCy model installed.
+"""
+
+import argparse
+import statistics
+import time
+
+from biblical_symbols import BIBLICAL_SYMBOLS
+
+CORPUS = [
+    "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body",
+    "A lion stood on a mountain and roared. The sound shook the ground and I was afraid",
+    "I was walking by a river of living water. A dove came down and rested on my shoulder and I felt peace",
+    "There was a great battle in the sky. Angels with swords fought against a dark enemy and won the victory",
+    "I dreamed I was in a dark room. A door opened and bright light poured in. A voice said to follow the path",
+    "A serpent was hiding in the grass near my house. I grabbed a stick and it fled",
+    "I saw a tree of life with golden fruit. Birds were eating from it and the leaves were healing the nations",
+    "My phone screen started glowing and words appeared. It said to pray for my family quickly",
+    "I was on a boat in a storm. The waves were huge and I cried out. Then the wind stopped and the sea was calm",
+    "Fire fell from heaven on an altar. Oil was poured on my head and I felt power in my hands",
+    "I saw a crown of gold on a throne. A lamb sat on the throne and everyone was worshipping",
+    "An eagle carried me above the clouds. I could see a new city with walls of precious stones",
+    "I was hungry in a desert. Someone gave me bread and a cup of wine and I was strengthened",
+    "A trumpet sounded and the stars fell. I heard thunder and saw lightning over the sea",
+    "I was chained in a prison. Keys appeared in my hand and I unlocked the door and escaped",
+    "Seeds were planted in a field. They grew quickly into a harvest and I helped reap it",
+    "I saw rain falling on dry ground and green plants growing everywhere. I was glad",
+    "A man in white garments handed me a scroll and told me to write the vision down",
+    "I was running from a dark shadow. I hid under the wings of a huge bird and was safe",
+    "Water came out of a rock. People were drinking and the desert turned into a garden",
+]
+
+
+def _timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _report(name, timings, items):
+    per_item = statistics.median(timings) / items * 1000
+    print(f"{name:<28} median {per_item:8.3f} ms/vision   ({items / statistics.median(timings):8.1f} visions/s)")
+
+
+def _jaccard(first, second):
+    first, second = set(first), set(second)
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def bench_tiers(args):
+    """Compare full (spaCy) and fast (rule) analyzer tiers: throughput and agreement."""
+    from vision_analyzer import VisionAnalyzer
+    from fast_analyzer import RuleAnalyzer
+
+    full = VisionAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=0)
+    fast = RuleAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=0)
+    corpus = CORPUS * args.scale
+
+    for name, analyzer in (('full tier', full), ('fast tier', fast)):
+        analyzer.analyze_vision(corpus[0])
+        timings = _timed(lambda: [analyzer.analyze_vision(text) for text in corpus], args.repeat)
+        _report(name, timings, len(corpus))
+
+    exact = 0
+    theme_overlap = []
+    entity_overlap = []
+    action_overlap = []
+    for text in CORPUS:
+        full_result = full.analyze_vision(text)
+        fast_result = fast.analyze_vision(text)
+        exact += set(full_result['themes']) == set(fast_result['themes'])
+        theme_overlap.append(_jaccard(full_result['themes'], fast_result['themes']))
+        full_doc = full.nlp(text.lower())
+        fast_doc = fast.nlp(text.lower())
+        entity_overlap.append(_jaccard(full._extract_entities(full_doc), fast._extract_entities(fast_doc)))
+        action_overlap.append(_jaccard(full._extract_actions(full_doc), fast._extract_actions(fast_doc)))
+
+    print(f"theme sets identical: {exact}/{len(CORPUS)}")
+    print(f"mean theme Jaccard:   {statistics.mean(theme_overlap):.3f}")
+    print(f"mean entity Jaccard:  {statistics.mean(entity_overlap):.3f}")
+    print(f"mean action Jaccard:  {statistics.mean(action_overlap):.3f}")
+
+
+def bench_admission(args):
+    """Per-request overhead of the token bucket store and the concurrency slots."""
+    import tempfile
+    from admission import ConcurrencySlots, TokenBucketStore
+
+    directory = tempfile.mkdtemp()
+    buckets = TokenBucketStore(f"{directory}/buckets.db", rate=1000.0, burst=1000)
+    slots = ConcurrencySlots(f"{directory}/slots", limit=8)
+    requests = 1000 * args.scale
+    clients = [f"ip:10.0.{index // 256}.{index % 256}" for index in range(1000)]
+
+    def take_tokens():
+        for index in range(requests):
+            buckets.take(clients[index % len(clients)])
+
+    def hold_slots():
+        for _ in range(requests):
+            slots.release(slots.acquire())
+
+    for name, fn in (('token bucket', take_tokens), ('concurrency slot', hold_slots)):
+        timings = _timed(fn, args.repeat)
+        print(f"{name:<20} {statistics.median(timings) / requests * 1e6:8.1f} us/request")
+
+
+def bench_memory(args):
+    """Long-text allocations: peak traced memory per request and memory kept by the segment cache."""
+    import tracemalloc
+    from vision_analyzer import VisionAnalyzer
+
+    analyzer = VisionAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=1000000)
+    analyzer.analyze_vision(' '.join(CORPUS))
+    sentences = [sentence for text in CORPUS for sentence in text.split('. ')] * args.scale
+    peaks = []
+    retained_bytes = 0
+    retained_blocks = 0
+    segments = 0
+    tracemalloc.start()
+    for request_number in range(args.repeat):
+        # Number every sentence so no segment is served from the cache
+        text = '. '.join(f"{sentence} {request_number} {index}" for index, sentence in enumerate(sentences))
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        analyzer.analyze_vision(text)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+        after = tracemalloc.take_snapshot()
+        for stat in after.compare_to(before, 'filename'):
+            retained_bytes += stat.size_diff
+            retained_blocks += stat.count_diff
+        segments += len(sentences)
+    tracemalloc.stop()
+    print(f"{len(sentences)} segments, {sum(map(len, sentences))} characters per request")
+    print(f"peak traced memory per request: {statistics.median(peaks) / 1024:9.1f} KiB")
+    print(f"retained per cached segment:    {retained_bytes / segments:9.1f} bytes in {retained_blocks / segments:.1f} blocks")
+
+
+def bench_emotions(args):
+    """Emotion scoring: the old four-emotion keyword loop against the lexicon, per vision and batched."""
+    from collections import Counter, defaultdict
+    from emotion_lexicon import EMOTION_LEXICON, EmotionLexicon, load_lexicon
+    from fast_analyzer import RuleTokenizer
+
+    legacy_keywords = {
+        'joy': ['happy', 'joy', 'delight', 'peace', 'glad'],
+        'fear': ['afraid', 'fear', 'terror', 'dread', 'anxiety'],
+        'urgency': ['urgent', 'immediate', 'quick', 'soon', 'hurry'],
+        'peace': ['calm', 'peace', 'quiet', 'rest', 'still']
+    }
+    legacy_lookup = defaultdict(list)
+    for emotion, keywords in legacy_keywords.items():
+        for keyword in keywords:
+            legacy_lookup[keyword].append(emotion)
+
+    def legacy(doc):
+        found = Counter()
+        for token in doc:
+            for emotion in legacy_lookup.get(token.lemma_, ()):
+                found[emotion] += 1
+        return found
+
+    tokenizer = RuleTokenizer()
+    docs = [tokenizer(text.lower()) for text in CORPUS * args.scale]
+    lexicon = load_lexicon(args.lexicon)
+    # Same lexicon padded with synthetic terms, to show lookups don't slow down with size
+    padded = {emotion: dict(terms) for emotion, terms in EMOTION_LEXICON.items()}
+    for index in range(20000):
+        padded['joy'][f"term{index}"] = 0.5
+    large = EmotionLexicon(padded)
+    print(f"{len(docs)} visions; lexicon {len(lexicon)} terms x {len(lexicon.emotions)} emotions, "
+          f"padded {len(large)} terms")
+
+    _report('keyword loop (4 emotions)', _timed(lambda: [legacy(doc) for doc in docs], args.repeat), len(docs))
+    _report('lexicon, per vision', _timed(lambda: [lexicon.score(doc) for doc in docs], args.repeat), len(docs))
+    _report('lexicon, batch', _timed(lambda: lexicon.score_batch(docs), args.repeat), len(docs))
+    _report('padded lexicon, batch', _timed(lambda: large.score_batch(docs), args.repeat), len(docs))
+    found = sum(1 for row in lexicon.score_batch(docs) if row.any())
+    print(f"visions with any emotion: keyword loop {sum(1 for doc in docs if legacy(doc))}, lexicon {found}")
+
+
+def bench_fuzzy(args):
+    """Typo-tolerant lookups: index build time and lookup latency for 1k to 100k terms."""
+    import random
+    from fuzzy_index import FuzzyIndex
+
+    rng = random.Random(7)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    def word():
+        return ''.join(rng.choice(letters) for _ in range(rng.randint(4, 12)))
+
+    def typo(term):
+        position = rng.randrange(len(term))
+        return term[:position] + rng.choice(letters) + term[position + 1:]
+
+    for size in (1000, 10000, 100000):
+        terms = list({word() for _ in range(size)})
+        started = time.perf_counter()
+        index = FuzzyIndex(terms)
+        built = time.perf_counter() - started
+        typos = [typo(rng.choice(terms)) for _ in range(2000)]
+        misses = [word() + 'q' for _ in range(2000)]
+        for name, queries in (('typo', typos), ('miss', misses)):
+            timings = []
+            for _ in range(args.repeat):
+                index._memo.clear()
+                started = time.perf_counter()
+                for query in queries:
+                    index.lookup(query)
+                timings.append(time.perf_counter() - started)
+            per_lookup = statistics.median(timings) / len(queries) * 1e6
+            print(f"{len(terms):>7} terms  build {built:6.2f}s  {len(index.deletes):>9} deletes  "
+                  f"{name} lookup {per_lookup:7.1f} us")
+        for query in typos:
+            index.lookup(query)
+        started = time.perf_counter()
+        for query in typos:
+            index.lookup(query)
+        print(f"{'':>7} memoized lookup {(time.perf_counter() - started) / len(typos) * 1e6:7.2f} us")
+
+
+def bench_responses(args):
+    """Serialization time and bytes on the wire per response format, on fast-tier analyses."""
+    import gzip
+    import json
+    from fast_analyzer import RuleAnalyzer
+    import responses
+
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=0)
+    payloads = [
+        {"interpretation": analyzer.analyze_vision(text), "vision_id": index, "analyzer_tier": "fast", "status": "success"}
+        for index, text in enumerate(CORPUS)
+    ]
+
+    def stdlib(payload):
+        return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+    encoders = [('json (stdlib)', stdlib)]
+    if responses.orjson is not None:
+        option = responses.orjson.OPT_NON_STR_KEYS | responses.orjson.OPT_SORT_KEYS
+        encoders.append(('json (orjson)', lambda payload: responses.orjson.dumps(payload, option=option)))
+    if responses.msgpack is not None:
+        encoders.append(('msgpack', lambda payload: responses.msgpack.packb(payload, use_bin_type=True)))
+    fastest_json = encoders[1][1] if len(encoders) > 1 and encoders[1][0] == 'json (orjson)' else stdlib
+    encoders.append(('json + gzip', lambda payload: gzip.compress(fastest_json(payload), responses.GZIP_LEVEL)))
+    if responses.zstandard is not None:
+        compressor = responses.zstandard.ZstdCompressor(level=responses.ZSTD_LEVEL)
+        encoders.append(('json + zstd', lambda payload: compressor.compress(fastest_json(payload))))
+    for name in ('orjson', 'msgpack', 'zstandard'):
+        if getattr(responses, name) is None:
+            print(f"({name} not installed; skipped)")
+
+    for name, encode in encoders:
+        timings = _timed(lambda: [encode(payload) for payload in payloads * args.scale], args.repeat)
+        size = statistics.mean(len(encode(payload)) for payload in payloads)
+        per_response = statistics.median(timings) / (len(payloads) * args.scale) * 1e6
+        print(f"{name:<16} {per_response:8.1f} us/response   {size:8.0f} bytes/response")
+
+
+def bench_pipe(args):
+    """Core scaling of analyze_batch with the rule component under nlp.pipe(n_process=N)."""
+    from vision_analyzer import VisionAnalyzer
+
+    analyzer = VisionAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=0)
+    # Make every segment distinct so batch de-duplication doesn't hide the work
+    corpus = [f"{text.replace('. ', f' {index}. ')} {index}" for index, text in enumerate(CORPUS * args.scale * 10)]
+    baseline = None
+    for n_process in (1, 2, 4, 8):
+        timings = _timed(lambda: analyzer.analyze_batch(corpus, n_process=n_process, batch_size=64), args.repeat)
+        _report(f"n_process={n_process}", timings, len(corpus))
+        baseline = baseline or statistics.median(timings)
+        print(f"{'':<28} speedup x{baseline / statistics.median(timings):.2f}")
+
+
+def bench_soak(args):
+    """Memory soak: many requests of never-seen words, with the MemoryGuard resetting the vocab."""
+    import random
+    import string
+    from vision_analyzer import VisionAnalyzer
+    from memory_guard import MemoryGuard, current_rss_mb
+
+    analyzer = VisionAnalyzer(BIBLICAL_SYMBOLS)
+    guard = MemoryGuard(analyzer, max_new_strings=args.max_new_strings, check_every=100)
+    rng = random.Random(7)
+    report_every = max(args.requests // 20, 1)
+    samples = []
+    started = time.perf_counter()
+    for request_number in range(1, args.requests + 1):
+        invented = ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(8))
+        analyzer.analyze_vision(f"{rng.choice(CORPUS)} and then {invented}")
+        guard.after_analysis()
+        if request_number % report_every == 0:
+            metrics = guard.metrics()
+            samples.append(metrics['rss_mb'])
+            print(f"{request_number:>9} requests  rss {metrics['rss_mb']:8.1f} MB  "
+                  f"strings {metrics['vocab_strings']:>9}  reloads {metrics['model_reloads']:>4}  "
+                  f"{request_number / (time.perf_counter() - started):7.1f} req/s")
+    # Compare against the first sample after warm-up so start-up allocation isn't counted as growth
+    baseline = samples[min(1, len(samples) - 1)]
+    print(f"RSS growth after warm-up: {current_rss_mb() - baseline:+.1f} MB")
+
+
+def _worker_pss_mb(master_pid):
+    """Summed proportional set size of a gunicorn master's workers (Linux), so pages shared after fork count once."""
+    import os
+
+    total = 0.0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as handle:
+                parent = int(handle.read().rsplit(')', 1)[1].split()[1])
+            if parent != master_pid:
+                continue
+            with open(f"/proc/{entry}/smaps_rollup") as handle:
+                for line in handle:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1]) / 1024
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+def bench_workers(args):
+    """Throughput, latency and memory of /submit_vision under sync, gthread and multi-process gunicorn.
+
+    Starts gunicorn with this directory's gunicorn.conf.py for each worker
+    configuration; submissions are stored in the configured database, so run
+    it against a scratch one.
+    """
+    import json
+    import os
+    import socket
+    import subprocess
+    import sys
+    import tempfile
+    import urllib.error
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+    configs = [
+        ('sync 1x1', 1, 1),
+        (f"gthread 1x{args.threads}", 1, args.threads),
+        (f"sync {args.workers}x1", args.workers, 1),
+        (f"gthread {args.workers}x{args.threads}", args.workers, args.threads),
+    ]
+    directory = tempfile.mkdtemp()
+    requests = 20 * args.scale
+    sentences = [sentence for text in CORPUS for sentence in text.split('. ')]
+
+    def description(index):
+        # Number every sentence so no segment is served from a worker's cache
+        return '. '.join(f"{sentence} {index}" for sentence in sentences[index % len(sentences):][:4])
+
+    for name, workers, threads in configs:
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        env = dict(
+            os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), LOG_LEVEL='WARNING',
+            RATE_LIMIT_PER_MINUTE='0', MAX_CONCURRENT_ANALYSES='0', NEAR_DUPLICATE_MODE='off',
+            ANALYZER_FAST_TIER='off', SIMILARITY_INDEX_PATH=os.path.join(directory, f"similarity-{port}.npz")
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{port}", 'app:app'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env
+        )
+        try:
+            # Every worker reports ready for itself; wait for a run of 200s
+            deadline = time.monotonic() + 300
+            ready = 0
+            while ready < 3 * workers:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"gunicorn ({name}) did not become ready")
+                try:
+                    with urllib.request.urlopen(f"{base}/ready", timeout=5):
+                        ready += 1
+                except (urllib.error.URLError, OSError):
+                    ready = 0
+                    time.sleep(0.5)
+
+            def submit(index):
+                body = json.dumps({'description': description(index), 'context': ''}).encode('utf-8')
+                started = time.perf_counter()
+                submission = urllib.request.Request(
+                    f"{base}/submit_vision", data=body, headers={'Content-Type': 'application/json'}
+                )
+                with urllib.request.urlopen(submission, timeout=120) as response:
+                    response.read()
+                return time.perf_counter() - started
+
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                list(pool.map(submit, range(-args.concurrency, 0)))
+                started = time.perf_counter()
+                latencies = sorted(pool.map(submit, range(requests)))
+                elapsed = time.perf_counter() - started
+            print(f"{name:<14} {requests / elapsed:7.1f} req/s   p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms   "
+                  f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms   workers PSS {_worker_pss_mb(server.pid):7.1f} MB")
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+BENCHMARKS = {
+    'admission': bench_admission,
+    'emotions': bench_emotions,
+    'fuzzy': bench_fuzzy,
+    'memory': bench_memory,
+    'pipe': bench_pipe,
+    'responses': bench_responses,
+    'soak': bench_soak,
+    'tiers': bench_tiers,
+    'workers': bench_workers,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Biblical Vision Analyzer benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=5, help="timing repetitions")
+    parser.add_argument('--scale', type=int, default=10, help="corpus multiplier")
+    parser.add_argument('--requests', type=int, default=1000000, help="requests for the soak benchmark")
+    parser.add_argument('--lexicon', default='', help="extra emotion lexicon file for the emotions benchmark")
+    parser.add_argument('--max-new-strings', type=int, default=200000, help="vocab growth before a model reload")
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn worker processes for the workers benchmark")
+    parser.add_argument('--threads', type=int, default=4, help="gthread threads per worker for the workers benchmark")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent clients for the workers benchmark")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,23 @@
 
 from typing import Dict, List, Any
 import re
+from theme_scorer import ThemeScorer
+
+THEME_KEYWORDS = {
+    "guidance": ["direction", "path", "way", "lead", "guide", "wisdom", "counsel"],
+    "warning": ["caution", "danger", "alert", "watch", "careful", "guard"],
+    "encouragement": ["strength", "courage", "comfort", "hope", "uplift"],
+    "spiritual_growth": ["grow", "mature", "develop", "learn", "progress"],
+    "divine_timing": ["time", "season", "moment", "wait", "patience"],
+    "spiritual_warfare": ["battle", "fight", "enemy", "warfare", "protect", "hurt"],
+    "restoration": ["restore", "heal", "renew", "rebuild", "recover"],
+    "transformation": ["change", "transform", "new", "different", "become"],
+    "prophetic_insight": ["vision", "dream", "prophecy", "reveal", "show"]
+}
 
 class CommentaryGenerator:
     def __init__(self):
+        self.theme_scorer = ThemeScorer([(THEME_KEYWORDS, 1.0)])
         self.thematic_verses = {
             "guidance": [
                 ("Psalm 32:8", "I will instruct you and teach you in the way you should go; I will counsel you with my eye upon you."),
@@ -108,24 +122,9 @@ class CommentaryGenerator:
 
     def identify_themes(self, vision_text: str, context: str = "") -> List[str]:
         """Identify major themes in the vision"""
-        theme_keywords = {
-            "guidance": ["direction", "path", "way", "lead", "guide", "wisdom", "counsel"],
-            "warning": ["caution", "danger", "alert", "watch", "careful", "guard"],
-            "encouragement": ["strength", "courage", "comfort", "hope", "uplift"],
-            "spiritual_growth": ["grow", "mature", "develop", "learn", "progress"],
-            "divine_timing": ["time", "season", "moment", "wait", "patience"],
-            "spiritual_warfare": ["battle", "fight", "enemy", "warfare", "protect", "hurt"],
-            "restoration": ["restore", "heal", "renew", "rebuild", "recover"],
-            "transformation": ["change", "transform", "new", "different", "become"],
-            "prophetic_insight": ["vision", "dream", "prophecy", "reveal", "show"]
-        }
-        
-        identified_themes = []
-        combined_text = (vision_text + " " + context).lower()
-        
-        for theme, keywords in theme_keywords.items():
-            if any(keyword in combined_text for keyword in keywords):
-                identified_themes.append(theme)
+        combined_text = vision_text + " " + context
+        found = self.theme_scorer.identify(self.theme_scorer.tokenize(combined_text))
+        identified_themes = [theme for theme in THEME_KEYWORDS if theme in found]
         
         # Always include prophetic_insight for vision interpretation
         if "prophetic_insight" not in identified_themes:
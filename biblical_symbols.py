@@ -291,6 +291,28 @@ BIBLICAL_SYMBOLS = [
     }
 ]
 
+# Multi-word expressions that refer to a catalogue symbol
+SYMBOL_ALIASES = {
+    "tree of life": "Tree",
+    "living water": "Water",
+    "living waters": "Water",
+    "river of life": "Water",
+    "bread of life": "Bread",
+    "lion of judah": "Lion",
+    "crown of thorns": "Crown",
+    "crown of life": "Crown",
+    "white robe": "White Garments",
+    "white robes": "White Garments",
+    "morning star": "Stars",
+    "new wine": "Wine",
+    "cup of wrath": "Cup",
+    "holy oil": "Oil",
+    "anointing oil": "Oil",
+    "narrow door": "Door",
+    "narrow gate": "Door",
+    "sword of the spirit": "Sword"
+}
+
 def populate_database(db, BiblicalSymbol):
     """Populate the database with biblical symbols"""
     # Clear existing symbols
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Tests that import app get a throwaway SQLite database instead of instance/visions.db
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'visions.db'))
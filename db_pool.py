@@ -0,0 +1,63 @@
+"""Connection-pool metrics and read-replica routing for the vision database"""
+
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+REPLICA_BIND = 'replica'
+POOL_EVENTS = ('connect', 'checkout', 'checkin', 'invalidate')
+
+
+class PoolMetrics:
+    """Counts pool events per engine and reports them with the pool's current state."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def attach(self, name, engine):
+        counts = self.counts.setdefault(name, Counter())
+        for event_name in POOL_EVENTS:
+            event.listen(engine, event_name, self._counter(counts, event_name))
+
+    @staticmethod
+    def _counter(counts, event_name):
+        def count(*args):
+            counts[event_name] += 1
+        return count
+
+    def snapshot(self, engines):
+        report = {}
+        for name, engine in engines.items():
+            pool = engine.pool
+            state = {'pool_class': type(pool).__name__}
+            # Only queue-style pools track size and overflow
+            for attribute in ('size', 'checkedin', 'checkedout', 'overflow'):
+                method = getattr(pool, attribute, None)
+                if callable(method):
+                    state[attribute] = method()
+            state.update({f"{event_name}s": self.counts.get(name, {}).get(event_name, 0) for event_name in POOL_EVENTS})
+            report[name or 'primary'] = state
+        return report
+
+
+def has_replica(db):
+    return REPLICA_BIND in db.engines
+
+
+@contextmanager
+def read_session(db):
+    """Session for read-only queries: bound to the replica when one is configured.
+
+    Without a replica this is the normal request session, so reads share its
+    connection. Replica reads can lag the primary by the replication delay.
+    """
+    if not has_replica(db):
+        yield db.session
+        return
+    session = Session(db.engines[REPLICA_BIND])
+    try:
+        yield session
+    finally:
+        session.close()
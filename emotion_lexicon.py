@@ -0,0 +1,210 @@
+"""Lexicon-based emotion intensity scoring
+
+A weighted term -> emotion lexicon is compiled into a dense (terms x emotions)
+weight array. A vision's tokens are mapped to term ids and its intensities
+are the weighted sum of their rows, with terms in the scope of a negation
+("not afraid", "no peace") counted at NEGATION_WEIGHT. Many visions are
+scored together with one sparse (visions x terms) product.
+
+The built-in lexicon can be extended with a tab-separated file of
+``term<TAB>emotion<TAB>weight`` lines (the layout of the NRC Emotion
+Intensity Lexicon), e.g. to load a full published lexicon.
+"""
+
+import functools
+from collections import Counter
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+from scipy import sparse
+
+# emotion -> {lemma: weight in (0, 1]}
+EMOTION_LEXICON = {
+    'joy': {
+        'joy': 1.0, 'joyful': 1.0, 'rejoice': 1.0, 'jubilant': 1.0, 'ecstatic': 1.0, 'elated': 0.9,
+        'delight': 0.9, 'delighted': 0.9, 'glad': 0.8, 'gladness': 0.8, 'happy': 0.8, 'happiness': 0.8,
+        'cheerful': 0.7, 'laugh': 0.7, 'laughter': 0.7, 'smile': 0.6, 'celebrate': 0.8, 'celebration': 0.8,
+        'sing': 0.5, 'song': 0.4, 'dance': 0.6, 'feast': 0.5, 'bliss': 0.9, 'blessed': 0.6,
+        'thankful': 0.6, 'grateful': 0.6, 'gratitude': 0.6, 'praise': 0.6, 'shout': 0.4, 'excited': 0.7,
+        'excitement': 0.7, 'wonderful': 0.7, 'beautiful': 0.5, 'bright': 0.3, 'pleasure': 0.6, 'merry': 0.7,
+        'triumph': 0.6, 'victory': 0.5, 'fun': 0.5, 'enjoy': 0.6,
+    },
+    'peace': {
+        'peace': 1.0, 'peaceful': 1.0, 'calm': 0.9, 'serene': 0.9, 'serenity': 0.9, 'tranquil': 0.9,
+        'still': 0.5, 'stillness': 0.7, 'quiet': 0.6, 'rest': 0.7, 'restful': 0.8, 'relaxed': 0.7,
+        'gentle': 0.5, 'gently': 0.4, 'soft': 0.3, 'soothe': 0.7, 'comfort': 0.7, 'comforted': 0.8,
+        'content': 0.6, 'contentment': 0.7, 'settled': 0.5, 'ease': 0.5, 'safe': 0.6, 'secure': 0.5,
+        'shelter': 0.4, 'refuge': 0.5, 'stream': 0.3, 'meadow': 0.4, 'pasture': 0.4, 'dove': 0.3,
+        'harmony': 0.7, 'hush': 0.5, 'relief': 0.6, 'relieved': 0.7, 'warm': 0.3, 'embrace': 0.4,
+    },
+    'trust': {
+        'trust': 1.0, 'faith': 0.9, 'faithful': 0.9, 'believe': 0.7, 'belief': 0.7, 'confident': 0.7,
+        'confidence': 0.7, 'assurance': 0.8, 'assured': 0.8, 'certain': 0.5, 'rely': 0.7, 'depend': 0.5,
+        'loyal': 0.7, 'devoted': 0.7, 'covenant': 0.6, 'promise': 0.6, 'steadfast': 0.8, 'firm': 0.4,
+        'true': 0.4, 'truth': 0.5, 'honest': 0.6, 'protect': 0.5, 'protected': 0.6, 'guard': 0.4,
+        'guide': 0.5, 'lead': 0.3, 'shepherd': 0.5, 'father': 0.3, 'friend': 0.5, 'hold': 0.2,
+        'obey': 0.5, 'surrender': 0.5, 'follow': 0.3, 'anchor': 0.5, 'rock': 0.3,
+    },
+    'awe': {
+        'awe': 1.0, 'awesome': 0.8, 'glory': 0.9, 'glorious': 0.9, 'majesty': 0.9, 'majestic': 0.9,
+        'holy': 0.8, 'holiness': 0.8, 'wonder': 0.8, 'marvel': 0.8, 'marvelous': 0.8, 'amazed': 0.8,
+        'amazing': 0.7, 'astonished': 0.8, 'overwhelmed': 0.6, 'radiant': 0.7, 'shining': 0.6, 'shine': 0.5,
+        'brilliant': 0.6, 'dazzling': 0.7, 'light': 0.3, 'fire': 0.3, 'throne': 0.6, 'heaven': 0.5,
+        'heavenly': 0.6, 'angel': 0.5, 'worship': 0.7, 'bow': 0.4, 'kneel': 0.5, 'tremble': 0.4,
+        'vast': 0.5, 'mighty': 0.6, 'power': 0.3, 'thunder': 0.4, 'lightning': 0.4, 'cloud': 0.2,
+        'splendor': 0.8, 'sacred': 0.7, 'presence': 0.4,
+    },
+    'hope': {
+        'hope': 1.0, 'hopeful': 1.0, 'expect': 0.5, 'expectation': 0.5, 'anticipate': 0.6, 'await': 0.5,
+        'wait': 0.3, 'long': 0.3, 'longing': 0.6, 'yearn': 0.6, 'promise': 0.5, 'future': 0.4,
+        'new': 0.3, 'dawn': 0.6, 'morning': 0.3, 'sunrise': 0.6, 'rainbow': 0.7, 'spring': 0.4,
+        'seed': 0.4, 'grow': 0.4, 'bloom': 0.6, 'blossom': 0.6, 'harvest': 0.5, 'fruit': 0.3,
+        'restore': 0.7, 'restoration': 0.7, 'renew': 0.7, 'rebuild': 0.5, 'heal': 0.6, 'healing': 0.6,
+        'rise': 0.4, 'open': 0.2, 'door': 0.2, 'way': 0.1, 'destiny': 0.5, 'calling': 0.4,
+    },
+    'urgency': {
+        'urgent': 1.0, 'urgency': 1.0, 'immediate': 0.9, 'immediately': 0.9, 'hurry': 0.9, 'rush': 0.8,
+        'quick': 0.6, 'quickly': 0.7, 'soon': 0.6, 'now': 0.3, 'suddenly': 0.6, 'sudden': 0.6,
+        'fast': 0.5, 'run': 0.4, 'flee': 0.7, 'escape': 0.6, 'chase': 0.6, 'race': 0.5,
+        'deadline': 0.8, 'late': 0.5, 'alarm': 0.7, 'warning': 0.7, 'warn': 0.7, 'trumpet': 0.5,
+        'siren': 0.7, 'call': 0.2, 'must': 0.4, 'pressing': 0.6, 'desperate': 0.7, 'scramble': 0.6,
+        'haste': 0.8, 'hasten': 0.8, 'swift': 0.6,
+    },
+    'fear': {
+        'fear': 1.0, 'afraid': 1.0, 'terror': 1.0, 'terrified': 1.0, 'terrify': 0.9, 'horror': 0.9,
+        'horrified': 0.9, 'dread': 0.9, 'scared': 0.9, 'scary': 0.8, 'frightened': 0.9, 'fright': 0.8,
+        'panic': 0.9, 'anxiety': 0.8, 'anxious': 0.8, 'worried': 0.6, 'worry': 0.6, 'nervous': 0.6,
+        'threat': 0.7, 'threaten': 0.7, 'danger': 0.7, 'dangerous': 0.7, 'attack': 0.6, 'chase': 0.5,
+        'trap': 0.6, 'trapped': 0.7, 'hide': 0.4, 'dark': 0.4, 'darkness': 0.5, 'shadow': 0.4,
+        'monster': 0.7, 'demon': 0.7, 'serpent': 0.5, 'snake': 0.5, 'beast': 0.5, 'scream': 0.7,
+        'tremble': 0.6, 'shake': 0.4, 'fall': 0.4, 'drown': 0.7, 'lost': 0.5, 'death': 0.6,
+        'die': 0.6, 'nightmare': 0.8,
+    },
+    'sadness': {
+        'sad': 1.0, 'sadness': 1.0, 'sorrow': 1.0, 'grief': 1.0, 'grieve': 0.9, 'mourn': 0.9,
+        'mourning': 0.9, 'weep': 0.9, 'cry': 0.7, 'tear': 0.5, 'lament': 0.8, 'despair': 0.9,
+        'hopeless': 0.9, 'lonely': 0.8, 'alone': 0.5, 'abandoned': 0.8, 'empty': 0.5, 'broken': 0.7,
+        'heartbroken': 1.0, 'loss': 0.7, 'miss': 0.4, 'regret': 0.7, 'depressed': 0.9, 'heavy': 0.4,
+        'gray': 0.3, 'rain': 0.2, 'funeral': 0.8, 'grave': 0.6, 'ruin': 0.6, 'desolate': 0.8,
+        'wilderness': 0.3, 'dry': 0.3, 'wither': 0.5, 'sigh': 0.5, 'pain': 0.6, 'hurt': 0.6,
+    },
+    'anger': {
+        'anger': 1.0, 'angry': 1.0, 'rage': 1.0, 'fury': 1.0, 'furious': 1.0, 'wrath': 1.0,
+        'mad': 0.7, 'hate': 0.9, 'hatred': 0.9, 'resent': 0.7, 'resentment': 0.7, 'bitter': 0.6,
+        'bitterness': 0.7, 'frustrated': 0.6, 'frustration': 0.6, 'annoyed': 0.5, 'hostile': 0.7,
+        'fight': 0.5, 'battle': 0.4, 'war': 0.4, 'strike': 0.5, 'destroy': 0.6, 'burn': 0.3,
+        'roar': 0.4, 'shout': 0.3, 'curse': 0.6, 'vengeance': 0.8, 'revenge': 0.8, 'violent': 0.7,
+        'violence': 0.7, 'argue': 0.5, 'quarrel': 0.6, 'injustice': 0.6, 'betray': 0.6,
+    },
+    'confusion': {
+        'confused': 1.0, 'confusion': 1.0, 'confuse': 0.9, 'unsure': 0.8, 'uncertain': 0.8, 'doubt': 0.7,
+        'puzzled': 0.8, 'strange': 0.6, 'weird': 0.6, 'odd': 0.5, 'unclear': 0.8, 'mystery': 0.6,
+        'mysterious': 0.6, 'wonder': 0.3, 'wander': 0.5, 'maze': 0.8, 'fog': 0.6, 'mist': 0.4,
+        'blur': 0.6, 'blurry': 0.6, 'lost': 0.5, 'search': 0.3, 'seek': 0.2, 'question': 0.4,
+        'riddle': 0.7, 'why': 0.2, 'unknown': 0.5, 'shift': 0.3, 'change': 0.2, 'disoriented': 0.9,
+    },
+}
+
+NEGATIONS = frozenset(['not', "n't", 'no', 'never', 'nor', 'without', 'nothing', 'neither', 'cannot'])
+# Tokens after a negation that it applies to; punctuation ends the scope early
+NEGATION_SCOPE = 3
+# Negated terms count against their emotions ("not afraid" lowers fear)
+NEGATION_WEIGHT = -0.5
+
+
+def read_lexicon_file(path) -> Dict[str, Dict[str, float]]:
+    """Read ``term<TAB>emotion<TAB>weight`` lines into an emotion -> {term: weight} mapping."""
+    lexicon: Dict[str, Dict[str, float]] = {}
+    with open(path, encoding='utf-8') as lexicon_file:
+        for line in lexicon_file:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) != 3 or line.startswith('#'):
+                continue
+            term, emotion, weight = fields
+            try:
+                weight = float(weight)
+            except ValueError:
+                # Header line
+                continue
+            if weight > 0:
+                lexicon.setdefault(emotion, {})[term.lower()] = weight
+    return lexicon
+
+
+class EmotionLexicon:
+    """Scores emotion intensities of token sequences against a compiled lexicon.
+
+    Tokens need ``lemma_`` and ``lower_`` (spaCy tokens and the fast
+    analyzer's RuleTokens both have them); a token matches on its lemma,
+    then on its lowercased text.
+    """
+
+    def __init__(self, lexicon: Mapping[str, Mapping[str, float]],
+                 negation_scope: int = NEGATION_SCOPE, negation_weight: float = NEGATION_WEIGHT):
+        self.negation_scope = negation_scope
+        self.negation_weight = negation_weight
+        self.emotions: List[str] = sorted(lexicon)
+        self.vocabulary: Dict[str, int] = {}
+        entries = []
+        for column, emotion in enumerate(self.emotions):
+            for term, weight in lexicon[emotion].items():
+                row = self.vocabulary.setdefault(term.lower(), len(self.vocabulary))
+                entries.append((row, column, weight))
+        self.weights = np.zeros((len(self.vocabulary), len(self.emotions)), dtype=np.float32)
+        for row, column, weight in entries:
+            self.weights[row, column] = weight
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def _matches(self, docs):
+        """Doc rows, term ids and signs (1, or negation_weight when negated) of matched tokens"""
+        rows, ids, signs = [], [], []
+        vocabulary = self.vocabulary
+        for row, doc in enumerate(docs):
+            # Tokens left in the current negation's scope
+            negated = 0
+            for token in doc:
+                lower = token.lower_
+                if lower in NEGATIONS:
+                    negated = self.negation_scope
+                    continue
+                if not lower[:1].isalnum():
+                    negated = 0
+                    continue
+                term = vocabulary.get(token.lemma_, vocabulary.get(lower, -1))
+                if term >= 0:
+                    rows.append(row)
+                    ids.append(term)
+                    signs.append(self.negation_weight if negated else 1.0)
+                if negated:
+                    negated -= 1
+        return rows, ids, np.asarray(signs, dtype=np.float32)
+
+    def score_batch(self, docs: Sequence) -> np.ndarray:
+        """Emotion intensities of many token sequences as a dense (docs x emotions) array."""
+        if not docs:
+            return np.zeros((0, len(self.emotions)), dtype=np.float32)
+        rows, ids, signs = self._matches(docs)
+        counts = sparse.csr_matrix((signs, (rows, ids)), shape=(len(docs), len(self.vocabulary)))
+        return np.maximum(counts @ self.weights, 0.0)
+
+    def score(self, doc) -> Counter:
+        """Positive emotion intensities of one token sequence, keyed by emotion."""
+        _, ids, signs = self._matches([doc])
+        if not ids:
+            return Counter()
+        # One row needs no sparse matrix: sum the matched weight rows directly
+        intensities = signs @ self.weights[ids]
+        return Counter({self.emotions[column]: round(float(intensities[column]), 3)
+                        for column in np.flatnonzero(intensities > 0)})
+
+
+@functools.lru_cache(maxsize=None)
+def load_lexicon(path='') -> EmotionLexicon:
+    """The built-in lexicon extended with the file at ``path``, compiled once per path."""
+    lexicon = {emotion: dict(terms) for emotion, terms in EMOTION_LEXICON.items()}
+    if path:
+        for emotion, terms in read_lexicon_file(path).items():
+            lexicon.setdefault(emotion, {}).update(terms)
+    return EmotionLexicon(lexicon)
@@ -0,0 +1,101 @@
+"""Streaming export of stored visions and their analyses
+
+Rows are read with ``yield_per`` (a server-side cursor on PostgreSQL) and
+written one at a time, so memory use does not depend on how many visions
+are exported. Exports are ordered by id; pass the last exported id as
+``since_id`` for an incremental pull.
+"""
+
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+import analysis_store
+
+EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+CSV_COLUMNS = ['id', 'title', 'description', 'context', 'date_submitted', 'duplicate_of',
+               'themes', 'symbols', 'analysis']
+PARQUET_BATCH = 1000
+
+
+def iter_visions(session, Vision, symbol_by_name, since_id=None, since=None, batch_size=1000):
+    """Yield stored visions as export records, oldest id first."""
+    query = select(
+        Vision.id, Vision.title, Vision.description, Vision.context,
+        Vision.date_submitted, Vision.duplicate_of, Vision.interpretation
+    )
+    if since_id is not None:
+        query = query.where(Vision.id > since_id)
+    if since is not None:
+        query = query.where(Vision.date_submitted >= since)
+    rows = session.execute(query.order_by(Vision.id).execution_options(yield_per=batch_size))
+    for vision_id, title, description, context, date_submitted, duplicate_of, payload in rows:
+        yield {
+            'id': vision_id,
+            'title': title,
+            'description': description,
+            'context': context,
+            'date_submitted': date_submitted.isoformat() if date_submitted else None,
+            'duplicate_of': duplicate_of,
+            'analysis': analysis_store.unpack(payload, symbol_by_name)
+        }
+
+
+def jsonl_chunks(records):
+    for record in records:
+        yield json.dumps(record, default=str) + '\n'
+
+
+def csv_chunks(records):
+    """CSV with themes and symbols as '|'-joined columns and the full analysis as JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        analysis = record['analysis'] or {}
+        writer.writerow([
+            record['id'], record['title'], record['description'], record['context'],
+            record['date_submitted'], record['duplicate_of'],
+            '|'.join(analysis.get('themes', [])),
+            '|'.join(symbol['symbol'] for symbol in analysis.get('found_symbols', [])),
+            json.dumps(analysis, default=str)
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_parquet(records, path):
+    """Write records to a Parquet file in row groups of PARQUET_BATCH; needs pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ('id', pa.int64()), ('title', pa.string()), ('description', pa.string()), ('context', pa.string()),
+        ('date_submitted', pa.string()), ('duplicate_of', pa.int64()),
+        ('themes', pa.list_(pa.string())), ('symbols', pa.list_(pa.string())), ('analysis', pa.string())
+    ])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for record in records:
+            analysis = record['analysis'] or {}
+            batch.append(dict(
+                record,
+                themes=analysis.get('themes', []),
+                symbols=[symbol['symbol'] for symbol in analysis.get('found_symbols', [])],
+                analysis=json.dumps(analysis, default=str)
+            ))
+            if len(batch) == PARQUET_BATCH:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
@@ -0,0 +1,303 @@
+"""Lightweight analyzer tier that runs without spaCy"""
+
+import contextlib
+import logging
+import re
+import threading
+from typing import Iterable, Optional
+
+from vision_analyzer import VisionAnalyzer
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?|[0-9]+|[^\sA-Za-z0-9]")
+
+# Closed-class words and their coarse part of speech
+FUNCTION_WORDS = {
+    'a': 'DET', 'an': 'DET', 'the': 'DET', 'this': 'DET', 'that': 'DET', 'these': 'DET',
+    'those': 'DET', 'my': 'PRON', 'your': 'PRON', 'his': 'PRON', 'her': 'PRON', 'its': 'PRON',
+    'our': 'PRON', 'their': 'PRON', 'i': 'PRON', 'me': 'PRON', 'you': 'PRON', 'he': 'PRON',
+    'him': 'PRON', 'she': 'PRON', 'it': 'PRON', 'we': 'PRON', 'us': 'PRON', 'they': 'PRON',
+    'them': 'PRON', 'myself': 'PRON', 'himself': 'PRON', 'herself': 'PRON', 'itself': 'PRON',
+    'someone': 'PRON', 'something': 'PRON', 'everyone': 'PRON', 'everything': 'PRON',
+    'who': 'PRON', 'what': 'PRON', 'which': 'PRON', 'whom': 'PRON',
+    'in': 'ADP', 'on': 'ADP', 'at': 'ADP', 'by': 'ADP', 'for': 'ADP', 'from': 'ADP', 'into': 'ADP',
+    'onto': 'ADP', 'of': 'ADP', 'to': 'ADP', 'with': 'ADP', 'without': 'ADP', 'over': 'ADP',
+    'under': 'ADP', 'above': 'ADP', 'below': 'ADP', 'through': 'ADP', 'across': 'ADP',
+    'toward': 'ADP', 'towards': 'ADP', 'behind': 'ADP', 'before': 'ADP', 'after': 'ADP',
+    'around': 'ADP', 'between': 'ADP', 'beside': 'ADP', 'near': 'ADP', 'upon': 'ADP',
+    'and': 'CCONJ', 'or': 'CCONJ', 'but': 'CCONJ', 'nor': 'CCONJ', 'so': 'CCONJ', 'yet': 'CCONJ',
+    'if': 'SCONJ', 'while': 'SCONJ', 'when': 'SCONJ', 'as': 'SCONJ', 'because': 'SCONJ',
+    'then': 'ADV', 'there': 'ADV', 'here': 'ADV', 'not': 'PART', "n't": 'PART', 'very': 'ADV',
+    'somehow': 'ADV', 'suddenly': 'ADV', 'again': 'ADV', 'also': 'ADV', 'up': 'ADP',
+    'down': 'ADP', 'out': 'ADP', 'away': 'ADV', 'back': 'ADV', 'another': 'DET', 'all': 'DET',
+    'some': 'DET', 'every': 'DET', 'each': 'DET', 'no': 'DET', 'many': 'ADJ', 'much': 'ADJ',
+    'one': 'NUM', 'two': 'NUM', 'three': 'NUM', 'four': 'NUM', 'five': 'NUM', 'seven': 'NUM',
+    'twelve': 'NUM'
+}
+
+# Auxiliaries map to their lemma and are not treated as actions
+AUXILIARIES = {
+    'is': 'be', 'am': 'be', 'are': 'be', 'was': 'be', 'were': 'be', 'be': 'be', 'been': 'be',
+    'being': 'be', 'has': 'have', 'have': 'have', 'had': 'have', 'do': 'do', 'does': 'do',
+    'did': 'do', 'will': 'will', 'would': 'would', 'can': 'can', 'could': 'could',
+    'shall': 'shall', 'should': 'should', 'may': 'may', 'might': 'might', 'must': 'must'
+}
+
+IRREGULAR_VERBS = {
+    'saw': 'see', 'seen': 'see', 'ran': 'run', 'outran': 'outrun', 'came': 'come', 'went': 'go',
+    'gone': 'go', 'gave': 'give', 'given': 'give', 'took': 'take', 'taken': 'take', 'flew': 'fly',
+    'flown': 'fly', 'fell': 'fall', 'fallen': 'fall', 'stood': 'stand', 'sat': 'sit', 'spoke': 'speak',
+    'spoken': 'speak', 'said': 'say', 'told': 'tell', 'heard': 'hear', 'felt': 'feel', 'held': 'hold',
+    'brought': 'bring', 'caught': 'catch', 'fought': 'fight', 'found': 'find', 'led': 'lead',
+    'left': 'leave', 'knew': 'know', 'known': 'know', 'rose': 'rise', 'risen': 'rise', 'grew': 'grow',
+    'grown': 'grow', 'threw': 'throw', 'thrown': 'throw', 'drew': 'draw', 'drawn': 'draw',
+    'wore': 'wear', 'worn': 'wear', 'began': 'begin', 'begun': 'begin', 'broke': 'break',
+    'broken': 'break', 'drank': 'drink', 'ate': 'eat', 'eaten': 'eat', 'swam': 'swim', 'sang': 'sing',
+    'rode': 'ride', 'wrote': 'write', 'written': 'write', 'shone': 'shine', 'struck': 'strike',
+    'fled': 'flee', 'hid': 'hide', 'hidden': 'hide', 'woke': 'wake', 'awoke': 'awake', 'lay': 'lie',
+    'became': 'become', 'made': 'make', 'met': 'meet', 'sent': 'send', 'spread': 'spread',
+    'poured': 'pour', 'thought': 'think', 'understood': 'understand', 'built': 'build', 'bit': 'bite',
+    'chose': 'choose', 'climbed': 'climb', 'dug': 'dig', 'drove': 'drive', 'fed': 'feed',
+    'kept': 'keep', 'lit': 'light', 'lost': 'lose', 'paid': 'pay', 'put': 'put', 'read': 'read',
+    'sank': 'sink', 'shook': 'shake', 'slept': 'sleep', 'sought': 'seek', 'stole': 'steal',
+    'swept': 'sweep', 'taught': 'teach', 'tore': 'tear', 'won': 'win', 'wept': 'weep'
+}
+
+COMMON_VERBS = frozenset([
+    'see', 'run', 'outrun', 'chase', 'come', 'go', 'give', 'take', 'fly', 'fall', 'stand', 'sit',
+    'speak', 'say', 'tell', 'hear', 'feel', 'hold', 'bring', 'catch', 'fight', 'find', 'lead', 'leave',
+    'know', 'rise', 'grow', 'throw', 'draw', 'wear', 'begin', 'break', 'drink', 'eat', 'swim', 'sing',
+    'ride', 'write', 'shine', 'strike', 'flee', 'hide', 'wake', 'awake', 'become', 'make', 'meet',
+    'send', 'pour', 'think', 'understand', 'build', 'walk', 'look', 'watch', 'appear', 'open', 'close',
+    'enter', 'escape', 'attack', 'protect', 'guard', 'cover', 'shelter', 'guide', 'direct', 'show',
+    'reveal', 'dream', 'flow', 'burn', 'glow', 'cry', 'weep', 'pray', 'worship', 'praise', 'call',
+    'ask', 'answer', 'help', 'save', 'heal', 'restore', 'renew', 'change', 'transform', 'move',
+    'turn', 'climb', 'descend', 'ascend', 'jump', 'follow', 'pursue', 'hunt', 'kill', 'die', 'bleed',
+    'touch', 'carry', 'lift', 'push', 'pull', 'shake', 'tremble', 'roar', 'shout', 'scream', 'whisper',
+    'smile', 'laugh', 'dance', 'rejoice', 'receive', 'bless', 'anoint', 'baptize', 'wash', 'clean',
+    'plant', 'sow', 'reap', 'harvest', 'feed', 'fill', 'empty', 'spill', 'drown', 'float', 'sink',
+    'crawl', 'slither', 'bite', 'sting', 'defend', 'battle', 'wrestle', 'conquer', 'overcome',
+    'try', 'want', 'need', 'seem', 'start', 'stop', 'keep', 'let', 'put', 'get', 'hurry', 'wait',
+    'light', 'shatter', 'crash', 'lose', 'win', 'seek', 'choose', 'dig', 'drive', 'pay', 'read',
+    'sleep', 'steal', 'sweep', 'teach', 'tear', 'instruct', 'learn', 'surround', 'point', 'knock',
+    'hand', 'offer', 'sacrifice', 'kneel', 'bow', 'stretch', 'reach', 'grab', 'release', 'free',
+    'bind', 'chain', 'lock', 'unlock', 'rescue', 'flood', 'rain', 'thunder', 'storm'
+])
+
+# Nouns ending in -ing/-ed that must not be mistaken for verb forms
+NOUN_FORMS = frozenset([
+    'king', 'ring', 'wing', 'thing', 'something', 'nothing', 'everything', 'evening', 'morning',
+    'string', 'spring', 'ceiling', 'building', 'offering', 'blessing', 'bed', 'seed', 'reed',
+    'sled', 'shed', 'wedding', 'clothing', 'lightning', 'feeling', 'meaning', 'beginning',
+    'sheep', 'grass', 'glass', 'cross', 'dress', 'bus', 'chaos', 'lens', 'news', 'jesus', 'moses'
+])
+
+ADJECTIVES = frozenset([
+    'electric', 'bright', 'dark', 'white', 'black', 'red', 'blue', 'green', 'gold', 'golden',
+    'silver', 'big', 'small', 'large', 'huge', 'tall', 'high', 'low', 'deep', 'old', 'new',
+    'young', 'holy', 'evil', 'wicked', 'beautiful', 'strong', 'weak', 'happy', 'sad', 'afraid',
+    'calm', 'quiet', 'still', 'urgent', 'quick', 'glad', 'safe', 'secure', 'clear', 'wide',
+    'narrow', 'angry', 'peaceful', 'different', 'spiritual', 'divine', 'heavenly', 'living', 'dead'
+])
+
+VOWELS = 'aeiou'
+
+
+class RuleToken:
+    __slots__ = ('text', 'lower_', 'lemma_', 'pos_', 'is_punct', 'is_alpha')
+
+    def __init__(self, text, lower, lemma, pos):
+        self.text = text
+        self.lower_ = lower
+        self.lemma_ = lemma
+        self.pos_ = pos
+        self.is_punct = pos == 'PUNCT'
+        self.is_alpha = text.isalpha()
+
+
+class RuleDoc:
+    """Token sequence exposing the attributes the analyzer reads from a spaCy Doc."""
+
+    __slots__ = ('text', 'tokens')
+
+    def __init__(self, text, tokens):
+        self.text = text
+        self.tokens = tokens
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        return self.tokens[index]
+
+
+class RuleTokenizer:
+    """Regex tokenizer with lookup-table lemmas and part-of-speech tags.
+
+    It is a stand-in for the spaCy pipeline with the same call surface
+    (``nlp(text)`` and ``nlp.pipe(texts)``) so every extraction step of
+    VisionAnalyzer runs unchanged on its output.
+    """
+
+    def __call__(self, text: str) -> RuleDoc:
+        tokens = []
+        previous = None
+        for text_token in TOKEN_PATTERN.findall(text):
+            lower = text_token.lower()
+            lemma, pos = self._tag(lower, previous)
+            tokens.append(RuleToken(text_token, lower, lemma, pos))
+            previous = pos
+        return RuleDoc(text, tokens)
+
+    def pipe(self, texts: Iterable[str], **kwargs):
+        for text in texts:
+            yield self(text)
+
+    def _tag(self, word, previous):
+        if not word[0].isalnum():
+            return word, 'PUNCT'
+        if word.isdigit():
+            return word, 'NUM'
+        if word in AUXILIARIES:
+            return AUXILIARIES[word], 'AUX'
+        if word in FUNCTION_WORDS:
+            return word, FUNCTION_WORDS[word]
+        if word in IRREGULAR_VERBS:
+            return IRREGULAR_VERBS[word], 'VERB'
+        if word in COMMON_VERBS:
+            # Base forms right after a determiner are usually nouns ("the light")
+            return word, 'NOUN' if previous == 'DET' else 'VERB'
+        if word in ADJECTIVES:
+            return word, 'ADJ'
+        if word in NOUN_FORMS:
+            return word, 'NOUN'
+        if word.endswith('ing') and len(word) > 4:
+            base = self._verb_base(word[:-3])
+            if base:
+                return base, 'VERB'
+        if word.endswith('ed') and len(word) > 3:
+            base = self._verb_base(word[:-2]) or self._verb_base(word[:-1])
+            if base:
+                return base, 'VERB'
+        if word.endswith('s') and len(word) > 3:
+            singular = self._singular(word)
+            if singular in COMMON_VERBS and previous in ('PRON', 'NOUN', 'PROPN'):
+                return singular, 'VERB'
+            return singular, 'NOUN'
+        if word.endswith('ly') and len(word) > 4:
+            return word, 'ADV'
+        return word, 'NOUN'
+
+    def _verb_base(self, stem):
+        """Recover the base verb from an -ing/-ed stem, or None if it is not a known verb."""
+        candidates = [stem, stem + 'e']
+        if len(stem) > 2 and stem[-1] == stem[-2] and stem[-1] not in VOWELS:
+            candidates.append(stem[:-1])
+        if stem.endswith('i'):
+            candidates.append(stem[:-1] + 'y')
+        for candidate in candidates:
+            if candidate in COMMON_VERBS:
+                return candidate
+        return None
+
+    def _singular(self, word):
+        if word.endswith('ies') and len(word) > 4:
+            return word[:-3] + 'y'
+        if word.endswith(('sses', 'xes', 'ches', 'shes')):
+            return word[:-2]
+        if word.endswith(('ss', 'us', 'is')):
+            return word
+        return word[:-1]
+
+
+class RuleAnalyzer(VisionAnalyzer):
+    """VisionAnalyzer tier that replaces spaCy tagging with RuleTokenizer.
+
+    The output schema is identical to the full analyzer; only the token
+    tags feeding the extraction steps are cheaper and less accurate.
+    """
+
+    def __init__(self, biblical_symbols, **kwargs):
+        super().__init__(biblical_symbols, nlp=RuleTokenizer(), **kwargs)
+        # RuleTokenizer keeps no state between calls, so threads need not take turns
+        self._nlp_lock = contextlib.nullcontext()
+
+
+class TierSelector:
+    """Chooses between the full and fast analyzer tiers based on current load.
+
+    The fast tier is used while more than ``max_in_flight`` analyses run in this
+    process, the smoothed full-tier latency exceeds ``max_latency`` seconds, or
+    requests waited longer than ``max_queue_wait`` seconds before reaching the
+    worker. While degraded, every ``probe_every``-th request still uses the full
+    tier so its latency estimate can recover; traffic returns to the full tier
+    once latency drops below 80% of the limit.
+    """
+
+    def __init__(self, mode='auto', max_in_flight=4, max_latency=1.0, max_queue_wait=0.5,
+                 probe_every=10, smoothing=0.2):
+        self.mode = mode
+        self.max_in_flight = max_in_flight
+        self.max_latency = max_latency
+        self.max_queue_wait = max_queue_wait
+        self.probe_every = probe_every
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency = 0.0
+        self.degraded = False
+        self.counts = {'full': 0, 'fast': 0}
+        self._since_probe = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, queue_wait: Optional[float] = None) -> str:
+        """Register a starting analysis and return the tier it should use."""
+        with self._lock:
+            self.in_flight += 1
+            if self.mode == 'off':
+                tier = 'full'
+            elif self.mode == 'always':
+                tier = 'fast'
+            else:
+                overloaded = (
+                    self.in_flight > self.max_in_flight
+                    or self.latency > self.max_latency
+                    or (queue_wait is not None and queue_wait > self.max_queue_wait)
+                )
+                if overloaded and not self.degraded:
+                    self.degraded = True
+                    self._since_probe = 0
+                    logging.warning(
+                        f"Switching to fast analyzer tier (in flight: {self.in_flight}, latency: {self.latency:.3f}s)"
+                    )
+                elif self.degraded and not overloaded and self.latency < self.max_latency * 0.8:
+                    self.degraded = False
+                    logging.info("Returning to full analyzer tier")
+
+                tier = 'full'
+                if self.degraded:
+                    self._since_probe += 1
+                    if self._since_probe >= self.probe_every:
+                        self._since_probe = 0
+                    else:
+                        tier = 'fast'
+            self.counts[tier] += 1
+            return tier
+
+    def release(self, tier: str, seconds: float):
+        """Register a finished analysis and its duration."""
+        with self._lock:
+            self.in_flight -= 1
+            if tier == 'full':
+                self.latency += self.smoothing * (seconds - self.latency)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'degraded': self.degraded,
+                'in_flight': self.in_flight,
+                'full_latency_ms': round(self.latency * 1000, 1),
+                'requests': dict(self.counts)
+            }
@@ -0,0 +1,128 @@
+"""Typo-tolerant term lookup with a symmetric-delete (SymSpell) index
+
+Every term is indexed under the strings left after deleting up to
+``max_distance`` of its characters. A query word generates its own deletes
+and only the terms sharing one are checked with a bounded edit distance, so
+lookup cost depends on the word's length, not on the number of terms. As in
+SymSpell, only the first ``prefix_length`` characters are indexed, which
+bounds the index size for long terms.
+
+The index is meant for words that already missed an exact lookup; results
+are memoized per word.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+PREFIX_LENGTH = 7
+MEMO_SIZE = 50000
+
+_MISSING = object()
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """All strings obtained by deleting up to ``distance`` characters of ``word``."""
+    found = {word}
+    frontier = [word]
+    for _ in range(distance):
+        next_frontier = []
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for position in range(len(item)):
+                shorter = item[:position] + item[position + 1:]
+                if shorter not in found:
+                    found.add(shorter)
+                    next_frontier.append(shorter)
+        frontier = next_frontier
+    return found
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count as one edit), or limit + 1 if over limit."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for row in range(1, len(first) + 1):
+        current = [row] + [0] * len(second)
+        best = row
+        for column in range(1, len(second) + 1):
+            cost = 0 if first[row - 1] == second[column - 1] else 1
+            value = min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + cost)
+            if (previous_previous is not None and column > 1 and first[row - 1] == second[column - 2]
+                    and first[row - 2] == second[column - 1]):
+                value = min(value, previous_previous[column - 2] + 1)
+            current[column] = value
+            best = min(best, value)
+        if best > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class FuzzyIndex:
+    """Closest indexed term within a small edit distance of a misspelled word.
+
+    ``terms`` is an iterable of terms or a mapping of term -> value; lookups
+    return the value (the term itself for plain iterables). Words shorter
+    than ``min_length`` or listed in ``known_words`` (correctly spelled words
+    that merely resemble a term, like "line" and "wine") are never corrected.
+    Words shorter than ``long_word`` allow one edit rather than
+    ``max_distance``, and words shorter than ``short_word`` must also keep
+    their first letter.
+    """
+
+    def __init__(self, terms: Union[Mapping[str, object], Iterable[str]], max_distance: int = 2,
+                 min_length: int = 4, short_word: int = 5, long_word: int = 8,
+                 known_words: Iterable[str] = (), prefix_length: int = PREFIX_LENGTH):
+        self.values = dict(terms) if isinstance(terms, Mapping) else {term: term for term in terms}
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.short_word = short_word
+        self.long_word = long_word
+        self.known_words = frozenset(known_words)
+        self.prefix_length = prefix_length
+        self.deletes: Dict[str, List[str]] = {}
+        self._memo: Dict[str, Optional[Tuple[object, int]]] = {}
+        for term in self.values:
+            for deleted in _deletes(term[:prefix_length], max_distance):
+                self.deletes.setdefault(deleted, []).append(term)
+
+    def __len__(self):
+        return len(self.values)
+
+    def distance_limit(self, word: str) -> int:
+        return min(self.max_distance, 1 if len(word) < self.long_word else 2)
+
+    def lookup(self, word: str) -> Optional[Tuple[object, int]]:
+        """Return (value, distance) of the closest term, or None; ties go to the alphabetically first term."""
+        if len(word) < self.min_length or word in self.known_words:
+            return None
+        # A single get: another thread may clear the memo between a check and a read
+        memoized = self._memo.get(word, _MISSING)
+        if memoized is not _MISSING:
+            return memoized
+        limit = self.distance_limit(word)
+        best = None
+        checked = set()
+        for deleted in _deletes(word[:self.prefix_length], limit):
+            for term in self.deletes.get(deleted, ()):
+                if term in checked:
+                    continue
+                checked.add(term)
+                if len(word) < self.short_word and term[0] != word[0]:
+                    continue
+                distance = edit_distance(word, term, limit)
+                if distance <= limit and (best is None or (distance, term) < best):
+                    best = (distance, term)
+        result = None if best is None else (self.values[best[1]], best[0])
+        # Free-form text brings endless new words; keep the memo bounded
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[word] = result
+        return result
+
+    def correct(self, word: str):
+        """The value of the closest term, or None"""
+        match = self.lookup(word)
+        return None if match is None else match[0]
@@ -0,0 +1,21 @@
+"""Gunicorn settings for the Biblical Vision Analyzer
+
+Gunicorn reads ./gunicorn.conf.py automatically, so ``gunicorn app:app`` in
+the Procfile and render.yaml picks these up.
+"""
+
+import os
+
+# Worker processes each load their own copy of the spaCy model; gunicorn
+# reads WEB_CONCURRENCY itself. With GUNICORN_THREADS above 1 each process
+# runs gthread workers that serve that many requests at once from one model
+# copy, overlapping database and network waits.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+
+def post_worker_init(worker):
+    """Warm each new worker in the background; /ready reports 503 until it finishes"""
+    from app import worker_warmup
+    worker_warmup.start_in_background()
@@ -0,0 +1,104 @@
+"""Memory-growth control for long-running analyzer workers"""
+
+import logging
+import os
+import resource
+import threading
+import time
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        # Peak RSS is the best portable fallback (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+def vocab_size(nlp):
+    """Return (interned strings, lexemes) for a spaCy pipeline, or (0, 0) for other tokenizers."""
+    vocab = getattr(nlp, 'vocab', None)
+    if vocab is None:
+        return 0, 0
+    return len(vocab.strings), len(vocab)
+
+
+class MemoryGuard:
+    """Keeps a worker's memory bounded while it serves free-form text.
+
+    Every ``check_every`` analyses it looks at the analyzer's spaCy
+    StringStore. When more than ``max_new_strings`` strings were interned
+    since the pipeline was loaded, a fresh pipeline is loaded in a background
+    thread and swapped in, so no request waits for the reload. When RSS still
+    passes ``max_rss_mb`` the worker is flagged for a graceful recycle, which
+    the server finishes after the current response.
+    """
+
+    def __init__(self, analyzer, max_new_strings=200000, max_rss_mb=0, check_every=100):
+        self.analyzer = analyzer
+        self.max_new_strings = max_new_strings
+        self.max_rss_mb = max_rss_mb
+        self.check_every = check_every
+        self.requests = 0
+        self.model_reloads = 0
+        self.recycle_requested = False
+        self.started = time.time()
+        self.baseline_strings, _ = vocab_size(analyzer.nlp)
+        self._reloading = threading.Lock()
+        self._counter = threading.Lock()
+
+    def after_analysis(self):
+        with self._counter:
+            self.requests += 1
+            due = self.check_every and self.requests % self.check_every == 0
+        if due:
+            self.check()
+
+    def check(self):
+        strings, _ = vocab_size(self.analyzer.nlp)
+        if self.max_new_strings and strings - self.baseline_strings > self.max_new_strings:
+            self.reload_in_background()
+
+        if self.max_rss_mb and not self.recycle_requested:
+            rss = current_rss_mb()
+            if rss > self.max_rss_mb:
+                logging.warning(f"Worker {os.getpid()} RSS {rss:.0f} MB exceeds {self.max_rss_mb} MB; recycling")
+                self.recycle_requested = True
+
+    def reload_in_background(self):
+        if not self._reloading.acquire(blocking=False):
+            return
+        thread = threading.Thread(target=self._reload, name='model-reload', daemon=True)
+        thread.start()
+
+    def _reload(self):
+        try:
+            started = time.monotonic()
+            nlp = self.analyzer.reload_model()
+            self.baseline_strings, _ = vocab_size(nlp)
+            self.model_reloads += 1
+            logging.info(f"Reloaded spaCy model in {time.monotonic() - started:.2f}s to reset vocabulary growth")
+        except Exception as e:
+            logging.error(f"Error reloading spaCy model: {str(e)}")
+        finally:
+            self._reloading.release()
+
+    def metrics(self):
+        strings, lexemes = vocab_size(self.analyzer.nlp)
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'rss_mb': round(current_rss_mb(), 1),
+            'max_rss_mb': self.max_rss_mb,
+            'vocab_strings': strings,
+            'vocab_lexemes': lexemes,
+            'vocab_strings_since_reload': strings - self.baseline_strings,
+            'model_reloads': self.model_reloads,
+            'recycle_requested': self.recycle_requested
+        }
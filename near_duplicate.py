@@ -0,0 +1,97 @@
+"""Near-duplicate vision detection with MinHash-LSH signatures"""
+
+import hashlib
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+_rng = np.random.default_rng(20240501)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, size=NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_INCREMENTS = _rng.integers(0, 2 ** 63, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Lowercase a description and collapse it to its words separated by single spaces."""
+    return ' '.join(WORD_PATTERN.findall(text.lower()))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Return the set of character shingles of the normalized text."""
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """Compute a MinHash signature (one uint32 per permutation) of ``text``."""
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text)), dtype=np.uint64
+    )
+    if not len(hashes):
+        return np.zeros(NUM_PERMUTATIONS, dtype=np.uint32)
+    # Multiply-shift hashing: one vectorized pass gives every permutation of every shingle
+    permuted = (hashes[:, None] * _MULTIPLIERS + _INCREMENTS) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two texts from their signatures."""
+    return float(np.count_nonzero(first == second)) / NUM_PERMUTATIONS
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """Return one indexed lookup key per LSH band.
+
+    Each key packs the band number into the high bits so all bands share one
+    indexed column. Texts with Jaccard similarity s share at least one key with
+    probability 1 - (1 - s ** ROWS_PER_BAND) ** BANDS (over 0.99 at s = 0.75).
+    """
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        value = int.from_bytes(hashlib.blake2b(chunk, digest_size=4).digest(), 'big')
+        keys.append(band << 32 | value)
+    return keys
+
+
+def signature_rows(VisionSignature, VisionSignatureBand, vision_id: int, signature: np.ndarray):
+    """Build the signature row and band rows stored for a vision."""
+    rows = [VisionSignature(vision_id=vision_id, minhash=signature.tobytes())]
+    rows.extend(VisionSignatureBand(key=key, vision_id=vision_id) for key in band_keys(signature))
+    return rows
+
+
+def find_near_duplicate(db, VisionSignature, VisionSignatureBand, signature: np.ndarray,
+                        threshold: float, max_candidates: int = 20) -> Optional[Tuple[int, float]]:
+    """Return (vision_id, similarity) of the closest stored vision at or above ``threshold``."""
+    # Visions sharing the most bands are the likeliest near-duplicates, so they fill the candidate limit first
+    shared = (
+        db.session.query(VisionSignatureBand.vision_id)
+        .filter(VisionSignatureBand.key.in_(band_keys(signature)))
+        .group_by(VisionSignatureBand.vision_id)
+        .order_by(func.count().desc(), VisionSignatureBand.vision_id)
+        .limit(max_candidates)
+        .subquery()
+    )
+    candidates = (
+        db.session.query(VisionSignature.vision_id, VisionSignature.minhash)
+        .join(shared, shared.c.vision_id == VisionSignature.vision_id)
+        .all()
+    )
+    best = None
+    for vision_id, stored in candidates:
+        score = similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+        if score >= threshold and (best is None or score > best[1]):
+            best = (vision_id, score)
+    return best
@@ -0,0 +1,156 @@
+"""On-demand request profiling for the Biblical Vision Analyzer"""
+
+import cProfile
+import functools
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, make_response, request
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_MODES = ('sample', 'cprofile')
+# Request ids come from a client header, so only these characters reach profile file names
+UNSAFE_ID_CHARACTERS = re.compile(r'[^A-Za-z0-9-]')
+MAX_ID_LENGTH = 64
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every ``interval`` seconds from a background thread.
+
+    Stacks are kept in the folded format ("outer;inner;leaf count") read by
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump_stats(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.samples.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """Profiles selected requests and writes one file per profiled request.
+
+    A request is profiled when it carries ``X-Profile: <token>`` or is picked
+    by ``sample_rate``. With no token and a zero sample rate, ``profile``
+    returns the view unchanged, so disabled profiling costs nothing.
+    """
+
+    def __init__(self, directory='profiles', token='', sample_rate=0.0, mode='sample', keep=50):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.keep = keep
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def has_token(self):
+        """Whether the request carries the admin profiling token"""
+        header = request.headers.get(PROFILE_HEADER)
+        return bool(header and self.token and hmac.compare_digest(header, self.token))
+
+    def should_profile(self):
+        return self.has_token() or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def profile(self, view):
+        if not self.enabled:
+            return view
+
+        @functools.wraps(view)
+        def profiled_view(*args, **kwargs):
+            if not self.should_profile():
+                return view(*args, **kwargs)
+            profiler = SamplingProfiler() if self.mode == 'sample' else cProfile.Profile()
+            started = time.perf_counter()
+            if self.mode == 'sample':
+                profiler.start()
+            else:
+                profiler.enable()
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                if self.mode == 'sample':
+                    profiler.stop()
+                else:
+                    profiler.disable()
+            name = self.save(profiler, request.endpoint, time.perf_counter() - started)
+            # Only admins can download profiles, so only they learn the file name
+            if name and self.has_token():
+                response.headers['X-Profile-Id'] = name
+            return response
+
+        return profiled_view
+
+    def save(self, profiler, endpoint, seconds):
+        """Write a profile to the profile directory; returns its file name, or None on failure"""
+        extension = 'folded' if self.mode == 'sample' else 'prof'
+        request_id = UNSAFE_ID_CHARACTERS.sub('', g.get('request_id') or '')[:MAX_ID_LENGTH]
+        request_id = request_id or f"{os.getpid()}-{threading.get_ident()}"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{int(seconds * 1000)}ms-{request_id}.{extension}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.directory, name))
+            self.prune()
+        except OSError as e:
+            logging.error(f"Error writing profile {name}: {str(e)}")
+            return None
+        logging.info(f"Wrote request profile {name}")
+        return name
+
+    def prune(self):
+        profiles = self.list_profiles()
+        for profile in profiles[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, profile['name']))
+            except OSError:
+                pass
+
+    def list_profiles(self):
+        """Profiles in the directory, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(('.folded', '.prof')):
+                stat = entry.stat()
+                profiles.append({'name': entry.name, 'size': stat.st_size, 'created': stat.st_mtime})
+        profiles.sort(key=lambda profile: profile['created'], reverse=True)
+        return profiles
@@ -0,0 +1,115 @@
+"""Response encoding: fast JSON, negotiated MessagePack and compression
+
+orjson, msgpack and zstandard are optional. Without them responses fall
+back to Flask's JSON encoder, JSON only, and gzip.
+"""
+
+import gzip
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                          'image/svg+xml') + MSGPACK_MIMETYPES
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def wants_msgpack():
+    """True when the client prefers MessagePack over JSON and msgpack is installed"""
+    if msgpack is None or not has_request_context():
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using orjson when available, and MessagePack when negotiated.
+
+    Dates, dataclasses and other non-JSON types go through Flask's own
+    ``default`` hook, so the output matches the default provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.keys() - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def _orjson_dumps(self, obj):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default, use_bin_type=True), mimetype=MSGPACK_MIMETYPES[0]
+            )
+        elif orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            # Pretty-printed debug output stays with the standard encoder
+            response = super().response(obj)
+        else:
+            response = self._app.response_class(self._orjson_dumps(obj) + b'\n', mimetype=self.mimetype)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+
+def choose_encoding():
+    """Best content coding the client accepts: zstd when available, then gzip"""
+    accepted = request.accept_encodings
+    if zstandard is not None and accepted['zstd']:
+        return 'zstd'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def init_app(app, min_bytes=1024):
+    """Use the fast JSON provider and compress buffered responses of at least ``min_bytes``.
+
+    Register before other after_request handlers so compression runs last.
+    Streamed and file responses are left alone.
+    """
+    app.json = FastJSONProvider(app)
+    if not min_bytes:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+            return response
+        if not (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+        if encoding is None or response.content_length is None or response.content_length < min_bytes:
+            return response
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
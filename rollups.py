@@ -0,0 +1,151 @@
+"""Incrementally maintained theme/symbol analytics rollups
+
+Each stored analysis adds to three tables keyed by day: theme counts,
+symbol counts and co-occurrence counts of tag pairs, where a tag is a theme
+("t:warfare") or a symbol ("s:Lion"). Dashboards read only these tables,
+so their cost grows with days x tags rather than with stored visions.
+"""
+
+import json
+from collections import Counter, defaultdict, namedtuple
+from itertools import combinations
+
+from sqlalchemy import delete, func, select
+
+import analysis_store
+
+# The three rollup models: theme (day, theme, count), symbol (day, symbol, count)
+# and pair (day, first, second, count)
+RollupTables = namedtuple('RollupTables', 'theme symbol pair')
+
+UPSERT_BATCH = 200
+
+
+class RollupCounts:
+    """Rollup increments accumulated in memory before being written."""
+
+    def __init__(self):
+        self.themes = Counter()
+        self.symbols = Counter()
+        self.pairs = Counter()
+
+    def add(self, payload, day):
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        if payload and 'v' not in payload:
+            # Analyses stored before versioning hold the full response
+            payload = analysis_store.pack(payload)
+        if not payload:
+            return
+        themes = set(payload.get('t', ()))
+        symbols = set(payload.get('s', ()))
+        for theme in themes:
+            self.themes[(day, theme)] += 1
+        for symbol in symbols:
+            self.symbols[(day, symbol)] += 1
+        tags = sorted([f"t:{theme}" for theme in themes] + [f"s:{symbol}" for symbol in symbols])
+        for first, second in combinations(tags, 2):
+            self.pairs[(day, first, second)] += 1
+
+
+def _increment(session, model, key_columns, counts):
+    """Add counts to rows keyed by key_columns, inserting missing rows, as batched upserts."""
+    if not counts:
+        return
+    dialect = session.get_bind().dialect.name
+    # Rows go out in key order so concurrent writers lock overlapping rows in
+    # the same order; hash-seeded Counter order can deadlock on PostgreSQL
+    rows = [dict(zip(key_columns, key), count=count) for key, count in sorted(counts.items())]
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        # Batches stay under SQLite's bound-parameter limit
+        for start in range(0, len(rows), UPSERT_BATCH):
+            statement = insert(model).values(rows[start:start + UPSERT_BATCH])
+            statement = statement.on_conflict_do_update(
+                index_elements=key_columns, set_={'count': model.count + statement.excluded.count}
+            )
+            session.execute(statement)
+        return
+    for row in rows:
+        existing = session.get(model, tuple(row[column] for column in key_columns))
+        if existing is None:
+            session.add(model(**row))
+        else:
+            existing.count += row['count']
+
+
+def record(session, tables, counts):
+    """Write accumulated increments in the session's current transaction."""
+    _increment(session, tables.theme, ['day', 'theme'], counts.themes)
+    _increment(session, tables.symbol, ['day', 'symbol'], counts.symbols)
+    _increment(session, tables.pair, ['day', 'first', 'second'], counts.pairs)
+
+
+def record_analysis(session, tables, payload, day):
+    counts = RollupCounts()
+    counts.add(payload, day)
+    record(session, tables, counts)
+
+
+def rebuild(session, tables, Vision, batch_size=1000):
+    """Recompute all rollups from stored visions, streaming them in batches.
+
+    Memory grows with days x tags, not with the number of visions. Visions
+    stored while a rebuild runs may be counted twice or not at all, so run it
+    when writes are quiet. Returns the number of visions read.
+    """
+    for model in tables:
+        session.execute(delete(model))
+    counts = RollupCounts()
+    visions = 0
+    rows = session.execute(
+        select(Vision.date_submitted, Vision.interpretation).execution_options(yield_per=batch_size)
+    )
+    for date_submitted, payload in rows:
+        if date_submitted is not None:
+            counts.add(payload, date_submitted.date())
+        visions += 1
+    record(session, tables, counts)
+    session.commit()
+    return visions
+
+
+def analytics(session, tables, since=None, until=None, top_pairs=20):
+    """Daily theme and symbol series with window totals and the most frequent tag pairs."""
+    def window(model, query):
+        if since is not None:
+            query = query.where(model.day >= since)
+        if until is not None:
+            query = query.where(model.day < until)
+        return query
+
+    report = {}
+    for name, model, column in (('themes', tables.theme, tables.theme.theme), ('symbols', tables.symbol, tables.symbol.symbol)):
+        daily = defaultdict(dict)
+        totals = Counter()
+        for day, value, count in session.execute(window(model, select(model.day, column, model.count))):
+            daily[day.isoformat()][value] = count
+            totals[value] += count
+        report[name] = {'daily': dict(sorted(daily.items())), 'totals': dict(totals.most_common())}
+
+    pair = tables.pair
+    total = func.sum(pair.count).label('total')
+    query = window(pair, select(pair.first, pair.second, total).group_by(pair.first, pair.second))
+    report['co_occurrence'] = [
+        {'first': first, 'second': second, 'count': count}
+        for first, second, count in session.execute(query.order_by(total.desc()).limit(top_pairs))
+    ]
+    return report
+
+
+def symbol_pair_counts(session, tables):
+    """All-time co-occurrence counts of symbol pairs, keyed by (symbol, symbol)."""
+    pair = tables.pair
+    total = func.sum(pair.count)
+    query = (select(pair.first, pair.second, total)
+             .where(pair.first.like('s:%'), pair.second.like('s:%'))
+             .group_by(pair.first, pair.second))
+    return {(first[2:], second[2:]): count for first, second, count in session.execute(query)}
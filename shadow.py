@@ -0,0 +1,262 @@
+"""Shadow evaluation of candidate analyzer rulesets on live traffic
+
+A sample of live submissions is queued, after the response is computed,
+for a background thread that runs a candidate analyzer on them and
+compares its output and latency with what the live analyzer returned.
+The request path only pays for a random draw and a non-blocking put.
+"""
+
+import json
+import logging
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import Counter, deque
+
+from structured_logging import redact
+from theme_scorer import ThemeScorer
+from vision_analyzer import VisionAnalyzer
+
+
+# Keyword tables a ruleset's ``weights`` apply to, in order
+RULESET_TABLES = ('rule', 'category', 'commentary')
+
+
+def load_ruleset(path):
+    """Read and validate a candidate ruleset from a JSON file.
+
+    Recognized keys: ``theme_rules`` and ``theme_keywords`` (theme -> keyword
+    list, merged over the live tables), ``weights`` (three numbers for the
+    rule, category and commentary tables) and ``min_score``.
+    """
+    with open(path) as ruleset_file:
+        ruleset = json.load(ruleset_file)
+    validate_ruleset(ruleset)
+    return ruleset
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_ruleset(ruleset):
+    """Raise ValueError if a ruleset would be silently misread (e.g. a table left without a weight)."""
+    if not isinstance(ruleset, dict):
+        raise ValueError("Ruleset must be a JSON object")
+    weights = ruleset.get('weights')
+    if weights is not None and (
+        not isinstance(weights, list) or len(weights) != len(RULESET_TABLES) or not all(map(_is_number, weights))
+    ):
+        raise ValueError(
+            f"Ruleset 'weights' must be {len(RULESET_TABLES)} numbers, one each for the "
+            f"{', '.join(RULESET_TABLES)} keyword tables; got {weights!r}"
+        )
+    for key in ('theme_rules', 'theme_keywords'):
+        table = ruleset.get(key, {})
+        if not isinstance(table, dict) or not all(isinstance(keywords, list) for keywords in table.values()):
+            raise ValueError(f"Ruleset '{key}' must map each theme to a list of keywords")
+    if 'min_score' in ruleset and not _is_number(ruleset['min_score']):
+        raise ValueError(f"Ruleset 'min_score' must be a number; got {ruleset['min_score']!r}")
+
+
+class SampleAbandoned(Exception):
+    """Raised when a shadow analysis gives way to live requests part-way through."""
+
+
+class ShadowAnalyzer(VisionAnalyzer):
+    """A VisionAnalyzer with a candidate ruleset that shares the live analyzer's spaCy pipeline.
+
+    Docs are built with every pipeline component except the live rule
+    component, so the candidate extracts and scores with its own tables.
+    The live lock is taken one segment at a time and ``busy()`` is checked
+    before each segment, so a live request waits for one segment at most.
+    """
+
+    def __init__(self, live, ruleset, busy=None):
+        validate_ruleset(ruleset)
+        super().__init__(live.biblical_symbols, segment_cache_size=1024, nlp=live.nlp,
+                         emotion_lexicon_path=live.emotion_lexicon_path, fuzzy_matching=live.fuzzy_matching,
+                         known_words=live.known_words)
+        self.live = live
+        # Documents come from the live pipeline, which the memory guard may swap
+        self.nlp = None
+        self.ruleset = ruleset
+        self.busy = busy or (lambda: False)
+
+        for theme, keywords in ruleset.get('theme_rules', {}).items():
+            self.theme_rules[theme] = keywords
+        for theme, keywords in ruleset.get('theme_keywords', {}).items():
+            self.theme_categories.setdefault(theme, {'keywords': [], 'scriptures': []})['keywords'] = keywords
+        weights = ruleset.get('weights', [weight for _, weight in self.theme_keyword_tables])
+        tables = [self.theme_rules, {theme: data['keywords'] for theme, data in self.theme_categories.items()},
+                  self.theme_keyword_tables[2][0]]
+        self.theme_keyword_tables = list(zip(tables, weights))
+        self.theme_scorer = ThemeScorer(self.theme_keyword_tables, min_score=ruleset.get('min_score', 1.0),
+                                        fuzzy=self.fuzzy_matching, known_words=self.known_words)
+
+    def analyze_vision(self, description, context=""):
+        """Analyze like the live analyzer, raising SampleAbandoned once ``busy()`` reports live work."""
+        if not description or not description.strip():
+            return self._empty_description_response()
+        segments = self._split_segments(description)
+        results = []
+        for segment in segments:
+            if self.busy():
+                raise SampleAbandoned(f"Abandoned after {len(results)} of {len(segments)} segments")
+            results.append(self._analyze_segment(segment))
+        return self._combine_segments(segments, results)
+
+    def _make_doc(self, text):
+        from vision_pipeline import COMPONENT_NAME
+        nlp = self.live.nlp
+        with self.live._nlp_lock:
+            doc = nlp.make_doc(text)
+            for name, component in nlp.pipeline:
+                if name != COMPONENT_NAME:
+                    doc = component(doc)
+        return doc
+
+
+def _jaccard(first, second):
+    first, second = set(first), set(second)
+    return 1.0 if not first and not second else len(first & second) / len(first | second)
+
+
+def compare(live, candidate):
+    """Differences between the live and candidate analyses of one vision."""
+    live_symbols = [symbol['symbol'] for symbol in live.get('found_symbols', [])]
+    candidate_symbols = [symbol['symbol'] for symbol in candidate.get('found_symbols', [])]
+    live_scores = live.get('theme_scores') or [{}]
+    candidate_scores = candidate.get('theme_scores') or [{}]
+    return {
+        'themes_added': sorted(set(candidate['themes']) - set(live['themes'])),
+        'themes_removed': sorted(set(live['themes']) - set(candidate['themes'])),
+        'symbols_added': sorted(set(candidate_symbols) - set(live_symbols)),
+        'symbols_removed': sorted(set(live_symbols) - set(candidate_symbols)),
+        'top_theme_changed': live_scores[0].get('theme') != candidate_scores[0].get('theme'),
+        'scriptures_changed': [tuple(ref) for ref in live['scripture_references']]
+                              != [tuple(ref) for ref in candidate['scripture_references']],
+        'theme_jaccard': round(_jaccard(live['themes'], candidate['themes']), 3),
+    }
+
+
+class ShadowEvaluator:
+    """Runs a candidate analyzer on sampled traffic in a background thread and summarizes the diffs.
+
+    ``candidate_factory`` is called in the background thread on first use.
+    Samples are dropped, never waited for, when the queue is full or when
+    ``busy()`` says the worker is serving other requests; a candidate that
+    raises SampleAbandoned mid-sample is counted as dropped too.
+    """
+
+    def __init__(self, candidate_factory, sample_rate=0.0, queue_size=100, busy=None, examples=20):
+        self.candidate_factory = candidate_factory
+        self.sample_rate = sample_rate
+        self.busy = busy or (lambda: False)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.candidate = None
+        self.error = None
+        self.sampled = 0
+        self.dropped = 0
+        self.compared = 0
+        self.identical = 0
+        self.theme_jaccard = []
+        self.latency_deltas = deque(maxlen=1000)
+        self.theme_changes = Counter()
+        self.symbol_changes = Counter()
+        self.top_theme_changes = 0
+        self.scripture_changes = 0
+        self.examples = deque(maxlen=examples)
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def maybe_submit(self, description, context, live_result, live_seconds):
+        """Queue a live analysis for shadow comparison if sampled; never blocks."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            self.sampled += 1
+        try:
+            self._queue.put_nowait((description, context, live_result, live_seconds))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='shadow-evaluator', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            description, context, live_result, live_seconds = self._queue.get()
+            try:
+                if self.busy():
+                    # Leave the CPU to live requests
+                    with self._lock:
+                        self.dropped += 1
+                    continue
+                if self.candidate is None:
+                    self.candidate = self.candidate_factory()
+                started = time.monotonic()
+                candidate_result = self.candidate.analyze_vision(description, context)
+                self._record(description, live_result, candidate_result, time.monotonic() - started - live_seconds)
+            except SampleAbandoned:
+                with self._lock:
+                    self.dropped += 1
+            except Exception as e:
+                self.error = str(e)
+                logging.error(f"Shadow evaluation failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _record(self, description, live_result, candidate_result, latency_delta):
+        diff = compare(live_result, candidate_result)
+        with self._lock:
+            self.compared += 1
+            self.theme_jaccard.append(diff['theme_jaccard'])
+            self.latency_deltas.append(latency_delta)
+            self.theme_changes.update(f"+{theme}" for theme in diff['themes_added'])
+            self.theme_changes.update(f"-{theme}" for theme in diff['themes_removed'])
+            self.symbol_changes.update(f"+{name}" for name in diff['symbols_added'])
+            self.symbol_changes.update(f"-{name}" for name in diff['symbols_removed'])
+            self.top_theme_changes += diff['top_theme_changed']
+            self.scripture_changes += diff['scriptures_changed']
+            changed = (diff['themes_added'] or diff['themes_removed'] or diff['symbols_added']
+                       or diff['symbols_removed'] or diff['top_theme_changed'] or diff['scriptures_changed'])
+            if changed:
+                self.examples.append(dict(diff, description=redact(description)))
+            else:
+                self.identical += 1
+
+    def summary(self):
+        with self._lock:
+            deltas = sorted(self.latency_deltas)
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'sampled': self.sampled,
+                'dropped': self.dropped,
+                'queued': self._queue.qsize(),
+                'compared': self.compared,
+                'identical': self.identical,
+                'mean_theme_jaccard': round(statistics.mean(self.theme_jaccard), 3) if self.theme_jaccard else None,
+                'top_theme_changes': self.top_theme_changes,
+                'scripture_changes': self.scripture_changes,
+                'theme_changes': dict(self.theme_changes.most_common()),
+                'symbol_changes': dict(self.symbol_changes.most_common()),
+                'latency_delta_ms': {
+                    'mean': round(statistics.mean(deltas) * 1000, 2),
+                    'p50': round(deltas[len(deltas) // 2] * 1000, 2),
+                    'p95': round(deltas[int(len(deltas) * 0.95)] * 1000, 2),
+                } if deltas else None,
+                'recent_differences': list(self.examples),
+                'error': self.error,
+            }
@@ -0,0 +1,309 @@
+"""Similar-vision retrieval over stored visions"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'had', 'have',
+    'he', 'her', 'his', 'i', 'in', 'into', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our',
+    'she', 'so', 'that', 'the', 'their', 'them', 'then', 'there', 'they', 'this', 'to',
+    'was', 'we', 'were', 'with', 'you', 'your'
+])
+
+
+class SimilarityIndex:
+    """Incrementally updated TF-IDF index over hashed word features.
+
+    Documents are stored as sublinear term-frequency rows of a sparse matrix;
+    IDF weights are applied at query time so adding a vision never requires
+    re-weighting existing rows. Rows are appended to over-allocated CSR
+    buffers and each row's TF-IDF norm is computed when it is added; all norms
+    are refreshed against the current IDF only after the index has grown by
+    ``renorm_growth``, so adds and queries cost amortized O(row), not O(N).
+    With ``lsh_bits`` set, every row also gets a random-hyperplane signature
+    split into bands, and queries only score the rows that share a band
+    bucket with the query.
+
+    Adds, queries and saves hold an internal lock, so one index can be shared
+    by a worker's request threads.
+
+    ``last_id`` is the catch-up watermark: every stored vision up to it has
+    been read by ``catch_up``. Visions a worker adds itself with ``add`` do not
+    move it, so ids another worker stored in between are still picked up.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, lsh_bits: int = 0, lsh_bands: int = 4,
+                 exact_limit: int = 50000, seed: int = 13, renorm_growth: float = 0.25):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        if lsh_bits and (lsh_bits > 63 or lsh_bits % lsh_bands):
+            raise ValueError("lsh_bits must be at most 63 and divisible by lsh_bands")
+        self.n_features = n_features
+        self.lsh_bits = lsh_bits
+        self.lsh_bands = lsh_bands
+        self.exact_limit = exact_limit
+        self.seed = seed
+        self.renorm_growth = renorm_growth
+
+        self.ids: List[int] = []
+        self.row_of = {}
+        self.doc_freq = np.zeros(n_features, dtype=np.int32)
+        self.signatures: List[int] = []
+        self.buckets = {}
+        self.dirty = 0
+        self.watermark = 0
+
+        # CSR buffers with spare capacity; the first ``nnz`` entries and
+        # ``len(ids) + 1`` offsets are in use
+        self._data = np.zeros(1024, dtype=np.float32)
+        self._indices = np.zeros(1024, dtype=np.int32)
+        self._indptr = np.zeros(1024, dtype=np.int32)
+        self._norms = np.zeros(1024, dtype=np.float32)
+        self._normalized_rows = 0
+        self._matrix = None
+        self._planes = None
+        self._lock = threading.RLock()
+        if lsh_bits:
+            rng = np.random.default_rng(seed)
+            self._planes = rng.integers(0, 2 ** 63, size=n_features, dtype=np.int64)
+
+    @property
+    def last_id(self) -> int:
+        return self.watermark
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, vision_id):
+        return vision_id in self.row_of
+
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        counts = {}
+        mask = self.n_features - 1
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            if token in STOP_WORDS:
+                continue
+            index = zlib.crc32(token.encode('utf-8')) & mask
+            counts[index] = counts.get(index, 0) + 1
+        indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        values = np.fromiter((1.0 + math.log(count) for count in counts.values()), dtype=np.float32, count=len(counts))
+        order = np.argsort(indices)
+        return indices[order], values[order]
+
+    def _signature(self, indices: np.ndarray, values: np.ndarray) -> int:
+        bits = np.arange(self.lsh_bits, dtype=np.int64)
+        signs = ((self._planes[indices][:, None] >> bits) & 1).astype(np.float32) * 2 - 1
+        projection = values @ signs
+        signature = 0
+        for bit in np.flatnonzero(projection > 0):
+            signature |= 1 << int(bit)
+        return signature
+
+    def _band_keys(self, signature: int):
+        width = self.lsh_bits // self.lsh_bands
+        band_mask = (1 << width) - 1
+        return [(band, (signature >> (band * width)) & band_mask) for band in range(self.lsh_bands)]
+
+    def add(self, vision_id: int, text: str):
+        """Add a stored vision to the index."""
+        if vision_id in self.row_of:
+            return
+        indices, values = self._features(text)
+        signature = self._signature(indices, values) if self.lsh_bits and len(indices) else 0
+        with self._lock:
+            if vision_id in self.row_of:
+                return
+            row = len(self.ids)
+            self.ids.append(vision_id)
+            self.row_of[vision_id] = row
+            self.doc_freq[indices] += 1
+            self._append_row(row, indices, values)
+            if len(self.ids) > self._normalized_rows * (1 + self.renorm_growth):
+                self._renormalize()
+            else:
+                idf = self._idf(indices)
+                self._norms[row] = np.sqrt(np.sum((values * idf) ** 2))
+            self.dirty += 1
+            if self.lsh_bits:
+                self.signatures.append(signature)
+                for key in self._band_keys(signature):
+                    self.buckets.setdefault(key, []).append(row)
+
+    def add_many(self, rows: Iterable[Tuple[int, str]]):
+        for vision_id, text in rows:
+            self.add(vision_id, text)
+
+    def catch_up(self, rows: Iterable[Tuple[int, str]]):
+        """Add stored visions read in id order after ``last_id`` and move the watermark past them."""
+        for vision_id, text in rows:
+            self.add(vision_id, text)
+            with self._lock:
+                self.watermark = max(self.watermark, vision_id)
+
+    @staticmethod
+    def _grown(buffer: np.ndarray, size: int) -> np.ndarray:
+        if size <= len(buffer):
+            return buffer
+        grown = np.zeros(max(size, 2 * len(buffer)), dtype=buffer.dtype)
+        grown[:len(buffer)] = buffer
+        return grown
+
+    def _append_row(self, row: int, indices: np.ndarray, values: np.ndarray):
+        start = int(self._indptr[row])
+        end = start + len(indices)
+        self._data = self._grown(self._data, end)
+        self._indices = self._grown(self._indices, end)
+        self._indptr = self._grown(self._indptr, row + 2)
+        self._norms = self._grown(self._norms, row + 1)
+        self._data[start:end] = values
+        self._indices[start:end] = indices
+        self._indptr[row + 1] = end
+        self._matrix = None
+
+    def _renormalize(self):
+        """Recompute every row norm against the current IDF."""
+        rows = len(self.ids)
+        self._norms[:rows] = np.sqrt(self.matrix.power(2) @ (self._idf() ** 2))
+        self._normalized_rows = rows
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """The indexed rows as a CSR matrix over the buffers (no copy)."""
+        with self._lock:
+            if self._matrix is None:
+                rows = len(self.ids)
+                nnz = int(self._indptr[rows])
+                self._matrix = sparse.csr_matrix(
+                    (self._data[:nnz], self._indices[:nnz], self._indptr[:rows + 1]),
+                    shape=(rows, self.n_features), copy=False,
+                )
+            return self._matrix
+
+    def _idf(self, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        doc_freq = self.doc_freq if indices is None else self.doc_freq[indices]
+        return (np.log((1.0 + len(self.ids)) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+
+    def _search(self, indices, values, k, exclude=None) -> List[Tuple[int, float]]:
+        if not len(self.ids) or not len(indices):
+            return []
+        matrix = self.matrix
+        norms = self._norms[:len(self.ids)]
+        idf = self._idf(indices)
+        query = values * idf
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0:
+            return []
+        weights = np.zeros(self.n_features, dtype=np.float32)
+        weights[indices] = query * idf
+
+        candidates = None
+        if self.lsh_bits and len(self.ids) > self.exact_limit:
+            rows = set()
+            for key in self._band_keys(self._signature(indices, values)):
+                rows.update(self.buckets.get(key, ()))
+            candidates = np.fromiter(rows, dtype=np.int64, count=len(rows))
+            if not len(candidates):
+                return []
+            scores = (matrix[candidates] @ weights) / (norms[candidates] * query_norm + 1e-12)
+        else:
+            scores = (matrix @ weights) / (norms * query_norm + 1e-12)
+
+        if exclude is not None and exclude in self.row_of:
+            excluded_row = self.row_of[exclude]
+            if candidates is None:
+                scores[excluded_row] = -1
+            else:
+                scores[candidates == excluded_row] = -1
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        rows = top if candidates is None else candidates[top]
+        return [(self.ids[row], round(float(scores[position]), 4))
+                for row, position in zip(rows, top) if scores[position] > 0]
+
+    def query(self, text: str, k: int = 5, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (vision_id, cosine similarity) pairs most similar to ``text``."""
+        indices, values = self._features(text)
+        with self._lock:
+            return self._search(indices, values, k, exclude)
+
+    def query_id(self, vision_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Return the visions most similar to an indexed vision, excluding itself."""
+        with self._lock:
+            row = self.matrix.getrow(self.row_of[vision_id])
+            return self._search(row.indices, row.data, k, exclude=vision_id)
+
+    def save(self, path: str):
+        """Persist the index atomically so other workers can load it on boot."""
+        # Snapshot under the lock and write outside it; queries keep running meanwhile
+        with self._lock:
+            matrix = self.matrix
+            ids = np.asarray(self.ids, dtype=np.int64)
+            doc_freq = self.doc_freq.copy()
+            signatures = np.asarray(self.signatures, dtype=np.uint64)
+            watermark = self.watermark
+            saved = self.dirty
+        meta = {
+            'n_features': self.n_features,
+            'lsh_bits': self.lsh_bits,
+            'lsh_bands': self.lsh_bands,
+            'exact_limit': self.exact_limit,
+            'seed': self.seed,
+            'renorm_growth': self.renorm_growth,
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            np.savez(
+                handle,
+                meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                ids=ids,
+                doc_freq=doc_freq,
+                indptr=matrix.indptr,
+                indices=matrix.indices,
+                data=matrix.data,
+                signatures=signatures,
+                watermark=np.asarray([watermark], dtype=np.int64),
+            )
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.dirty -= saved
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SimilarityIndex']:
+        """Load a persisted index, or return None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as stored:
+                meta = json.loads(stored['meta'].tobytes().decode('utf-8'))
+                index = cls(**meta)
+                index.ids = stored['ids'].tolist()
+                index.row_of = {vision_id: row for row, vision_id in enumerate(index.ids)}
+                index.doc_freq = stored['doc_freq']
+                index._data = stored['data'].astype(np.float32)
+                index._indices = stored['indices'].astype(np.int32)
+                index._indptr = stored['indptr'].astype(np.int32)
+                index._norms = np.zeros(len(index.ids), dtype=np.float32)
+                index._renormalize()
+                index.signatures = [int(signature) for signature in stored['signatures']]
+                # Files saved without a watermark may have gaps; catch up from the start
+                index.watermark = int(stored['watermark'][0]) if 'watermark' in stored.files else 0
+            for row, signature in enumerate(index.signatures):
+                for key in index._band_keys(signature):
+                    index.buckets.setdefault(key, []).append(row)
+            return index
+        except Exception as e:
+            logging.error(f"Error loading similarity index from {path}: {str(e)}")
+            return None
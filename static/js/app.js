@@ -0,0 +1,192 @@
+function loadSymbols() {
+    const categoryButtons = document.querySelector('.category-buttons');
+    const symbolsContent = document.querySelector('.symbols-content');
+    
+    if (!categoryButtons || !symbolsContent) {
+        console.log('Symbol containers not found, skipping symbol loading');
+        return;
+    }
+
+    // The catalogue is embedded in the page; fall back to the API if it is missing
+    const embedded = document.getElementById('symbols-data');
+    const symbolsData = embedded
+        ? Promise.resolve(JSON.parse(embedded.textContent))
+        : fetch('/symbols').then(response => response.json());
+
+    symbolsData
+        .then(data => renderCategories(data))
+        .catch(error => {
+            console.error('Error loading symbols:', error);
+            symbolsContent.innerHTML = '<p>Unable to load biblical symbols at this time.</p>';
+        });
+}
+
+function renderCategories(data) {
+    const categoryButtons = document.querySelector('.category-buttons');
+
+    // Clear existing buttons
+    categoryButtons.innerHTML = '';
+
+    if (!data || typeof data !== 'object') {
+        console.error('Invalid symbols data received');
+        return;
+    }
+
+    // Create category buttons
+    Object.keys(data).forEach(category => {
+        const button = document.createElement('button');
+        button.className = 'category-btn';
+        button.textContent = category;
+        button.onclick = () => showSymbols(category, data[category]);
+        categoryButtons.appendChild(button);
+    });
+
+    // Show first category by default if there are categories
+    const categories = Object.keys(data);
+    if (categories.length > 0) {
+        const firstCategory = categories[0];
+        const firstButton = categoryButtons.firstChild;
+        if (firstButton) {
+            firstButton.classList.add('active');
+            showSymbols(firstCategory, data[firstCategory]);
+        }
+    }
+}
+
+function showSymbols(category, symbols) {
+    const symbolsContent = document.querySelector('.symbols-content');
+    const categoryButtons = document.querySelectorAll('.category-btn');
+    
+    if (!symbolsContent || !categoryButtons) return;
+
+    // Update active button
+    categoryButtons.forEach(btn => {
+        btn.classList.remove('active');
+        if (btn.textContent === category) {
+            btn.classList.add('active');
+        }
+    });
+
+    // Display symbols
+    if (Array.isArray(symbols)) {
+        symbolsContent.innerHTML = symbols
+            .map(symbol => `
+                <div class="symbol-item">
+                    <h3>${symbol.symbol}</h3>
+                    <p>${symbol.meaning}</p>
+                    ${symbol.scripture_references ? `<p class="scripture">${symbol.scripture_references}</p>` : ''}
+                </div>
+            `)
+            .join('');
+    } else {
+        symbolsContent.innerHTML = '<p>No symbols available for this category.</p>';
+    }
+}
+
+function analyzeVision() {
+    const vision = document.getElementById('vision').value.trim();
+    const context = document.getElementById('context').value.trim();
+    const loading = document.querySelector('.loading');
+    const interpretation = document.getElementById('interpretation');
+    const errorMessage = document.querySelector('.error-message');
+
+    if (!vision) {
+        errorMessage.textContent = 'Please provide a detailed description of your vision. Include what you saw, felt, or experienced, even if it seems unclear.';
+        errorMessage.style.display = 'block';
+        errorMessage.style.color = 'var(--primary-color)';
+        errorMessage.style.padding = '1rem';
+        errorMessage.style.border = '2px solid var(--primary-color)';
+        errorMessage.style.borderRadius = '0.5rem';
+        errorMessage.style.marginBottom = '1rem';
+        return;
+    }
+
+    if (vision.length < 10) {
+        errorMessage.textContent = 'Please provide more details about your vision. What did you see? What emotions did you feel? What symbols or events occurred?';
+        errorMessage.style.display = 'block';
+        errorMessage.style.color = 'var(--primary-color)';
+        errorMessage.style.padding = '1rem';
+        errorMessage.style.border = '2px solid var(--primary-color)';
+        errorMessage.style.borderRadius = '0.5rem';
+        errorMessage.style.marginBottom = '1rem';
+        return;
+    }
+
+    // Hide error message if it was shown
+    errorMessage.style.display = 'none';
+
+    // Show loading spinner
+    loading.style.display = 'block';
+    interpretation.style.display = 'none';
+
+    fetch('/submit_vision', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            description: vision,
+            context: context
+        })
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        loading.style.display = 'none';
+        interpretation.style.display = 'block';
+
+        if (!data || !data.interpretation) {
+            throw new Error('Invalid response format');
+        }
+
+        try {
+            // Parse the interpretation if it's a string
+            const interpretationData = typeof data.interpretation === 'string' 
+                ? JSON.parse(data.interpretation) 
+                : data.interpretation;
+
+            // Update sections if they exist
+            const sections = {
+                'pattern-insights': interpretationData.pattern_insights || [],
+                'scripture-references': interpretationData.scripture_references || [],
+                'application-points': interpretationData.application_points || [],
+                'prayer-points': interpretationData.prayer_points || []
+            };
+
+            // Update each section
+            Object.entries(sections).forEach(([id, content]) => {
+                const element = document.getElementById(id);
+                if (element) {
+                    if (id === 'scripture-references' && Array.isArray(content)) {
+                        element.innerHTML = content
+                            .map(([ref, text]) => `<p>• ${ref}</p><p class="scripture-reference">"${text}"</p>`)
+                            .join('');
+                    } else if (Array.isArray(content)) {
+                        element.innerHTML = content
+                            .map(item => `<p>• ${item}</p>`)
+                            .join('');
+                    }
+                }
+            });
+
+            // Smooth scroll to interpretation
+            interpretation.scrollIntoView({ behavior: 'smooth' });
+        } catch (error) {
+            console.error('Error processing interpretation:', error);
+            throw new Error('Error processing the vision interpretation');
+        }
+    })
+    .catch(error => {
+        loading.style.display = 'none';
+        errorMessage.textContent = error.message || 'An error occurred while analyzing your vision. Please try again.';
+        errorMessage.style.display = 'block';
+        console.error('Error:', error);
+    });
+}
+
+// Load symbols when page loads
+document.addEventListener('DOMContentLoaded', loadSymbols);
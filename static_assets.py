@@ -0,0 +1,91 @@
+"""Fingerprinted, precompressed static assets
+
+Each file under the static folder is read once, named after a hash of its
+content (``css/app.css`` -> ``css/app.3f9c2a1b7e.css``) and compressed ahead
+of time. Fingerprinted URLs never change content, so they are served with a
+one-year immutable cache lifetime; a deploy that edits a file changes its URL.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import abort, request
+
+import responses
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_SUFFIXES = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+
+
+class StaticAsset:
+    """One asset's content, fingerprinted name and precompressed variants"""
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, suffix = os.path.splitext(path)
+        self.fingerprinted = f"{stem}.{self.digest}{suffix}"
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.encoded = {}
+        if suffix in COMPRESSIBLE_SUFFIXES:
+            self.encoded['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if responses.zstandard is not None:
+                self.encoded['zstd'] = responses.zstandard.ZstdCompressor(level=19).compress(data)
+
+
+class AssetManifest:
+    """Fingerprinted names for every file under ``directory``, loaded at startup."""
+
+    def __init__(self, directory, url_prefix='/assets'):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.assets = {}
+        self.by_fingerprint = {}
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, directory).replace(os.sep, '/')
+                with open(full_path, 'rb') as asset_file:
+                    asset = StaticAsset(path, asset_file.read())
+                self.assets[path] = asset
+                self.by_fingerprint[asset.fingerprinted] = asset
+
+    def url(self, path):
+        """URL of the current version of an asset"""
+        return f"{self.url_prefix}/{self.assets[path].fingerprinted}"
+
+    def response(self, app, fingerprinted):
+        """Serve an asset by fingerprinted name, precompressed when the client accepts it"""
+        asset = self.by_fingerprint.get(fingerprinted)
+        if asset is None:
+            abort(404)
+        encoding = responses.choose_encoding() if asset.encoded else None
+        data = asset.encoded.get(encoding, asset.data)
+        response = app.response_class(data, mimetype=asset.mimetype)
+        etag = asset.digest
+        if data is not asset.data:
+            response.headers['Content-Encoding'] = encoding
+            etag = f"{asset.digest}-{encoding}"
+        if asset.encoded:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+
+def init_app(app, url_prefix='/assets'):
+    """Serve ``app.static_folder`` from fingerprinted URLs and expose ``asset_url`` to templates"""
+    manifest = AssetManifest(app.static_folder, url_prefix)
+
+    @app.route(f"{url_prefix}/<path:filename>")
+    def fingerprinted_asset(filename):
+        return manifest.response(app, filename)
+
+    @app.context_processor
+    def asset_helpers():
+        return {'asset_url': manifest.url}
+
+    return manifest
@@ -0,0 +1,176 @@
+"""Non-blocking structured logging for the Biblical Vision Analyzer"""
+
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+_listener = None
+
+
+def redact(text, max_chars=0):
+    """Describe user text for logs: length, a short hash and an optional masked prefix."""
+    if text is None:
+        return None
+    summary = {
+        'length': len(text),
+        'sha1': hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+    }
+    if max_chars:
+        preview = text[:max_chars]
+        preview = EMAIL_PATTERN.sub('[email]', preview)
+        preview = PHONE_PATTERN.sub('[phone]', preview)
+        summary['preview'] = preview + ('...' if len(text) > max_chars else '')
+    return summary
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra={'fields': {...}}``."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request id and drops unsampled success logs.
+
+    Records logged with ``extra={'sampled': True}`` are routine success messages
+    and pass with probability ``sample_rate``; everything else, and in particular
+    every warning and error, always passes.
+    """
+
+    def __init__(self, sample_rate=1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False) and record.levelno < logging.WARNING:
+            decision = g.get('log_sampled') if has_request_context() else None
+            if decision is None:
+                decision = random.random() < self.sample_rate
+            if not decision:
+                return False
+        if not hasattr(record, 'request_id') and has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock ``prepare`` formats the message and traceback on the calling
+    thread and drops ``exc_info``, which both keeps the cost on the request
+    thread and hides exceptions from JsonFormatter. Records only cross
+    threads here, so they can travel as they are.
+    """
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+
+def setup_logging(level='INFO', sample_rate=1.0, fmt='json', stream=None):
+    """Route all logging through a queue so emitting never blocks the request thread.
+
+    A QueueListener thread owns the real stream handler and does the
+    formatting and I/O.
+    """
+    global _listener
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+    )
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _stop_listener()
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _stop_listener():
+    """Flush and stop the current listener, unless it is already stopped."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+@contextmanager
+def log_stage(name):
+    """Time a stage of the current request; timings are logged with the request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def init_app(app, sample_rate=1.0):
+    """Assign request ids and log one structured line per request."""
+    logger = logging.getLogger('requests')
+
+    @app.before_request
+    def start_request_log():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+        g.stage_timings = {}
+        # One sampling decision per request keeps its success logs together
+        g.log_sampled = random.random() < sample_rate
+
+    @app.after_request
+    def finish_request_log(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.get('request_started', time.perf_counter())) * 1000, 2),
+            'stages': g.get('stage_timings', {})
+        }
+        if response.status_code >= 500:
+            logger.error("request failed", extra={'fields': fields})
+        elif response.status_code >= 400:
+            logger.warning("request rejected", extra={'fields': fields})
+        else:
+            logger.info("request completed", extra={'fields': fields, 'sampled': True})
+        return response
@@ -0,0 +1,131 @@
+"""Symbol relationship graph for "related symbols"
+
+Symbols are linked by the scripture references they share (the same verse,
+or more weakly the same chapter), by category and by how often analyses
+find them together. The graph is built once into CSR arrays holding each
+symbol's strongest neighbors, best first, so the top k of any symbol is a
+slice of at most ``max_neighbors`` entries.
+"""
+
+import re
+from collections import namedtuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+REFERENCE_WEIGHT = 1.0
+CHAPTER_WEIGHT = 0.25
+CATEGORY_WEIGHT = 0.5
+# Co-occurrence adds up to this much, scaled by the most frequent pair's count
+CO_OCCURRENCE_WEIGHT = 1.0
+
+REFERENCE_PATTERN = re.compile(r"^(?P<book>(?:\d\s+)?[A-Za-z][A-Za-z ]*?)\s+(?P<chapter>\d+)(?::(?P<verses>[\d\-]+))?$")
+CONTINUATION_PATTERN = re.compile(r"^(?P<chapter>\d+):(?P<verses>[\d\-]+)$")
+
+Reference = namedtuple('Reference', 'book chapter verses')
+
+Neighbor = namedtuple('Neighbor', 'symbol weight')
+
+
+def parse_references(text) -> List[Reference]:
+    """Split a catalogue reference list ("Revelation 3:5, 7:9, John 1:1") into references.
+
+    A bare "chapter:verse" continues the previous book.
+    """
+    references = []
+    book = None
+    for part in (text or '').split(','):
+        part = part.strip()
+        match = REFERENCE_PATTERN.match(part)
+        if match:
+            book = match.group('book')
+            references.append(Reference(book, match.group('chapter'), match.group('verses')))
+            continue
+        match = CONTINUATION_PATTERN.match(part)
+        if match and book:
+            references.append(Reference(book, match.group('chapter'), match.group('verses')))
+    return references
+
+
+class SymbolGraph:
+    """Weighted symbol graph with each symbol's top neighbors precomputed in CSR form.
+
+    ``co_occurrence`` maps (symbol, symbol) name pairs to how often analyses
+    found both; names not in the catalogue are ignored.
+    """
+
+    def __init__(self, symbols: Sequence[Mapping], co_occurrence: Optional[Mapping[Tuple[str, str], int]] = None,
+                 max_neighbors: int = 10):
+        self.max_neighbors = max_neighbors
+        self.names: List[str] = [symbol['symbol'] for symbol in symbols]
+        self.categories: List[str] = [symbol['category'] for symbol in symbols]
+        self.index: Dict[str, int] = {name.lower(): row for row, name in enumerate(self.names)}
+        self.references = [parse_references(symbol.get('scripture_references')) for symbol in symbols]
+        self.verses = [frozenset(self._verse_key(reference) for reference in references if reference.verses)
+                       for references in self.references]
+        self.chapters = [frozenset((reference.book, reference.chapter) for reference in references)
+                         for references in self.references]
+        self.co_occurrence = np.zeros((len(self.names), len(self.names)), dtype=np.int32)
+        for (first, second), count in (co_occurrence or {}).items():
+            first, second = self.index.get(first.lower()), self.index.get(second.lower())
+            if first is not None and second is not None and first != second:
+                self.co_occurrence[first, second] += count
+                self.co_occurrence[second, first] += count
+
+        weights = self._weights()
+        indptr = [0]
+        indices = []
+        data = []
+        for row in range(len(self.names)):
+            order = np.argsort(-weights[row], kind='stable')[:max_neighbors]
+            order = order[weights[row, order] > 0]
+            indices.extend(order.tolist())
+            data.extend(weights[row, order].tolist())
+            indptr.append(len(indices))
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+
+    @staticmethod
+    def _verse_key(reference):
+        return f"{reference.book} {reference.chapter}:{reference.verses}"
+
+    def _weights(self):
+        count = len(self.names)
+        weights = np.zeros((count, count), dtype=np.float32)
+        for row in range(count):
+            for column in range(row + 1, count):
+                shared_verses = len(self.verses[row] & self.verses[column])
+                shared_chapters = len(self.chapters[row] & self.chapters[column])
+                weight = (REFERENCE_WEIGHT * shared_verses
+                          + CHAPTER_WEIGHT * max(shared_chapters - shared_verses, 0))
+                if self.categories[row] == self.categories[column]:
+                    weight += CATEGORY_WEIGHT
+                weights[row, column] = weights[column, row] = weight
+        if self.co_occurrence.any():
+            weights += CO_OCCURRENCE_WEIGHT * self.co_occurrence / self.co_occurrence.max()
+        np.fill_diagonal(weights, 0.0)
+        return weights
+
+    def __contains__(self, name):
+        return name.lower() in self.index
+
+    def related(self, name, k=5) -> List[Neighbor]:
+        """The k strongest neighbors of a symbol (at most max_neighbors), best first."""
+        row = self.index.get(name.lower())
+        if row is None:
+            return []
+        start = self.indptr[row]
+        end = min(self.indptr[row + 1], start + k)
+        return [Neighbor(self.names[column], round(float(weight), 3))
+                for column, weight in zip(self.indices[start:end], self.data[start:end])]
+
+    def explain(self, name, other):
+        """Why two symbols are linked: shared verses and chapters, category and co-occurrence count."""
+        first, second = self.index[name.lower()], self.index[other.lower()]
+        return {
+            'shared_references': sorted(self.verses[first] & self.verses[second]),
+            'shared_chapters': sorted(f"{book} {chapter}" for book, chapter in self.chapters[first] & self.chapters[second]),
+            'same_category': self.categories[first] == self.categories[second],
+            'co_occurrences': int(self.co_occurrence[first, second])
+        }
@@ -0,0 +1,61 @@
+from admission import ConcurrencySlots, TokenBucketStore
+
+def test_bucket_allows_burst_then_reports_retry_after(tmp_path):
+    """A client gets `burst` requests at once, then waits for the refill"""
+    buckets = TokenBucketStore(str(tmp_path / 'buckets.db'), rate=0.5, burst=2)
+    assert buckets.take('ip:1', now=100.0) == (True, 0.0)
+    assert buckets.take('ip:1', now=100.0) == (True, 0.0)
+    allowed, retry_after = buckets.take('ip:1', now=100.0)
+    assert not allowed
+    assert retry_after == 2.0
+    assert buckets.take('ip:1', now=102.0)[0]
+
+def test_buckets_are_per_client_and_shared_between_stores(tmp_path):
+    """Separate store instances (other workers) see the same buckets"""
+    path = str(tmp_path / 'buckets.db')
+    first = TokenBucketStore(path, rate=1.0, burst=1)
+    second = TokenBucketStore(path, rate=1.0, burst=1)
+    assert first.take('ip:1', now=10.0)[0]
+    assert not second.take('ip:1', now=10.0)[0]
+    assert second.take('ip:2', now=10.0)[0]
+
+def test_concurrency_slots_are_exclusive(tmp_path):
+    """Only `limit` slots can be held at once and released slots are reused"""
+    slots = ConcurrencySlots(str(tmp_path), limit=2)
+    held = [slots.acquire(), slots.acquire()]
+    assert None not in held
+    assert slots.acquire() is None
+    slots.release(held.pop())
+    again = slots.acquire()
+    assert again is not None
+    slots.release(again)
+    slots.release(held.pop())
+
+def _limited_app(tmp_path, trust_proxy=False, api_keys=()):
+    from flask import Flask
+    from admission import AdmissionControl
+
+    app = Flask(__name__)
+    admission = AdmissionControl(
+        buckets=TokenBucketStore(str(tmp_path / 'buckets.db'), rate=0.001, burst=2),
+        trust_proxy=trust_proxy, api_keys=api_keys
+    )
+    app.add_url_rule('/submit', 'submit', admission.limit(lambda: 'ok'), methods=['POST'])
+    return app.test_client()
+
+def test_unknown_api_keys_share_the_address_bucket(tmp_path):
+    """A fresh random key on every request does not get a fresh bucket"""
+    client = _limited_app(tmp_path, api_keys=['known'])
+    statuses = [client.post('/submit', headers={'X-API-Key': f"random-{index}"}).status_code for index in range(3)]
+    assert statuses == [200, 200, 429]
+    assert client.post('/submit', headers={'X-API-Key': 'known'}).status_code == 200
+
+def test_forged_forwarded_for_entries_are_ignored(tmp_path):
+    """Behind the proxy only the hop it appended identifies the client"""
+    client = _limited_app(tmp_path, trust_proxy=True)
+    statuses = [
+        client.post('/submit', headers={'X-Forwarded-For': f"10.0.0.{index}, 203.0.113.7"}).status_code
+        for index in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    assert client.post('/submit', headers={'X-Forwarded-For': '203.0.113.8'}).status_code == 200
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+import analysis_store
+
+Base = declarative_base()
+
+class Vision(Base):
+    __tablename__ = 'vision'
+    id = Column(Integer, primary_key=True)
+    title = Column(String(100))
+    date_submitted = Column(DateTime)
+    interpretation = Column(analysis_store.AnalysisJSON)
+
+class VisionTag(Base):
+    __tablename__ = 'vision_tag'
+    kind = Column(String(1), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    vision_id = Column(Integer, ForeignKey('vision.id'), primary_key=True)
+
+LION = {'symbol': 'Lion', 'meaning': 'Strength', 'category': 'Animals'}
+ANALYSIS = {
+    'pattern_insights': ['insight'],
+    'themes': ['warfare', 'protection'],
+    'theme_scores': [{'theme': 'warfare', 'score': 2.0, 'confidence': 0.667}],
+    'found_symbols': [LION],
+    'scripture_references': [('Ephesians 6:12', 'For our struggle is not against flesh and blood')],
+    'application_points': ['point'],
+    'prayer_points': ['prayer']
+}
+
+def test_pack_round_trip():
+    """Packing stores symbol names only and unpacking restores the full response"""
+    payload = analysis_store.pack(ANALYSIS)
+    assert payload['v'] == analysis_store.ANALYSIS_VERSION
+    assert payload['s'] == ['Lion']
+    restored = analysis_store.unpack(payload, {'Lion': LION})
+    assert restored == dict(ANALYSIS, themes=['protection', 'warfare'])
+
+def test_unpack_accepts_legacy_text():
+    """Analyses stored before versioning are returned as they were"""
+    assert analysis_store.unpack('{"themes": ["guidance"]}', {}) == {'themes': ['guidance']}
+
+def test_search_uses_tag_table_without_jsonb():
+    """Theme, symbol and date filters combine through the side table"""
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for vision_id, themes, day in ((1, ['warfare'], 1), (2, ['warfare', 'protection'], 10), (3, ['peace'], 10)):
+            payload = analysis_store.pack(dict(ANALYSIS, themes=themes))
+            session.add(Vision(id=vision_id, title=str(vision_id), date_submitted=datetime(2026, 1, day), interpretation=payload))
+            session.add_all(analysis_store.tag_rows(VisionTag, vision_id, payload))
+        session.commit()
+
+        rows = analysis_store.search_visions(session, Vision, VisionTag, themes=['warfare'], symbols=['Lion'])
+        assert [row.id for row in rows] == [2, 1]
+        rows = analysis_store.search_visions(
+            session, Vision, VisionTag, themes=['warfare'], since=datetime(2026, 1, 5)
+        )
+        assert [row.id for row in rows] == [2]
+        assert analysis_store.search_visions(session, Vision, VisionTag, before_id=2)[0].id == 1
+
+class RecordingSession:
+    """Stands in for a PostgreSQL session and keeps the compiled query"""
+    def get_bind(self):
+        return type('Bind', (), {'dialect': postgresql.dialect()})()
+
+    def execute(self, query):
+        self.sql = str(query.compile(dialect=postgresql.dialect()))
+        return type('Result', (), {'all': lambda result: []})()
+
+def test_postgresql_search_uses_containment():
+    """On PostgreSQL theme/symbol filters compile to a single @> on the GIN-indexed column"""
+    session = RecordingSession()
+    analysis_store.search_visions(session, Vision, VisionTag, themes=['warfare'], symbols=['Lion'])
+    assert '@>' in session.sql
+    assert 'vision_tag' not in session.sql
+
+def test_pack_keeps_analyzer_tier():
+    """The analyzer tier rides along under its short key"""
+    payload = analysis_store.pack(dict(ANALYSIS, analyzer_tier='fast'))
+    assert payload['at'] == 'fast'
+    assert analysis_store.unpack(payload, {'Lion': LION})['analyzer_tier'] == 'fast'
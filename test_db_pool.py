@@ -0,0 +1,77 @@
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from db_pool import REPLICA_BIND, PoolMetrics, has_replica, read_session
+
+def _app(tmp_path, replica=True):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    if replica:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"}
+    db = SQLAlchemy(app)
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        text = db.Column(db.String(20))
+
+    metrics = PoolMetrics()
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            metrics.attach(bind_key, engine)
+            Note.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(Note.__table__.insert().values(text=bind_key or 'primary'))
+    return app, db, Note, metrics
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(tmp_path):
+    """With a replica bind, read_session queries the replica while db.session stays on the primary"""
+    app, db, Note, _ = _app(tmp_path)
+    with app.app_context():
+        assert has_replica(db)
+        with read_session(db) as session:
+            assert session is not db.session
+            assert [note.text for note in session.query(Note)] == [REPLICA_BIND]
+        assert [note.text for note in db.session.query(Note)] == ['primary']
+
+def test_reads_fall_back_to_the_primary_without_a_replica(tmp_path):
+    """Without a replica, read_session is the request session itself"""
+    app, db, Note, _ = _app(tmp_path, replica=False)
+    with app.app_context():
+        assert not has_replica(db)
+        with read_session(db) as session:
+            assert session is db.session
+            assert [note.text for note in session.query(Note)] == ['primary']
+
+def test_pool_metrics_count_events_per_engine(tmp_path):
+    """Each engine reports its pool state and its own checkout and checkin counts"""
+    app, db, Note, metrics = _app(tmp_path)
+    with app.app_context():
+        before = metrics.snapshot(db.engines)
+        with read_session(db) as session:
+            session.query(Note).all()
+            session.query(Note).all()
+        db.session.query(Note).all()
+        db.session.remove()
+        report = metrics.snapshot(db.engines)
+    assert set(report) == {'primary', REPLICA_BIND}
+    for state in report.values():
+        assert state['pool_class'] == 'QueuePool'
+        assert state['checkedout'] == 0
+        assert state['connects'] == 1
+        assert state['checkins'] == state['checkouts']
+    assert report[REPLICA_BIND]['checkouts'] - before[REPLICA_BIND]['checkouts'] == 1
+    assert report['primary']['checkouts'] - before['primary']['checkouts'] == 1
+
+def test_db_status_reports_pool_stats():
+    """/db_status includes the primary pool's state and event counts"""
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+    response = app.test_client().get('/db_status')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['read_replica'] is False
+    pool = body['pool']['primary']
+    assert pool['checkouts'] >= 1
+    assert {'pool_class', 'connects', 'checkins', 'invalidates'} <= set(pool)
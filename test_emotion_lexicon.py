@@ -0,0 +1,33 @@
+import numpy as np
+
+from emotion_lexicon import EmotionLexicon, load_lexicon, read_lexicon_file
+from fast_analyzer import RuleTokenizer
+
+tokenize = RuleTokenizer()
+
+def test_negation_discounts_terms_in_scope():
+    """A negation lowers the next few terms; punctuation ends its scope"""
+    lexicon = load_lexicon()
+    assert lexicon.score(tokenize("i was afraid"))['fear'] == 1.0
+    assert 'fear' not in lexicon.score(tokenize("i was not afraid"))
+    scores = lexicon.score(tokenize("i was not calm, i was afraid and afraid"))
+    assert scores['fear'] == 2.0
+    assert 'peace' not in scores
+
+def test_batch_matches_single_scoring():
+    """Scoring a batch gives each vision the same intensities as scoring it alone"""
+    lexicon = load_lexicon()
+    texts = ["a dove brought peace and joy", "no joy, only grief", "nothing here"]
+    batch = lexicon.score_batch([tokenize(text) for text in texts])
+    for row, text in enumerate(texts):
+        single = lexicon.score(tokenize(text))
+        expected = [single.get(emotion, 0.0) for emotion in lexicon.emotions]
+        assert np.allclose(batch[row], expected, atol=1e-3)
+
+def test_lexicon_file_extends_terms(tmp_path):
+    """Lexicon files add weighted terms, skipping headers and comments"""
+    path = tmp_path / 'lexicon.tsv'
+    path.write_text("# comment\nterm\temotion\tscore\nzeal\tjoy\t0.75\nembers\twonder\t0.5\n")
+    assert read_lexicon_file(str(path)) == {'joy': {'zeal': 0.75}, 'wonder': {'embers': 0.5}}
+    lexicon = EmotionLexicon(read_lexicon_file(str(path)))
+    assert lexicon.score(tokenize("zeal and embers")) == {'joy': 0.75, 'wonder': 0.5}
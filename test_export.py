@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+import pytest
+
+import analysis_store
+import export
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer
+
+DESCRIPTIONS = [
+    "A lion stood on a mountain and roared",
+    "A dove rested on my shoulder by the river, with a comma, and \"quotes\"",
+]
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Two stored visions, the second a near-duplicate of the first; yields their expected export records"""
+    from app import SYMBOL_BY_NAME, Vision, app, db
+
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', 'secret')
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for number, description in enumerate(DESCRIPTIONS, 1):
+            db.session.add(Vision(
+                id=number, title=f"Vision {number}", description=description,
+                context='' if number == 1 else None,
+                date_submitted=datetime(2024, 5, number, 12, 30),
+                duplicate_of=1 if number == 2 else None,
+                interpretation=analysis_store.pack(analyzer.analyze_vision(description))
+            ))
+        db.session.commit()
+        records = list(export.iter_visions(db.session, Vision, SYMBOL_BY_NAME))
+    yield app, json.loads(json.dumps(records))
+    with app.app_context():
+        db.drop_all()
+
+def test_jsonl_round_trip(stored):
+    """Each JSONL line parses back to the stored record, and since_id resumes after an id"""
+    app, records = stored
+    client = app.test_client()
+    response = client.get('/export', headers={'X-Admin-Token': 'secret'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == records
+    assert records[1]['duplicate_of'] == 1
+    assert records[0]['date_submitted'] == '2024-05-01T12:30:00'
+    later = client.get('/export?since_id=1', headers={'X-Admin-Token': 'secret'}).get_data(as_text=True)
+    assert [json.loads(line)['id'] for line in later.splitlines()] == [2]
+
+def test_csv_round_trip(stored):
+    """CSV rows keep every column; themes and symbols split on '|' and the analysis column parses back"""
+    app, records = stored
+    response = app.test_client().get('/export?format=csv', headers={'X-Admin-Token': 'secret'})
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == len(records)
+    for row, record in zip(rows, records):
+        assert row['description'] == record['description']
+        assert row['context'] == (record['context'] or '')
+        assert row['duplicate_of'] == str(record['duplicate_of'] or '')
+        assert json.loads(row['analysis']) == record['analysis']
+        assert row['themes'].split('|') == record['analysis']['themes']
+        assert row['symbols'].split('|') == [symbol['symbol'] for symbol in record['analysis']['found_symbols']]
+
+def test_parquet_round_trip(stored, tmp_path):
+    """Parquet rows read back as the records with themes and symbols as lists"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    _, records = stored
+    path = str(tmp_path / 'visions.parquet')
+    assert export.write_parquet(iter(records), path) == len(records)
+    rows = pq.read_table(path).to_pylist()
+    for row, record in zip(rows, records):
+        assert json.loads(row.pop('analysis')) == record['analysis']
+        assert row.pop('themes') == record['analysis']['themes']
+        assert row.pop('symbols') == [symbol['symbol'] for symbol in record['analysis']['found_symbols']]
+        assert row == {key: value for key, value in record.items() if key != 'analysis'}
+
+def test_parquet_without_pyarrow_explains_the_dependency(monkeypatch, tmp_path):
+    """Without pyarrow the writer raises a RuntimeError naming the package"""
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(RuntimeError, match='pyarrow'):
+        export.write_parquet(iter([]), str(tmp_path / 'visions.parquet'))
+
+def test_export_is_admin_only(stored, monkeypatch):
+    """Requests without the right admin token, or with admin endpoints disabled, get 403"""
+    app, _ = stored
+    client = app.test_client()
+    assert client.get('/export').status_code == 403
+    assert client.get('/export', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', '')
+    assert client.get('/export', headers={'X-Admin-Token': ''}).status_code == 403
@@ -0,0 +1,70 @@
+import spacy
+from spacy.language import Language
+
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer, RuleTokenizer, TierSelector
+from vision_analyzer import VisionAnalyzer
+
+VISIONS = [
+    "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body",
+    "A lion stood on a mountain and roared. The sound shook the ground and I was afraid",
+    "Fire fell from heaven on an altar. Oil was poured on my head and I felt power in my hands",
+    "I was chained in a prison. Keys appeared in my hand and I unlocked the door and escaped",
+]
+
+@Language.component('test_rule_tags')
+def rule_tags(doc):
+    """Tag a spaCy doc the way RuleTokenizer does, so both tiers see the same tags"""
+    tokenizer = RuleTokenizer()
+    previous = None
+    for token in doc:
+        token.lemma_, token.pos_ = tokenizer._tag(token.lower_, previous)
+        previous = token.pos_
+    return doc
+
+def test_rule_tokenizer_tags_and_lemmatizes():
+    """Lookup tables and suffix rules give lemmas and coarse tags"""
+    doc = RuleTokenizer()("The lions were running to the light, and I saw doves")
+    tags = {token.lower_: (token.lemma_, token.pos_) for token in doc}
+    assert tags['the'] == ('the', 'DET')
+    assert tags['lions'] == ('lion', 'NOUN')
+    assert tags['were'][1] == 'AUX'
+    assert tags['running'] == ('run', 'VERB')
+    assert tags['light'] == ('light', 'NOUN')
+    assert tags['saw'] == ('see', 'VERB')
+    assert tags[','] == (',', 'PUNCT')
+
+def test_fast_tier_matches_full_tier_on_the_same_tags():
+    """Given identical tags, the fast tier's output equals the spaCy pipeline's, key for key"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('test_rule_tags')
+    full = VisionAnalyzer(BIBLICAL_SYMBOLS, nlp=nlp)
+    fast = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    for vision in VISIONS:
+        expected, result = full.analyze_vision(vision), fast.analyze_vision(vision)
+        # Themes come from a set, so only their membership is stable
+        assert set(result.pop('themes')) == set(expected.pop('themes'))
+        assert result == expected
+
+def test_tier_selector_degrades_on_load_and_recovers():
+    """Too many in flight or slow full analyses switch to the fast tier; probes let latency recover"""
+    selector = TierSelector(max_in_flight=2, max_latency=1.0, max_queue_wait=0.5, probe_every=3, smoothing=1.0)
+    assert [selector.acquire() for _ in range(3)] == ['full', 'full', 'fast']
+    for tier in ('full', 'full', 'fast'):
+        selector.release(tier, 0.1)
+    assert selector.acquire() == 'full'
+    selector.release('full', 2.0)
+    assert selector.latency == 2.0
+    assert [selector.acquire() for _ in range(3)] == ['fast', 'fast', 'full']
+    for tier in ('fast', 'fast'):
+        selector.release(tier, 0.01)
+    # The probe comes back fast, below 80% of the limit
+    selector.release('full', 0.5)
+    assert selector.acquire() == 'full'
+    assert not selector.degraded
+
+def test_tier_selector_modes_and_queue_wait():
+    """A long router queue wait degrades at once; 'off' and 'always' pin the tier"""
+    assert TierSelector(max_queue_wait=0.5).acquire(queue_wait=0.6) == 'fast'
+    assert TierSelector(mode='off', max_in_flight=0).acquire() == 'full'
+    assert TierSelector(mode='always').acquire() == 'fast'
@@ -0,0 +1,91 @@
+import vision_rules
+from biblical_symbols import BIBLICAL_SYMBOLS, SYMBOL_ALIASES
+from fast_analyzer import RuleAnalyzer
+from fuzzy_index import FuzzyIndex, edit_distance
+from theme_scorer import ThemeScorer
+from vision_rules import COMMON_WORDS, SymbolLookup, modern_symbol_index, symbol_fuzzy_index, symbol_phrases
+
+PHRASES = symbol_phrases(BIBLICAL_SYMBOLS, SYMBOL_ALIASES)
+
+# Correctly spelled words within an edit or two of a symbol or keyword
+LOOKALIKES = ['night', 'right', 'might', 'fight', 'sight', 'tight', 'wing', 'shake', 'stake', 'drove', 'lame',
+              'stair', 'scar', 'lower', 'tower', 'dream', 'last', 'had']
+KNOWN_WORDS = COMMON_WORDS | frozenset(LOOKALIKES)
+
+def test_edit_distance_counts_transpositions_once():
+    """Adjacent transpositions are one edit and distances over the limit are capped"""
+    assert edit_distance('mountian', 'mountain', 2) == 1
+    assert edit_distance('kitten', 'sitting', 5) == 3
+    assert edit_distance('kitten', 'sitting', 1) == 2
+
+def test_corrects_misspelled_symbols_only():
+    """Typos map to catalogue symbols; short, known and distant words are left alone"""
+    index = symbol_fuzzy_index(PHRASES, KNOWN_WORDS)
+    assert index.correct('lyon') == 'Lion'
+    assert index.correct('trumphet') == 'Trumpet'
+    assert index.correct('serpant') == 'Serpent/Snake'
+    assert index.correct('line') is None
+    assert index.correct('dish') is None
+    assert index.correct('cow') is None
+    assert index.correct('xylophone') is None
+
+def test_long_words_allow_two_edits():
+    """Words of long_word letters or more may be two edits away"""
+    index = FuzzyIndex(['tabernacle', 'lampstand'])
+    assert index.lookup('tabernakel') == ('tabernacle', 2)
+    assert index.lookup('lamstnd') is None
+
+def test_symbol_lookup_falls_back_for_unmatched_words():
+    """Exact phrase matches win; only leftover words are corrected"""
+    lookup = SymbolLookup(PHRASES, fuzzy=symbol_fuzzy_index(PHRASES, KNOWN_WORDS))
+    words = 'a tree of life and a lyon'.split()
+    assert [name for _, _, name in lookup.match(words)] == [PHRASES['tree of life'], 'Lion']
+    assert [name for _, _, name in SymbolLookup(PHRASES).match(words)] == [PHRASES['tree of life']]
+
+def test_words_in_the_word_list_are_never_corrected():
+    """English words resembling a symbol, modern object or keyword stay as they are"""
+    symbols = symbol_fuzzy_index(PHRASES, KNOWN_WORDS)
+    assert {word: symbols.correct(word) for word in LOOKALIKES} == {word: None for word in LOOKALIKES}
+    modern = modern_symbol_index(KNOWN_WORDS)
+    assert modern.correct('lower') is None and modern.correct('tower') is None
+    assert modern.correct('electricty') == 'power'
+    scorer = ThemeScorer([({'warfare': ['fight'], 'protection': ['protect']}, 1.0)], fuzzy=True, known_words=KNOWN_WORDS)
+    assert scorer.correct('night') is None and scorer.correct('right') is None
+    assert scorer.correct('protet') == 'protect'
+
+def test_only_nouns_are_corrected_to_symbols():
+    """A misspelled word tagged as anything but a noun is not read as a symbol"""
+    lookup = SymbolLookup(PHRASES, fuzzy=symbol_fuzzy_index(PHRASES, KNOWN_WORDS))
+    assert [name for _, _, name in lookup.match(['a', 'lyon'], ['DET', 'NOUN'])] == ['Lion']
+    assert lookup.match(['a', 'lyon'], ['DET', 'VERB']) == []
+
+def test_fuzzy_matching_needs_a_real_word_list(monkeypatch):
+    """Without a full word list typo correction is off; with one, common words keep their meaning"""
+    assert not RuleAnalyzer(BIBLICAL_SYMBOLS).fuzzy_matching
+    monkeypatch.setattr(vision_rules, 'MIN_WORD_LIST_SIZE', len(KNOWN_WORDS))
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=0, known_words=KNOWN_WORDS)
+    assert analyzer.fuzzy_matching
+    result = analyzer.analyze_vision("I had a dream last night")
+    assert [symbol['symbol'] for symbol in result['found_symbols']] == []
+    assert 'warfare' not in result['themes']
+    found = analyzer.analyze_vision("I saw a lyon")['found_symbols']
+    assert [symbol['symbol'] for symbol in found] == ['Lion']
+
+def test_proper_nouns_do_not_shield_misspelled_symbols(tmp_path):
+    """Capitalized word-file entries, and the lowercase forms spaCy stores for them, never block a correction"""
+    import spacy
+    path = tmp_path / 'words'
+    # Laid out like /usr/share/dict/words: proper nouns capitalized, possessives alongside
+    path.write_text('\n'.join(sorted(KNOWN_WORDS | {'Aaron', 'Lyon', "Lyon's", 'Lyons', 'Rose', 'rose', 'Serpens',
+                                                    'lion', "lion's", 'serpent', 'snake', 'trumpet'})) + '\n')
+    nlp = spacy.blank('en')
+    for word in ('Lyon', 'The', 'the', 'Serpens'):
+        nlp.vocab[word]
+    known_words = vision_rules.english_words(nlp, str(path))
+    assert 'lyon' not in known_words and 'serpens' not in known_words and 'aaron' not in known_words
+    assert {'rose', 'lion', 'the', 'line'} <= known_words
+    index = symbol_fuzzy_index(PHRASES, known_words)
+    assert index.correct('lyon') == 'Lion'
+    assert index.correct('trumphet') == 'Trumpet'
+    assert index.correct('serpant') == 'Serpent/Snake'
+    assert index.correct('line') is None
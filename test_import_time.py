@@ -0,0 +1,44 @@
+"""Import-time budget: worker, CLI and test start-up must not pull in heavy NLP modules"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budgets in milliseconds; IMPORT_TIME_BUDGET_SCALE
+# stretches them on slow machines
+BUDGETS_MS = {
+    'app': 2000,
+    'vision_analyzer': 1000,
+}
+HEAVY_MODULES = ('spacy', 'nltk', 'spiritual_guidance')
+
+def run_python(*args):
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    return subprocess.run(
+        [sys.executable, *args], cwd=REPO, env=env, capture_output=True, text=True, check=True
+    )
+
+def import_time_ms(module):
+    """Cumulative import time of a module, from ``python -X importtime``"""
+    stderr = run_python('-X', 'importtime', '-c', f'import {module}').stderr
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and line.split('|')[-1].strip() == module:
+            return int(line.split('|')[1]) / 1000.0
+    raise AssertionError(f"No import time reported for {module}")
+
+@pytest.mark.parametrize('module', sorted(BUDGETS_MS))
+def test_import_time_budget(module):
+    """Importing the module stays within its budget (best of two runs)"""
+    budget = BUDGETS_MS[module] * float(os.environ.get('IMPORT_TIME_BUDGET_SCALE', 1))
+    elapsed = min(import_time_ms(module) for _ in range(2))
+    assert elapsed <= budget, f"import {module} took {elapsed:.0f} ms, budget {budget:.0f} ms"
+
+@pytest.mark.parametrize('module', sorted(BUDGETS_MS))
+def test_heavy_modules_load_lazily(module):
+    """spaCy, NLTK and the guidance tables are not imported until first use"""
+    loaded = run_python('-c', f"import sys, {module}; print(' '.join(sorted(sys.modules)))").stdout.split()
+    assert not set(HEAVY_MODULES) & set(loaded)
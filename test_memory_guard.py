@@ -0,0 +1,78 @@
+import threading
+from types import SimpleNamespace
+
+import memory_guard
+from memory_guard import MemoryGuard
+
+class FakeVocab:
+    def __init__(self, strings):
+        self.strings = ['s'] * strings
+
+    def __len__(self):
+        return len(self.strings)
+
+class FakeAnalyzer:
+    """An analyzer whose pipeline vocabulary is a plain list of strings"""
+
+    def __init__(self):
+        self.nlp = SimpleNamespace(vocab=FakeVocab(100))
+        self.reloads = 0
+
+    def reload_model(self):
+        self.reloads += 1
+        self.nlp = SimpleNamespace(vocab=FakeVocab(100))
+        return self.nlp
+
+    def intern(self, count):
+        self.nlp.vocab.strings.extend(['new'] * count)
+
+def _wait_for_reload():
+    for thread in threading.enumerate():
+        if thread.name == 'model-reload':
+            thread.join(5)
+
+def test_model_reloads_only_past_the_new_string_limit():
+    """Checks run every `check_every` analyses and reload once vocabulary growth passes the limit"""
+    analyzer = FakeAnalyzer()
+    guard = MemoryGuard(analyzer, max_new_strings=50, check_every=2)
+    analyzer.intern(50)
+    guard.after_analysis()
+    guard.after_analysis()
+    assert analyzer.reloads == 0
+    analyzer.intern(1)
+    guard.after_analysis()
+    assert analyzer.reloads == 0
+    guard.after_analysis()
+    _wait_for_reload()
+    assert analyzer.reloads == 1
+    assert guard.model_reloads == 1
+    assert guard.metrics()['vocab_strings_since_reload'] == 0
+
+def test_rss_over_the_limit_requests_one_recycle(monkeypatch):
+    """Only RSS above max_rss_mb flags the worker, and the flag is raised once"""
+    rss = [900.0]
+    monkeypatch.setattr(memory_guard, 'current_rss_mb', lambda: rss[0])
+    guard = MemoryGuard(FakeAnalyzer(), max_new_strings=0, max_rss_mb=1000, check_every=1)
+    guard.after_analysis()
+    assert not guard.recycle_requested
+    rss[0] = 1001.0
+    guard.after_analysis()
+    assert guard.recycle_requested
+    assert MemoryGuard(FakeAnalyzer(), max_rss_mb=0, check_every=1).check() is None
+
+def test_recycle_sends_sigterm_after_the_response_under_gunicorn(monkeypatch):
+    """A flagged worker signals itself once the response closes, and only under gunicorn"""
+    import signal
+    import app
+
+    guard = MemoryGuard(FakeAnalyzer())
+    guard.recycle_requested = True
+    monkeypatch.setattr(app, '_analyzers', app.Analyzers(None, None, guard))
+    signals = []
+    monkeypatch.setattr(app.os, 'kill', lambda pid, sig: signals.append(sig))
+    for server, expected in (('Werkzeug/2.3', []), ('gunicorn/21.2.0', [signal.SIGTERM])):
+        with app.app.test_request_context('/', environ_base={'SERVER_SOFTWARE': server}):
+            response = app.recycle_worker_if_needed(app.app.response_class('done'))
+            assert signals == []
+            response.close()
+        assert signals == expected
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+import near_duplicate
+
+VISION = "I saw a lion roaring on a mountain while water flowed down from the rock and a dove flew over the valley"
+
+def test_normalization_ignores_case_punctuation_and_spacing():
+    """Formatting-only edits produce identical signatures"""
+    edited = "i SAW a lion,   roaring on a mountain... while water flowed down from the rock and a dove flew over the valley!"
+    assert (near_duplicate.minhash(VISION) == near_duplicate.minhash(edited)).all()
+
+def test_small_edit_is_a_near_duplicate():
+    """A one-word edit stays above the default threshold and shares an LSH band"""
+    original = near_duplicate.minhash(VISION)
+    edited = near_duplicate.minhash(VISION.replace("lion", "tiger"))
+    assert near_duplicate.similarity(original, edited) >= 0.8
+    assert set(near_duplicate.band_keys(original)) & set(near_duplicate.band_keys(edited))
+
+def test_different_visions_are_not_near_duplicates():
+    """Unrelated descriptions score far below the threshold"""
+    other = near_duplicate.minhash("A cow chased me across a field and electric power flowed from my TV")
+    assert near_duplicate.similarity(near_duplicate.minhash(VISION), other) < 0.3
+
+def test_empty_description_has_a_signature():
+    """Descriptions without words still get a fixed-size signature"""
+    assert len(near_duplicate.minhash("...")) == near_duplicate.NUM_PERMUTATIONS
+
+def test_candidates_sharing_more_bands_come_first():
+    """With a small candidate limit, the vision sharing the most bands is still found"""
+    Base = declarative_base()
+
+    class VisionSignature(Base):
+        __tablename__ = 'vision_signature'
+        vision_id = Column(Integer, primary_key=True)
+        minhash = Column(LargeBinary, nullable=False)
+
+    class VisionSignatureBand(Base):
+        __tablename__ = 'vision_signature_band'
+        id = Column(Integer, primary_key=True)
+        key = Column(BigInteger, nullable=False)
+        vision_id = Column(Integer, nullable=False)
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    signature = near_duplicate.minhash(VISION)
+    with Session(engine) as session:
+        # Older visions share a single band with the new one; the last is an exact copy
+        for vision_id in range(1, 6):
+            session.add(VisionSignature(vision_id=vision_id, minhash=np.zeros_like(signature).tobytes()))
+            session.add(VisionSignatureBand(key=near_duplicate.band_keys(signature)[0], vision_id=vision_id))
+        session.add_all(near_duplicate.signature_rows(VisionSignature, VisionSignatureBand, 6, signature))
+        session.commit()
+        db = SimpleNamespace(session=session)
+        found = near_duplicate.find_near_duplicate(
+            db, VisionSignature, VisionSignatureBand, signature, threshold=0.8, max_candidates=2
+        )
+    assert found == (6, 1.0)
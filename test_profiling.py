@@ -0,0 +1,68 @@
+import os
+import time
+
+from flask import Flask, g, request
+
+from profiling import RequestProfiler, SamplingProfiler
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_sampling_profiler_writes_folded_stacks(tmp_path):
+    """Samples of the profiled thread are written as 'outer;inner count' lines"""
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy(0.1)
+    profiler.stop()
+    path = tmp_path / 'profile.folded'
+    profiler.dump_stats(str(path))
+    lines = path.read_text().splitlines()
+    assert lines
+    assert any('_busy (test_profiling.py' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert ';' in stack and int(count) > 0
+
+def _profiled_app(tmp_path, sample_rate=0.0):
+    app = Flask(__name__)
+    profiler = RequestProfiler(directory=str(tmp_path), token='secret', sample_rate=sample_rate, keep=2)
+
+    @app.before_request
+    def set_request_id():
+        g.request_id = request.headers.get('X-Request-ID')
+
+    @app.route('/work')
+    @profiler.profile
+    def work():
+        return 'done'
+
+    return app, profiler
+
+def test_disabled_profiler_returns_the_view_unchanged():
+    """Without a token or sample rate the view is not wrapped"""
+    def view():
+        return 'done'
+    assert RequestProfiler().profile(view) is view
+
+def test_admin_requests_get_a_sanitized_profile_id(tmp_path):
+    """A token-carrying request is profiled, named with a safe request id and told the file name"""
+    app, profiler = _profiled_app(tmp_path)
+    client = app.test_client()
+    assert 'X-Profile-Id' not in client.get('/work').headers
+    assert profiler.list_profiles() == []
+    headers = {'X-Profile': 'secret', 'X-Request-ID': 'abc/../../etc;' + 'x' * 100}
+    name = client.get('/work', headers=headers).headers['X-Profile-Id']
+    assert os.listdir(tmp_path) == [name]
+    request_id = name.rsplit('-', 1)[-1].split('.')[0]
+    assert request_id == 'abcetc' + 'x' * 58
+    assert client.get('/work', headers={'X-Profile': 'wrong'}).headers.get('X-Profile-Id') is None
+
+def test_sampled_requests_do_not_reveal_the_profile_id(tmp_path):
+    """Randomly sampled requests are profiled and pruned to `keep`, but the client gets no file name"""
+    app, profiler = _profiled_app(tmp_path, sample_rate=1.0)
+    client = app.test_client()
+    for request_id in ('first', 'second', 'third'):
+        assert 'X-Profile-Id' not in client.get('/work', headers={'X-Request-ID': request_id}).headers
+        time.sleep(0.01)
+    assert len(profiler.list_profiles()) == 2
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+from flask import Flask, jsonify
+
+import responses
+
+def make_app(min_bytes=100):
+    app = Flask(__name__)
+    responses.init_app(app, min_bytes=min_bytes)
+
+    @app.route('/small')
+    def small():
+        return jsonify({"status": "success"})
+
+    @app.route('/large')
+    def large():
+        return jsonify({"prayers": ["Lord, grant me wisdom to understand this vision."] * 20, "id": 1})
+
+    return app
+
+def test_large_responses_are_gzipped_when_accepted():
+    """Bodies above the threshold are compressed and decode to the same JSON"""
+    client = make_app().test_client()
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))['id'] == 1
+
+def test_small_or_unaccepted_responses_are_not_compressed():
+    """Small bodies and clients without gzip get plain JSON"""
+    client = make_app().test_client()
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/large').headers
+
+def test_json_matches_default_provider():
+    """The fast provider produces the same JSON as Flask's encoder, key order included"""
+    payload = {"b": [("Psalm 23:1", "The LORD is my shepherd")], "a": {"2": 0.5}, "c": None}
+    app = make_app()
+    plain = Flask(__name__)
+    with app.app_context(), plain.app_context():
+        assert app.json.response(payload).get_data() == plain.json.response(payload).get_data()
+        # Non-ASCII text is sent as UTF-8 rather than \u escapes
+        assert json.loads(app.json.dumps({"word": "é"})) == {"word": "é"}
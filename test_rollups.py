@@ -0,0 +1,156 @@
+from datetime import date, datetime
+
+from sqlalchemy import Column, Date, DateTime, Integer, String, Text, create_engine, event, select
+from sqlalchemy.orm import Session, declarative_base
+
+import rollups
+from rollups import RollupCounts
+
+DAY = date(2026, 1, 1)
+
+def test_counts_themes_symbols_and_pairs():
+    """Each analysis adds one to every theme, symbol and sorted tag pair of its day"""
+    counts = RollupCounts()
+    counts.add({'v': 1, 't': ['warfare'], 's': ['Lion', 'Sword']}, DAY)
+    counts.add({'v': 1, 't': ['warfare'], 's': ['Lion']}, DAY)
+    assert counts.themes[(DAY, 'warfare')] == 2
+    assert counts.symbols[(DAY, 'Sword')] == 1
+    assert counts.pairs[(DAY, 's:Lion', 't:warfare')] == 2
+    assert counts.pairs[(DAY, 's:Lion', 's:Sword')] == 1
+    assert (DAY, 't:warfare', 's:Lion') not in counts.pairs
+
+def test_counts_legacy_analyses():
+    """Unversioned full responses stored as text are counted too"""
+    counts = RollupCounts()
+    counts.add('{"themes": ["peace"], "found_symbols": [{"symbol": "Dove"}]}', DAY)
+    assert counts.themes[(DAY, 'peace')] == 1
+    assert counts.pairs[(DAY, 's:Dove', 't:peace')] == 1
+
+Base = declarative_base()
+
+class Vision(Base):
+    __tablename__ = 'vision'
+    id = Column(Integer, primary_key=True)
+    date_submitted = Column(DateTime)
+    interpretation = Column(Text)
+
+class ThemeDaily(Base):
+    __tablename__ = 'theme_daily'
+    day = Column(Date, primary_key=True)
+    theme = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class SymbolDaily(Base):
+    __tablename__ = 'symbol_daily'
+    day = Column(Date, primary_key=True)
+    symbol = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class TagPairDaily(Base):
+    __tablename__ = 'tag_pair_daily'
+    day = Column(Date, primary_key=True)
+    first = Column(String(110), primary_key=True)
+    second = Column(String(110), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+TABLES = rollups.RollupTables(ThemeDaily, SymbolDaily, TagPairDaily)
+NEXT_DAY = date(2026, 1, 2)
+
+def _session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+def test_sqlite_upsert_adds_to_existing_rows(monkeypatch):
+    """Recording the same keys again increments their rows, across several upsert batches"""
+    monkeypatch.setattr(rollups, 'UPSERT_BATCH', 2)
+    with _session() as session:
+        rollups.record_analysis(session, TABLES, {'v': 1, 't': ['warfare', 'peace'], 's': ['Lion']}, DAY)
+        rollups.record_analysis(session, TABLES, {'v': 1, 't': ['warfare'], 's': ['Lion', 'Dove']}, DAY)
+        session.commit()
+        assert dict(session.execute(select(ThemeDaily.theme, ThemeDaily.count)).all()) == {'warfare': 2, 'peace': 1}
+        assert dict(session.execute(select(SymbolDaily.symbol, SymbolDaily.count)).all()) == {'Lion': 2, 'Dove': 1}
+        pairs = {(first, second): count for first, second, count in
+                 session.execute(select(TagPairDaily.first, TagPairDaily.second, TagPairDaily.count))}
+        assert pairs[('s:Lion', 't:warfare')] == 2
+        assert pairs[('s:Dove', 's:Lion')] == 1
+
+def test_rebuild_and_analytics_report():
+    """A rebuild replaces old rollups; analytics reports daily series, totals and top pairs within the window"""
+    with _session() as session:
+        session.add_all([
+            Vision(date_submitted=datetime(2026, 1, 1, 9), interpretation='{"v": 1, "t": ["warfare"], "s": ["Lion"]}'),
+            Vision(date_submitted=datetime(2026, 1, 2, 9), interpretation='{"v": 1, "t": ["warfare"], "s": ["Lion"]}'),
+            Vision(date_submitted=datetime(2026, 1, 2, 10), interpretation='{"themes": ["peace"], "found_symbols": []}'),
+            Vision(date_submitted=None, interpretation='{"v": 1, "t": ["lost"]}'),
+        ])
+        session.add(ThemeDaily(day=DAY, theme='stale', count=5))
+        session.commit()
+        assert rollups.rebuild(session, TABLES, Vision) == 4
+        report = rollups.analytics(session, TABLES)
+        assert report['themes']['daily'] == {'2026-01-01': {'warfare': 1}, '2026-01-02': {'warfare': 1, 'peace': 1}}
+        assert report['themes']['totals'] == {'warfare': 2, 'peace': 1}
+        assert report['symbols']['totals'] == {'Lion': 2}
+        assert report['co_occurrence'] == [{'first': 's:Lion', 'second': 't:warfare', 'count': 2}]
+        windowed = rollups.analytics(session, TABLES, since=NEXT_DAY, until=date(2026, 1, 3), top_pairs=0)
+        assert list(windowed['themes']['daily']) == ['2026-01-02']
+        assert windowed['co_occurrence'] == []
+        assert rollups.symbol_pair_counts(session, TABLES) == {}
+
+def test_rebuild_rollups_command():
+    """The CLI command rebuilds the app's rollups and reports through click"""
+    from app import ThemeDaily as AppThemeDaily, Vision as AppVision, app, db
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(AppVision(title='Lion', description='A lion roared', date_submitted=datetime(2026, 1, 1, 9),
+                                 interpretation={'v': 1, 't': ['warfare'], 's': ['Lion']}))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0
+    assert result.output.startswith('Rebuilt rollups from 1 visions')
+    with app.app_context():
+        assert [(row.theme, row.count) for row in db.session.query(AppThemeDaily)] == [('warfare', 1)]
+        db.drop_all()
+
+def test_upserts_write_rows_in_key_order(monkeypatch):
+    """Batches go out sorted by key, whatever order the counts were accumulated in"""
+    monkeypatch.setattr(rollups, 'UPSERT_BATCH', 1)
+    counts = RollupCounts()
+    for themes in (['warfare'], ['peace', 'guidance'], ['angels']):
+        counts.add({'v': 1, 't': themes, 's': []}, NEXT_DAY)
+    counts.add({'v': 1, 't': ['zeal'], 's': []}, DAY)
+    with _session() as session:
+        written = []
+        event.listen(session.get_bind(), 'before_cursor_execute',
+                     lambda conn, cursor, statement, parameters, context, executemany: written.append(parameters))
+        rollups.record(session, TABLES, counts)
+    assert [parameters[1] for parameters in written] == ['zeal', 'angels', 'guidance', 'peace', 'warfare', 't:guidance']
+    assert written[-1][2] == 't:peace'
+
+def test_failed_rollup_write_keeps_the_stored_vision(monkeypatch):
+    """A rollup error is rolled back to its savepoint, logged and counted; the vision itself is committed"""
+    import app
+
+    def fail_midway(session, tables, payload, day):
+        session.add(app.ThemeDaily(day=day, theme='partial', count=1))
+        session.flush()
+        raise RuntimeError('deadlock detected')
+
+    monkeypatch.setattr(app.rollups, 'record_analysis', fail_midway)
+    monkeypatch.setattr(app, 'similarity_index', None)
+    failures = app.rollup_write_failures
+    with app.app.app_context():
+        app.db.drop_all()
+        app.db.create_all()
+        try:
+            vision_id = app.store_vision({'description': 'A lion roared'}, {'themes': ['warfare']})
+            assert vision_id is not None
+            app.db.session.remove()
+            assert app.db.session.get(app.Vision, vision_id).description == 'A lion roared'
+            assert app.db.session.query(app.ThemeDaily).count() == 0
+            assert app.rollup_write_failures == failures + 1
+        finally:
+            app.db.session.remove()
+            app.db.drop_all()
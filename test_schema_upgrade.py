@@ -0,0 +1,44 @@
+from sqlalchemy import Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app import app, db, pending_schema_upgrades, upgrade_schema
+
+def test_upgrade_adds_missing_columns_and_keeps_rows():
+    """A vision table from an older release gains duplicate_of; rows survive and a second run is a no-op"""
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as connection:
+            connection.execute(db.text(
+                'CREATE TABLE vision (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, '
+                'description TEXT NOT NULL, context TEXT, date_submitted DATETIME, interpretation TEXT)'
+            ))
+            connection.execute(db.text("INSERT INTO vision (id, title, description) VALUES (1, 'Lion', 'A lion roared')"))
+        assert upgrade_schema() == ['vision.duplicate_of']
+        assert upgrade_schema() == []
+        with db.engine.connect() as connection:
+            assert connection.execute(db.text('SELECT title, duplicate_of FROM vision')).all() == [('Lion', None)]
+        db.drop_all()
+
+class FakeInspector:
+    """Reports a PostgreSQL vision table as a release before JSONB analyses would have created it"""
+
+    def __init__(self, interpretation_type, indexes=()):
+        self.interpretation_type = interpretation_type
+        self.indexes = indexes
+
+    def get_columns(self, table):
+        return [{'name': 'id', 'type': Integer()}, {'name': 'duplicate_of', 'type': Integer()},
+                {'name': 'interpretation', 'type': self.interpretation_type}]
+
+    def get_indexes(self, table):
+        return [{'name': name} for name in self.indexes]
+
+def test_postgresql_upgrade_converts_analyses_to_indexed_jsonb():
+    """A TEXT interpretation column is cast to JSONB and then gets its GIN index; nothing runs once both exist"""
+    pending = pending_schema_upgrades(FakeInspector(Text()), 'postgresql')
+    assert [name for name, _ in pending] == ['vision.interpretation JSONB', 'ix_vision_interpretation']
+    assert 'TYPE JSONB USING' in pending[0][1]
+    assert 'USING gin (interpretation jsonb_path_ops)' in pending[1][1]
+    assert [name for name, _ in pending_schema_upgrades(FakeInspector(JSONB()), 'postgresql')] == ['ix_vision_interpretation']
+    assert pending_schema_upgrades(FakeInspector(JSONB(), ['ix_vision_interpretation']), 'postgresql') == []
+    assert pending_schema_upgrades(FakeInspector(Text()), 'sqlite') == []
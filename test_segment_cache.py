@@ -0,0 +1,53 @@
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleTokenizer
+from vision_analyzer import VisionAnalyzer
+
+class StubPipeline:
+    """Tags text with the rule tokenizer and records every text it was asked to parse"""
+
+    def __init__(self):
+        self.tokenizer = RuleTokenizer()
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        return self.tokenizer(text)
+
+def _analyzer(cache_size):
+    nlp = StubPipeline()
+    return VisionAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=cache_size, nlp=nlp, fuzzy_matching=False), nlp
+
+def test_repeated_segments_skip_the_pipeline():
+    """Only unseen segments are parsed; normalized repeats count as hits"""
+    analyzer, nlp = _analyzer(8)
+    analyzer.analyze_vision("A lion roared. The river flowed")
+    analyzer.analyze_vision("a  LION roared. A dove landed")
+    assert nlp.texts == ['a lion roared', 'the river flowed', 'a dove landed']
+    assert (analyzer.segment_cache_hits, analyzer.segment_cache_misses) == (1, 3)
+
+def test_least_recently_used_segment_is_evicted():
+    """A full cache drops the segment used longest ago, keeping recently hit ones"""
+    analyzer, nlp = _analyzer(2)
+    analyzer.analyze_vision("A lion roared. The river flowed")
+    analyzer.analyze_vision("A lion roared")
+    analyzer.analyze_vision("A dove landed")
+    assert len(analyzer._segment_cache) == 2
+    nlp.texts.clear()
+    analyzer.analyze_vision("A lion roared. The river flowed")
+    assert nlp.texts == ['the river flowed']
+    assert analyzer.segment_cache_misses == 4
+
+def test_cached_segments_are_not_mutated():
+    """Merging and editing a response leave the shared cached segment untouched"""
+    analyzer, _ = _analyzer(8)
+    vision = "A lion protected me on the mountain. A lion protected me on the mountain"
+    first = analyzer.analyze_vision(vision)
+    (cached,) = analyzer._segment_cache.values()
+    snapshot = (dict(cached.entities), dict(cached.actions), dict(cached.terms), cached.themes, cached.symbols)
+    first['themes'].append('edited')
+    first['theme_scores'].clear()
+    first['found_symbols'].clear()
+    second = analyzer.analyze_vision(vision)
+    assert (dict(cached.entities), dict(cached.actions), dict(cached.terms), cached.themes, cached.symbols) == snapshot
+    assert 'edited' not in second['themes']
+    assert second['theme_scores'] and second['found_symbols']
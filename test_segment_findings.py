@@ -0,0 +1,118 @@
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer
+from warmup import WARMUP_CORPUS
+
+VISIONS = [
+    "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body",
+    " ".join(WARMUP_CORPUS) + ". " + ". ".join(WARMUP_CORPUS),
+]
+
+# Fast-tier output for VISIONS from the tuple/list-based segment results that
+# SegmentAnalysis and VisionFindings replaced
+BEFORE_SLOTS = [
+    {
+        'themes': ['empowerment',
+                   'protection',
+                   'provision',
+                   'revelation',
+                   'spiritual gifts',
+                   'vision',
+                   'warfare',
+                   'warning'],
+        'theme_scores': [('empowerment', 3.0),
+                         ('spiritual gifts', 3.0),
+                         ('warfare', 2.0),
+                         ('protection', 2.0),
+                         ('provision', 2.0),
+                         ('warning', 2.0),
+                         ('revelation', 2.0),
+                         ('vision', 1.0)],
+        'found_symbols': [],
+        'pattern_insights': ['The cow chasing you may represent a situation or responsibility that seems '
+                             'threatening but can be overcome through faith and perseverance. Your ability to '
+                             'outrun it suggests divine enablement to overcome challenges.',
+                             'The electric power flowing from the screen into your body suggests a divine '
+                             'impartation of spiritual gifts or revelation. This could indicate that God is '
+                             'preparing to use modern means to communicate with you or equip you for ministry.'],
+        'scripture_references': ['Isaiah 41:10', 'Psalm 18:29', 'Acts 1:8', '1 Corinthians 12:7'],
+        'application_points': ['Take courage knowing that God has given you the ability to overcome challenges '
+                               'that seem intimidating.',
+                               'Be open to receiving divine empowerment and new spiritual gifts, even through '
+                               'unexpected channels.',
+                               'Consider how God might want to use you to minister to others through these '
+                               'gifts.',
+                               'Pay attention to how God may be speaking to you through various means, '
+                               'including modern technology.',
+                               'Keep a journal of your visions and revelations to track how God is speaking to '
+                               'you.'],
+        'prayer_points': ['Lord, grant me courage to face challenges, knowing that You are my protector and '
+                          'strength.',
+                          'Holy Spirit, help me to steward well the spiritual gifts and power You are '
+                          'imparting to me.',
+                          'Father, give me wisdom to understand and properly apply the revelations You are '
+                          'showing me.'],
+    },
+    {
+        'themes': ['empowerment', 'revelation', 'spiritual gifts', 'vision', 'warfare'],
+        'theme_scores': [('empowerment', 8.0),
+                         ('spiritual gifts', 8.0),
+                         ('revelation', 4.0),
+                         ('warfare', 3.0),
+                         ('vision', 2.0),
+                         ('provision', 1.0),
+                         ('guidance', 1.0),
+                         ('spiritual_warfare', 1.0),
+                         ('restoration', 1.0)],
+        'found_symbols': ['Lion',
+                          'Mountain',
+                          'Water',
+                          'Dove',
+                          'Sword',
+                          'Door',
+                          'Light',
+                          'Tree',
+                          'Sea',
+                          'Wind',
+                          'Fire',
+                          'Oil',
+                          'Crown'],
+        'pattern_insights': ['The electric power flowing from the screen into your body suggests a divine '
+                             'impartation of spiritual gifts or revelation. This could indicate that God is '
+                             'preparing to use modern means to communicate with you or equip you for ministry.'],
+        'scripture_references': ['Isaiah 41:10', 'Psalm 18:29', 'Acts 1:8', '1 Corinthians 12:7'],
+        'application_points': ['Take courage knowing that God has given you the ability to overcome challenges '
+                               'that seem intimidating.',
+                               'Be open to receiving divine empowerment and new spiritual gifts, even through '
+                               'unexpected channels.',
+                               'Consider how God might want to use you to minister to others through these '
+                               'gifts.',
+                               'Pay attention to how God may be speaking to you through various means, '
+                               'including modern technology.',
+                               'Keep a journal of your visions and revelations to track how God is speaking to '
+                               'you.'],
+        'prayer_points': ['Lord, grant me courage to face challenges, knowing that You are my protector and '
+                          'strength.',
+                          'Holy Spirit, help me to steward well the spiritual gifts and power You are '
+                          'imparting to me.',
+                          'Father, give me wisdom to understand and properly apply the revelations You are '
+                          'showing me.'],
+    },
+]
+
+def _comparable(result):
+    return {
+        # Themes come from a set, so only their membership is stable
+        'themes': sorted(result['themes']),
+        'theme_scores': [(score['theme'], score['score']) for score in result['theme_scores']],
+        'found_symbols': [symbol['symbol'] for symbol in result['found_symbols']],
+        'pattern_insights': result['pattern_insights'],
+        'scripture_references': [reference for reference, _ in result['scripture_references']],
+        'application_points': result['application_points'],
+        'prayer_points': result['prayer_points'],
+    }
+
+def test_slot_based_findings_match_the_previous_output():
+    """Merging SegmentAnalysis objects gives the fast tier the same output as before, fresh and from cache"""
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    for _ in range(2):
+        assert [_comparable(analyzer.analyze_vision(vision)) for vision in VISIONS] == BEFORE_SLOTS
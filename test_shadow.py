@@ -0,0 +1,100 @@
+import json
+import threading
+
+import pytest
+
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer
+from shadow import SampleAbandoned, ShadowAnalyzer, ShadowEvaluator, compare, load_ruleset
+from vision_analyzer import VisionAnalyzer
+
+LIVE = {
+    'themes': ['warfare', 'guidance'],
+    'found_symbols': [{'symbol': 'Lion'}],
+    'theme_scores': [{'theme': 'warfare'}],
+    'scripture_references': [['Revelation 5:5', 'Lion of Judah']]
+}
+
+def test_compare_reports_theme_and_symbol_changes():
+    """Added and removed themes and symbols are listed, with theme overlap"""
+    candidate = dict(LIVE, themes=['warfare', 'peace'], found_symbols=[{'symbol': 'Lion'}, {'symbol': 'Dove'}])
+    diff = compare(LIVE, candidate)
+    assert diff['themes_added'] == ['peace']
+    assert diff['themes_removed'] == ['guidance']
+    assert diff['symbols_added'] == ['Dove']
+    assert diff['theme_jaccard'] == round(1 / 3, 3)
+    assert not diff['top_theme_changed'] and not diff['scriptures_changed']
+
+def test_evaluator_compares_in_background():
+    """Sampled submissions are analyzed by the candidate off the request path"""
+    done = threading.Event()
+
+    class Candidate:
+        def analyze_vision(self, description, context):
+            done.set()
+            return dict(LIVE, themes=['warfare'])
+
+    evaluator = ShadowEvaluator(Candidate, sample_rate=1.0)
+    evaluator.maybe_submit('A lion roared', '', LIVE, 0.01)
+    assert done.wait(5)
+    evaluator._queue.join()
+    summary = evaluator.summary()
+    assert summary['compared'] == 1
+    assert summary['theme_changes'] == {'-guidance': 1}
+    assert summary['recent_differences'][0]['description']['length'] == len('A lion roared')
+
+def test_evaluator_disabled_and_busy():
+    """Nothing is queued at rate zero, and samples are dropped while the worker is busy"""
+    ShadowEvaluator(None, sample_rate=0.0).maybe_submit('x', '', LIVE, 0.0)
+    evaluator = ShadowEvaluator(None, sample_rate=1.0, busy=lambda: True)
+    evaluator.maybe_submit('x', '', LIVE, 0.0)
+    evaluator._queue.join()
+    assert evaluator.summary()['dropped'] == 1
+    assert evaluator.summary()['compared'] == 0
+
+def test_load_ruleset_rejects_misread_rulesets(tmp_path):
+    """Too few or too many weights, non-list keywords and non-numeric scores fail loudly instead of dropping tables"""
+    path = tmp_path / 'ruleset.json'
+    for ruleset, message in (
+        ({'weights': [1.0, 0.5]}, "3 numbers"),
+        ({'weights': [1.0, 0.5, 0.25, 0.1]}, "3 numbers"),
+        ({'weights': [1.0, '0.5', 0.25]}, "3 numbers"),
+        ({'theme_rules': {'warfare': 'fight'}}, "list of keywords"),
+        ({'min_score': 'high'}, "min_score"),
+        ([1.0, 0.5, 0.25], "JSON object"),
+    ):
+        path.write_text(json.dumps(ruleset))
+        with pytest.raises(ValueError, match=message):
+            load_ruleset(str(path))
+    path.write_text(json.dumps({'weights': [1, 0.5, 0.25], 'theme_rules': {'warfare': ['fight']}, 'min_score': 2}))
+    assert load_ruleset(str(path))['min_score'] == 2
+
+def test_shadow_analyzer_weights_every_table():
+    """A valid ruleset gives each of the three keyword tables its weight; a short one is refused"""
+    live = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    candidate = ShadowAnalyzer(live, {'weights': [2.0, 1.0, 0.0]})
+    assert [weight for _, weight in candidate.theme_keyword_tables] == [2.0, 1.0, 0.0]
+    with pytest.raises(ValueError, match="commentary"):
+        ShadowAnalyzer(live, {'weights': [2.0, 1.0]})
+
+def test_shadow_analyzer_gives_way_between_segments():
+    """busy() is checked with the live lock free before each segment, and the sample is abandoned once it is true"""
+    import spacy
+    live = VisionAnalyzer(BIBLICAL_SYMBOLS, nlp=spacy.blank('en'), fuzzy_matching=False)
+    checks = []
+
+    def busy():
+        checks.append(live._nlp_lock.locked())
+        return len(checks) > 2
+
+    candidate = ShadowAnalyzer(live, {}, busy=busy)
+    with pytest.raises(SampleAbandoned, match="2 of 3 segments"):
+        candidate.analyze_vision('A lion roared. Then a dove flew over the water.\n\nThe sea rose up high.')
+    assert checks == [False, False, False]
+
+    evaluator = ShadowEvaluator(lambda: candidate, sample_rate=1.0)
+    checks.clear()
+    evaluator.maybe_submit('A lion roared. Then a dove flew over the water.\n\nThe sea rose up high.', '', LIVE, 0.0)
+    evaluator._queue.join()
+    assert evaluator.summary()['dropped'] == 1
+    assert evaluator.summary()['compared'] == 0 and evaluator.summary()['error'] is None
@@ -0,0 +1,110 @@
+import numpy as np
+
+from similarity_index import SimilarityIndex
+
+VISIONS = {
+    1: "A lion roared on the mountain and the ground shook",
+    2: "A dove rested on my shoulder by a river of living water",
+    3: "A lion stood on a mountain and roared loudly",
+    4: "Fire fell from heaven on an altar and oil was poured on my head",
+}
+
+def test_query_ranks_the_closest_visions_first():
+    """Text and id queries return (vision_id, cosine) pairs, best first, excluding the queried vision"""
+    index = SimilarityIndex()
+    index.add_many(VISIONS.items())
+    assert [vision_id for vision_id, _ in index.query("a lion roaring on a mountain", k=2)] in ([1, 3], [3, 1])
+    matches = index.query_id(1, k=3)
+    assert matches[0][0] == 3 and 1 not in [vision_id for vision_id, _ in matches]
+    assert index.query("zzz qqq") == []
+
+def test_save_and_load_round_trip(tmp_path):
+    """A reloaded index answers queries the same way and keeps its catch-up watermark"""
+    path = str(tmp_path / 'index.npz')
+    index = SimilarityIndex(lsh_bits=16, exact_limit=0)
+    index.catch_up(VISIONS.items())
+    index.save(path)
+    assert index.dirty == 0
+    loaded = SimilarityIndex.load(path)
+    assert loaded.last_id == 4 and len(loaded) == 4
+    assert loaded.query_id(1, k=2) == index.query_id(1, k=2)
+
+def test_catch_up_does_not_skip_ids_stored_by_other_workers():
+    """A worker's own newer vision does not move the watermark past an id another worker stored earlier"""
+    stored = {1: VISIONS[1], 2: VISIONS[2]}
+    index = SimilarityIndex()
+    index.catch_up(sorted(stored.items()))
+    # This worker stores id 4 while another worker's id 3 is not yet visible
+    stored[4] = VISIONS[4]
+    index.add(4, VISIONS[4])
+    stored[3] = VISIONS[3]
+    assert index.last_id == 2
+    index.catch_up(sorted((vision_id, text) for vision_id, text in stored.items() if vision_id > index.last_id))
+    assert sorted(index.ids) == [1, 2, 3, 4]
+    assert index.last_id == 4
+    assert 3 in index and index.query_id(3, k=1)[0][0] == 1
+
+def test_adds_and_queries_do_not_touch_every_row(monkeypatch):
+    """Norms are refreshed for all rows only as the index grows geometrically, never by a query"""
+    renormalized = []
+    original = SimilarityIndex._renormalize
+    monkeypatch.setattr(SimilarityIndex, '_renormalize', lambda self: renormalized.append(len(self)) or original(self))
+    index = SimilarityIndex(lsh_bits=16, exact_limit=0)
+    texts = list(VISIONS.values())
+    for vision_id in range(1, 2001):
+        index.add(vision_id, f"{texts[vision_id % 4]} number{vision_id}")
+        if vision_id % 100 == 0:
+            index.query(VISIONS[1], k=3)
+    assert len(renormalized) < 40
+    assert all(later >= earlier * 1.25 for earlier, later in zip(renormalized, renormalized[1:]))
+    # The matrix is a view over the row buffers, not a copy
+    assert np.shares_memory(index.matrix.data, index._data)
+
+def test_scores_stay_close_to_exact_cosine():
+    """Norms stored at add time keep scores within a few percent of a freshly normalized index"""
+    index = SimilarityIndex()
+    texts = list(VISIONS.values())
+    for vision_id in range(1, 301):
+        index.add(vision_id, f"{texts[vision_id % 4]} word{vision_id % 17}")
+    approximate = dict(index.query(VISIONS[3], k=300))
+    index._renormalize()
+    exact = dict(index.query(VISIONS[3], k=300))
+    assert set(approximate) == set(exact)
+    assert max(abs(approximate[vision_id] - exact[vision_id]) for vision_id in exact) < 0.05
+
+def test_app_catches_up_in_the_background(tmp_path, monkeypatch):
+    """Requests get the loaded index at once; reading other workers' visions and saving run on another thread"""
+    import threading
+    from datetime import datetime
+
+    import app
+
+    monkeypatch.setitem(app.app.config, 'SIMILARITY_INDEX_PATH', str(tmp_path / 'index.npz'))
+    monkeypatch.setitem(app.app.config, 'SIMILARITY_SAVE_EVERY', 1)
+    monkeypatch.setattr(app, 'similarity_index', None)
+    monkeypatch.setattr(app, '_similarity_caught_up', None)
+    catch_up_threads = []
+    original = SimilarityIndex.catch_up
+    monkeypatch.setattr(SimilarityIndex, 'catch_up', lambda self, rows: (
+        catch_up_threads.append(threading.current_thread().name), original(self, rows)
+    ))
+    with app.app.app_context():
+        app.db.drop_all()
+        app.db.create_all()
+        for vision_id, text in VISIONS.items():
+            app.db.session.add(app.Vision(id=vision_id, title='Vision', description=text, date_submitted=datetime.utcnow()))
+        app.db.session.commit()
+    try:
+        index = app.get_similarity_index()
+        for thread in threading.enumerate():
+            if thread.name == 'similarity-catch-up':
+                thread.join(5)
+        assert catch_up_threads == ['similarity-catch-up']
+        assert sorted(index.ids) == [1, 2, 3, 4]
+        assert SimilarityIndex.load(str(tmp_path / 'index.npz')).last_id == 4
+        # Not due again yet
+        app.get_similarity_index()
+        assert catch_up_threads == ['similarity-catch-up']
+    finally:
+        with app.app.app_context():
+            app.db.drop_all()
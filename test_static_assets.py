@@ -0,0 +1,36 @@
+import gzip
+
+from flask import Flask, render_template_string
+
+import static_assets
+
+def make_app(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'site.css').write_text('body { color: #333; }\n' * 20)
+    app = Flask(__name__, static_folder=str(tmp_path))
+    manifest = static_assets.init_app(app)
+    return app, manifest
+
+def test_fingerprinted_url_changes_with_content(tmp_path):
+    """Asset URLs carry a content hash and are exposed to templates"""
+    app, manifest = make_app(tmp_path)
+    url = manifest.url('css/site.css')
+    assert url.startswith('/assets/css/site.') and url.endswith('.css')
+    with app.test_request_context():
+        assert render_template_string("{{ asset_url('css/site.css') }}") == url
+    (tmp_path / 'css' / 'site.css').write_text('body { color: #000; }\n')
+    assert static_assets.AssetManifest(str(tmp_path)).url('css/site.css') != url
+
+def test_serves_precompressed_with_immutable_caching(tmp_path):
+    """Clients that accept gzip get the precompressed body; unknown names are 404"""
+    app, manifest = make_app(tmp_path)
+    client = app.test_client()
+    url = manifest.url('css/site.css')
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == static_assets.IMMUTABLE_CACHE_CONTROL
+    assert gzip.decompress(response.data) == (tmp_path / 'css' / 'site.css').read_bytes()
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert client.get(url, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+    assert client.get('/assets/css/site.css').status_code == 404
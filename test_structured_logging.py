@@ -0,0 +1,60 @@
+import io
+import json
+import logging
+
+from structured_logging import JsonFormatter, RequestContextFilter, redact, setup_logging
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord('app', level, __file__, 1, "message %s", ('text',), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_redact_hides_text_by_default():
+    summary = redact("I saw a lion, write to me at someone@example.com")
+    assert summary['length'] == 48
+    assert 'preview' not in summary
+    assert 'lion' not in json.dumps(summary)
+
+
+def test_redact_preview_is_truncated_and_masked():
+    summary = redact("mail someone@example.com about the lion", max_chars=24)
+    assert summary['preview'] == "mail [email]..."
+
+
+def test_sampling_drops_success_logs_but_keeps_errors():
+    sampler = RequestContextFilter(sample_rate=0.0)
+    assert not sampler.filter(make_record(sampled=True))
+    assert sampler.filter(make_record(level=logging.ERROR, sampled=True))
+    assert sampler.filter(make_record())
+
+
+def test_json_formatter_merges_fields():
+    entry = json.loads(JsonFormatter().format(make_record(request_id='abc', fields={'status': 200})))
+    assert entry['message'] == "message text"
+    assert entry['request_id'] == 'abc'
+    assert entry['status'] == 200
+
+
+def test_exceptions_reach_the_formatter_as_a_field():
+    """Logged exceptions keep exc_info across the queue and are formatted by the listener"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    output = io.StringIO()
+    listener = setup_logging(stream=output)
+    try:
+        try:
+            raise ValueError("bad vision")
+        except ValueError:
+            logging.getLogger('app').exception("boom %s", 'here')
+    finally:
+        listener.stop()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+    entry = json.loads(output.getvalue().splitlines()[-1])
+    assert entry['message'] == "boom here"
+    assert entry['exception'].startswith("Traceback") and "ValueError: bad vision" in entry['exception']
@@ -0,0 +1,20 @@
+from biblical_symbols import BIBLICAL_SYMBOLS
+from symbol_graph import Reference, SymbolGraph, parse_references
+
+def test_parse_references_continues_book():
+    """Bare chapter:verse entries belong to the preceding book"""
+    assert parse_references("Revelation 3:5, 7:9, 1 Peter 2:4-8, Psalm 23") == [
+        Reference('Revelation', '3', '5'), Reference('Revelation', '7', '9'),
+        Reference('1 Peter', '2', '4-8'), Reference('Psalm', '23', None)
+    ]
+
+def test_related_by_shared_reference_and_co_occurrence():
+    """Shared verses rank first; co-occurrence in analyses adds to the weight"""
+    graph = SymbolGraph(BIBLICAL_SYMBOLS)
+    assert graph.related('Wine', 1)[0].symbol == 'Cup'
+    assert graph.explain('Wine', 'Cup')['shared_references'] == ['Revelation 14:10']
+    assert 'Sword' not in [neighbor.symbol for neighbor in graph.related('lion', 3)]
+    graph = SymbolGraph(BIBLICAL_SYMBOLS, {('Lion', 'Sword'): 4, ('Lion', 'Unknown'): 9}, max_neighbors=4)
+    assert graph.related('lion', 10)[0].symbol == 'Sword'
+    assert len(graph.related('lion', 10)) == 4
+    assert graph.related('Unknown') == []
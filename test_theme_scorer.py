@@ -0,0 +1,40 @@
+from theme_scorer import ThemeScorer
+
+RULES = {
+    'warfare': ['chase', 'fight'],
+    'provision': ['cow', 'food']
+}
+KEYWORDS = {
+    'revelation': ['see', 'vision'],
+    'warfare': ['enemy']
+}
+
+def make_scorer():
+    return ThemeScorer([(RULES, 1.0), (KEYWORDS, 0.5)])
+
+def test_rule_keyword_identifies_theme():
+    """A full-weight keyword is enough to report its theme"""
+    scorer = make_scorer()
+    assert scorer.identify(scorer.tokenize("The cow chased me")) == {'provision', 'warfare'}
+
+def test_weak_keywords_need_corroboration():
+    """Half-weight keywords only reach the threshold together"""
+    scorer = make_scorer()
+    assert scorer.identify(scorer.tokenize("I see")) == set()
+    assert scorer.identify(scorer.tokenize("I see a vision")) == {'revelation'}
+
+def test_rank_orders_by_score_with_confidences():
+    """Ranked scores are sorted and confidences sum to one"""
+    scorer = make_scorer()
+    ranked = scorer.rank({'fight': 2, 'enemy': 1, 'food': 1})
+    assert [entry['theme'] for entry in ranked] == ['warfare', 'provision']
+    assert ranked[0]['score'] == 2.5
+    assert abs(sum(entry['confidence'] for entry in ranked) - 1.0) < 0.01
+
+def test_batch_matches_single_scoring():
+    """Batch scoring gives the same rankings as scoring one vision at a time"""
+    scorer = make_scorer()
+    texts = ["The cow chased me", "I see a vision of an enemy", "Nothing to note"]
+    batch = scorer.rank_batch([scorer.tokenize(text) for text in texts])
+    assert batch == [scorer.rank(scorer.tokenize(text)) for text in texts]
+    assert batch[2] == []
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer
+from similarity_index import SimilarityIndex
+
+VISIONS = [
+    "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body",
+    "A lion stood on a mountain and roared. The sound shook the ground and I was afraid",
+    "I was walking by a river of living water. A dove came down and rested on my shoulder and I felt peace",
+    "Fire fell from heaven on an altar. Oil was poured on my head and I felt power in my hands",
+]
+
+def test_concurrent_analyses_match_serial_results():
+    """Threads sharing one analyzer get the same results as running one at a time, and every segment lookup is counted"""
+    expected = [RuleAnalyzer(BIBLICAL_SYMBOLS).analyze_vision(vision) for vision in VISIONS]
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS, segment_cache_size=4)
+    workload = VISIONS * 25
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(analyzer.analyze_vision, workload))
+    assert results == expected * 25
+    segments = sum(len(analyzer._split_segments(vision)) for vision in workload)
+    assert analyzer.segment_cache_hits + analyzer.segment_cache_misses == segments
+    assert len(analyzer._segment_cache) <= 4
+
+def test_similarity_index_concurrent_adds_and_queries():
+    """Adds racing with queries leave every vision indexed exactly once"""
+    index = SimilarityIndex()
+
+    def add_and_query(vision_id):
+        index.add(vision_id, VISIONS[vision_id % len(VISIONS)])
+        index.add(vision_id, VISIONS[vision_id % len(VISIONS)])
+        return index.query(VISIONS[0], k=3)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(add_and_query, range(1, 201)))
+    assert sorted(index.ids) == list(range(1, 201))
+    assert index.matrix.shape[0] == 200
+    assert index.query_id(1, k=1)[0][1] > 0.99
@@ -0,0 +1,49 @@
+from biblical_symbols import BIBLICAL_SYMBOLS
+from fast_analyzer import RuleAnalyzer
+from vision_analyzer import MAX_BUDGETED_SEGMENT_CHARS
+
+VISION = "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body"
+
+def test_spent_budget_returns_first_segment_with_coverage():
+    """A spent budget still analyzes the first segment and reports how much was covered"""
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    segments = analyzer._split_segments(VISION)
+    result = analyzer.analyze_vision(VISION, time_budget=0)
+    assert result['partial'] is True
+    fraction = round(len(segments[0]) / sum(len(segment) for segment in segments), 3)
+    assert result['coverage'] == {'segments_processed': 1, 'segments_total': 3, 'fraction': fraction}
+    assert 'partial' not in analyzer.analyze_vision(VISION, time_budget=60)
+    assert 'partial' not in analyzer.analyze_vision(VISION)
+
+def test_long_first_segment_is_bounded_by_the_budget():
+    """A description without sentence breaks is cut into word-aligned chunks, so the first one is capped"""
+    analyzer = RuleAnalyzer(BIBLICAL_SYMBOLS)
+    description = ' '.join(['a lion roared on the mountain'] * 150)
+    chunks = analyzer._bounded_segments([description])
+    assert all(len(chunk) <= MAX_BUDGETED_SEGMENT_CHARS for chunk in chunks)
+    assert ' '.join(chunks) == description
+    result = analyzer.analyze_vision(description, time_budget=0)
+    assert result['coverage']['segments_processed'] == 1
+    assert result['coverage']['segments_total'] == len(chunks)
+    assert result['coverage']['fraction'] < 0.25
+    assert 'Lion' in [symbol['symbol'] for symbol in result['found_symbols']]
+
+def test_time_budget_header_can_only_lower_the_configured_budget(monkeypatch):
+    """X-Time-Budget-Ms tightens the server budget, sets one when none is configured, and bad values are ignored"""
+    from app import app, request_time_budget
+
+    def budget(header=None):
+        headers = {'X-Time-Budget-Ms': header} if header is not None else {}
+        with app.test_request_context('/analyze_vision', headers=headers):
+            return request_time_budget()
+
+    monkeypatch.setitem(app.config, 'ANALYSIS_TIME_BUDGET_MS', 0)
+    assert budget() is None
+    assert budget('250') == 0.25
+    assert budget('0') == 0.001
+    assert budget('soon') is None
+    monkeypatch.setitem(app.config, 'ANALYSIS_TIME_BUDGET_MS', 500)
+    assert budget() == 0.5
+    assert budget('250') == 0.25
+    assert budget('5000') == 0.5
+    assert budget('soon') == 0.5
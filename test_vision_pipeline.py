@@ -0,0 +1,42 @@
+import spacy
+
+from biblical_symbols import BIBLICAL_SYMBOLS
+from vision_analyzer import VisionAnalyzer
+from vision_pipeline import COMPONENT_NAME
+
+VISIONS = [
+    "I saw a cow chasing me. I somehow outran the cow. In another vision I saw electric power flow from my TV screen into my body",
+    "A lion stood on a mountain and roared. I was afraid but the tree of life gave me peace",
+    "Fire fell from heaven on an altar. Oil was poured on my head and I felt joy",
+    "",
+]
+
+def _analyzer(with_component=True):
+    analyzer = VisionAnalyzer(BIBLICAL_SYMBOLS, nlp=spacy.blank('en'), fuzzy_matching=False)
+    if not with_component:
+        analyzer.nlp.remove_pipe(COMPONENT_NAME)
+    return analyzer
+
+def _comparable(result):
+    # Themes come from a set, so only their membership is stable
+    return dict(result, themes=sorted(result['themes']))
+
+def test_component_writes_doc_and_span_extensions():
+    """The rule component stores its findings on the Doc and names matched symbol spans, longest phrase first"""
+    doc = _analyzer().nlp("a lion stood under the tree of life")
+    assert doc._.vision_symbols == [(1, 2, 'Lion'), (5, 8, 'Tree')]
+    assert doc[5:8]._.vision_symbol == 'Tree'
+    assert doc[5:6]._.vision_symbol is None
+
+def test_component_matches_in_process_extraction():
+    """Reading the Doc extensions gives the same analysis as extracting outside the pipeline"""
+    piped, direct = _analyzer(), _analyzer(with_component=False)
+    for vision in VISIONS:
+        assert _comparable(piped.analyze_vision(vision)) == _comparable(direct.analyze_vision(vision))
+
+def test_batch_matches_one_at_a_time():
+    """analyze_batch returns what analyze_vision returns for each description, including cache hits"""
+    expected = [_comparable(_analyzer().analyze_vision(vision)) for vision in VISIONS]
+    analyzer = _analyzer()
+    analyzer.analyze_vision(VISIONS[0])
+    assert [_comparable(result) for result in analyzer.analyze_batch(VISIONS + VISIONS)] == expected * 2
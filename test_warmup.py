@@ -0,0 +1,71 @@
+import threading
+
+import warmup
+from warmup import WarmUp
+
+def _failing(times):
+    calls = []
+
+    def step():
+        calls.append(1)
+        if len(calls) <= times:
+            raise RuntimeError('model not loaded')
+    return step, calls
+
+def test_optional_failures_do_not_block_readiness():
+    """Every step runs once; an optional failure is reported but the worker is ready"""
+    ran = []
+    optional, _ = _failing(1)
+    steps = WarmUp([('first', lambda: ran.append('first'), True), ('optional', optional, False)])
+    assert steps.report()['status'] == 'pending'
+    assert steps.run()
+    assert ran == ['first']
+    report = steps.report()
+    assert (report['status'], report['attempts']) == ('ready', 1)
+    assert report['errors'] == {'optional': 'model not loaded'}
+    assert not steps.start_in_background()
+
+def test_failed_required_step_is_retried_with_backoff(monkeypatch):
+    """Only the failed required step is run again, after exponentially growing delays"""
+    delays = []
+    monkeypatch.setattr(warmup.time, 'sleep', delays.append)
+    required, calls = _failing(2)
+    ran = []
+    steps = WarmUp([('cheap', lambda: ran.append(1), False), ('model', required, True)], max_attempts=3, backoff=0.5)
+    assert steps.run()
+    assert (len(calls), len(ran)) == (3, 1)
+    assert delays == [0.5, 1.0]
+    assert steps.report()['errors'] == {}
+    assert steps.report()['attempts'] == 3
+
+def test_required_step_fails_after_max_attempts(monkeypatch):
+    """A step that keeps failing ends the warm-up 'failed' with the last error"""
+    delays = []
+    monkeypatch.setattr(warmup.time, 'sleep', delays.append)
+    required, calls = _failing(10)
+    steps = WarmUp([('model', required, True)], max_attempts=4, backoff=1.0, max_backoff=3.0)
+    assert not steps.run()
+    report = steps.report()
+    assert (report['status'], report['ready'], report['attempts']) == ('failed', False, 4)
+    assert report['errors'] == {'model': 'model not loaded'}
+    assert len(calls) == 4
+    assert delays == [1.0, 2.0, 3.0]
+
+def test_background_warm_up_reports_retrying(monkeypatch):
+    """While waiting to retry, the background warm-up reports 'retrying'"""
+    waiting, resume = threading.Event(), threading.Event()
+
+    def sleep(delay):
+        waiting.set()
+        resume.wait(5)
+    monkeypatch.setattr(warmup.time, 'sleep', sleep)
+    required, _ = _failing(1)
+    steps = WarmUp([('model', required, True)])
+    assert steps.start_in_background()
+    assert waiting.wait(5)
+    assert steps.report()['status'] == 'retrying'
+    resume.set()
+    for thread in threading.enumerate():
+        if thread.name == 'warm-up':
+            thread.join(5)
+    assert steps.ready
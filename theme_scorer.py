@@ -0,0 +1,145 @@
+"""Vectorized theme scoring for the Biblical Vision Analyzer"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from fuzzy_index import FuzzyIndex
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# Suffixes stripped (in order) when a word is not found verbatim in the vocabulary
+SUFFIX_RULES = [('s', ''), ('es', ''), ('ed', ''), ('d', ''), ('ing', ''), ('ing', 'e')]
+
+NORMALIZED_CACHE_SIZE = 50000
+
+Terms = Union[Mapping[str, int], Iterable[str]]
+
+
+class ThemeScorer:
+    """Scores visions against themes with a sparse lemma -> theme weight matrix.
+
+    The matrix is compiled once from weighted keyword tables. A vision is turned
+    into a lemma count vector and multiplied by the matrix, so scoring one vision
+    or thousands of them is a single sparse matrix product.
+
+    With ``fuzzy`` set, ``correct`` maps a word that matches no keyword
+    even after suffix stripping to the keyword it most likely misspells
+    ("protecton"), never correcting ``known_words``.
+    """
+
+    def __init__(self, keyword_tables: Sequence[Tuple[Mapping[str, Sequence[str]], float]], min_score: float = 1.0,
+                 fuzzy: bool = False, known_words: Iterable[str] = ()):
+        self.min_score = min_score
+        self.themes: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self._normalized: Dict[str, int] = {}
+
+        theme_index: Dict[str, int] = {}
+        weights: Dict[Tuple[int, int], float] = {}
+        for table, weight in keyword_tables:
+            for theme, keywords in table.items():
+                if theme not in theme_index:
+                    theme_index[theme] = len(self.themes)
+                    self.themes.append(theme)
+                column = theme_index[theme]
+                for keyword in keywords:
+                    row = self.vocabulary.setdefault(keyword.lower(), len(self.vocabulary))
+                    # A keyword listed by several tables keeps its strongest weight
+                    weights[(row, column)] = max(weights.get((row, column), 0.0), weight)
+
+        rows = np.fromiter((key[0] for key in weights), dtype=np.int32, count=len(weights))
+        cols = np.fromiter((key[1] for key in weights), dtype=np.int32, count=len(weights))
+        data = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+        self.matrix = sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(self.vocabulary), len(self.themes)), dtype=np.float32
+        )
+        self.fuzzy = FuzzyIndex(self.vocabulary.keys(), min_length=5, known_words=known_words) if fuzzy else None
+
+    def tokenize(self, text: str) -> Counter:
+        """Count the lowercase word tokens of a piece of text."""
+        return Counter(TOKEN_PATTERN.findall(text.lower()))
+
+    def term_index(self, term: str) -> int:
+        """Return the vocabulary row for a term, or -1 if no keyword matches it."""
+        index = self.vocabulary.get(term)
+        if index is not None:
+            return index
+        index = self._normalized.get(term)
+        if index is not None:
+            return index
+        index = -1
+        for suffix, replacement in SUFFIX_RULES:
+            if term.endswith(suffix) and len(term) - len(suffix) >= 2:
+                candidate = self.vocabulary.get(term[:-len(suffix)] + replacement)
+                if candidate is not None:
+                    index = candidate
+                    break
+        # Free-form text brings endless new words; keep the memo bounded
+        if len(self._normalized) >= NORMALIZED_CACHE_SIZE:
+            self._normalized.clear()
+        self._normalized[term] = index
+        return index
+
+    def correct(self, term: str):
+        """The keyword a misspelled term most likely stands for, or None if it matches one already."""
+        if self.fuzzy is None or self.term_index(term) >= 0:
+            return None
+        return self.fuzzy.correct(term)
+
+    def vectorize_batch(self, batch: Sequence[Terms]) -> sparse.csr_matrix:
+        """Turn a batch of term counts into a (visions x vocabulary) count matrix."""
+        rows, cols, data = [], [], []
+        for row, terms in enumerate(batch):
+            counts = terms if isinstance(terms, Mapping) else Counter(terms)
+            for term, count in counts.items():
+                index = self.term_index(term.lower())
+                if index >= 0:
+                    rows.append(row)
+                    cols.append(index)
+                    data.append(count)
+        # Duplicate (row, col) entries are summed when the matrix is built
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+            shape=(len(batch), len(self.vocabulary)),
+            dtype=np.float32,
+        )
+
+    def score_batch(self, batch: Sequence[Terms]) -> np.ndarray:
+        """Score many visions at once, returning a dense (visions x themes) array."""
+        if not batch:
+            return np.zeros((0, len(self.themes)), dtype=np.float32)
+        return (self.vectorize_batch(batch) @ self.matrix).toarray()
+
+    def rank_batch(self, batch: Sequence[Terms]) -> List[List[Dict[str, Any]]]:
+        """Return ranked theme scores with confidences for each vision in a batch."""
+        scores = self.score_batch(batch)
+        totals = scores.sum(axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranked = []
+        for row in range(scores.shape[0]):
+            total = float(totals[row])
+            entries = []
+            for column in order[row]:
+                score = float(scores[row, column])
+                if score <= 0:
+                    break
+                entries.append({
+                    'theme': self.themes[column],
+                    'score': round(score, 3),
+                    'confidence': round(score / total, 3)
+                })
+            ranked.append(entries)
+        return ranked
+
+    def rank(self, terms: Terms) -> List[Dict[str, Any]]:
+        """Return ranked theme scores with confidences for a single vision."""
+        return self.rank_batch([terms])[0]
+
+    def identify(self, terms: Terms) -> set:
+        """Return the set of themes whose score reaches ``min_score``."""
+        scores = self.score_batch([terms])[0]
+        return {self.themes[column] for column in np.flatnonzero(scores >= self.min_score)}
@@ -1,47 +1,69 @@
 """Vision Analysis System for Biblical Vision Analyzer"""
 
+import hashlib
 import re
-from collections import defaultdict
+import threading
+import time
+from collections import Counter, OrderedDict
 from typing import List, Dict, Any
-import spiritual_guidance
-from biblical_commentary import CommentaryGenerator
+from biblical_commentary import THEME_KEYWORDS
+from biblical_symbols import SYMBOL_ALIASES
+from emotion_lexicon import load_lexicon
+from theme_scorer import ThemeScorer
+from vision_rules import (
+    SegmentAnalysis, SymbolLookup, VisionFindings, english_words, extract_actions, extract_emotions,
+    extract_entities, fuzzy_matching_available, modern_symbol_index, symbol_fuzzy_index, symbol_phrases,
+    theme_terms
+)
 import logging
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import wordnet
-from nltk.stem import WordNetLemmatizer
-import spacy
-from collections import defaultdict
 import random
 
+# spaCy and the pipeline component (vision_pipeline) are imported on first use,
+# so modules that only need the rule engine or the fast tier start quickly
+
+# Under a time budget, segments longer than this are analyzed in word-aligned
+# chunks so the budget is checked at least this often, even for the first segment
+MAX_BUDGETED_SEGMENT_CHARS = 1000
+
 class VisionAnalyzer:
-    def __init__(self, biblical_symbols):
+    def __init__(self, biblical_symbols, segment_cache_size=4096, nlp=None, symbol_aliases=None,
+                 emotion_lexicon_path='', fuzzy_matching=True, english_words_path='', known_words=None):
         self.biblical_symbols = biblical_symbols
+        self.english_words_path = english_words_path
+        self.emotion_lexicon_path = emotion_lexicon_path
+        self.emotion_lexicon = load_lexicon(emotion_lexicon_path)
+        self.segment_cache_size = segment_cache_size
+        self._segment_cache = OrderedDict()
+        self.segment_cache_hits = 0
+        self.segment_cache_misses = 0
+        # One analyzer serves every request thread of a worker: the segment
+        # cache and the spaCy pipeline, whose Vocab grows as it parses, are
+        # each used under a lock; everything else a call touches is local
+        self._cache_lock = threading.Lock()
+        self._nlp_lock = threading.Lock()
         self.symbol_dict = {symbol['symbol'].lower(): symbol for symbol in biblical_symbols}
-        self.lemmatizer = WordNetLemmatizer()
+        self.symbol_by_name = {symbol['symbol']: symbol for symbol in biblical_symbols}
+        self.symbol_phrases = symbol_phrases(
+            biblical_symbols, SYMBOL_ALIASES if symbol_aliases is None else symbol_aliases
+        )
         
-        # Download required NLTK data
-        try:
-            nltk.download('punkt', quiet=True)
-            nltk.download('wordnet', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-            logging.info("NLTK data downloaded successfully")
-        except Exception as e:
-            logging.error(f"Error downloading NLTK data: {str(e)}")
-            raise
+        # Load spaCy model unless a pipeline was supplied
+        if nlp is not None:
+            self.nlp = nlp
+        else:
+            self.nlp = self._load_spacy_model()
         
-        # Load spaCy model
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-            logging.info("spaCy model loaded successfully")
-        except OSError:
-            try:
-                spacy.cli.download('en_core_web_sm')
-                self.nlp = spacy.load('en_core_web_sm')
-                logging.info("spaCy model downloaded and loaded successfully")
-            except Exception as e:
-                logging.error(f"Error downloading spaCy model: {str(e)}")
-                raise
+        # Typo correction leaves every word of a real English word list alone
+        # and is switched off without one
+        if known_words is None:
+            known_words = english_words(self.nlp, english_words_path) if fuzzy_matching else frozenset()
+        self.known_words = frozenset(known_words)
+        self.fuzzy_matching = fuzzy_matching and fuzzy_matching_available(self.known_words)
+        self.modern_fuzzy = modern_symbol_index(self.known_words) if self.fuzzy_matching else None
+        self.symbol_lookup = SymbolLookup(
+            self.symbol_phrases,
+            fuzzy=symbol_fuzzy_index(self.symbol_phrases, self.known_words) if self.fuzzy_matching else None
+        )
         
         # Theme categories with associated words and scriptures
         self.theme_categories = {
@@ -114,159 +136,321 @@ class VisionAnalyzer:
                 ]
             }
         }
+        
+        # Keywords that identify a theme on their own
+        self.theme_rules = {
+            'warfare': ['chase', 'run', 'escape', 'flee'],
+            'protection': ['chase', 'run', 'escape', 'flee'],
+            'empowerment': ['power', 'electric', 'flow', 'energy'],
+            'spiritual gifts': ['power', 'electric', 'flow', 'energy'],
+            'provision': ['cow'],
+            'warning': ['cow'],
+            'revelation': ['screen'],
+            'vision': ['screen']
+        }
+        
+        # Unified theme scorer: rule keywords count fully, the broader keyword
+        # tables need corroborating words before a theme is reported
+        self.theme_keyword_tables = [
+            (self.theme_rules, 1.0),
+            ({theme: data['keywords'] for theme, data in self.theme_categories.items()}, 0.5),
+            (THEME_KEYWORDS, 0.25)
+        ]
+        self.theme_scorer = ThemeScorer(self.theme_keyword_tables, fuzzy=self.fuzzy_matching,
+                                        known_words=self.known_words)
+        
+        if hasattr(self.nlp, 'add_pipe'):
+            self._add_rule_component(self.nlp)
+
+    def _load_spacy_model(self):
+        import spacy
+        try:
+            nlp = spacy.load('en_core_web_sm')
+            logging.info("spaCy model loaded successfully")
+        except OSError:
+            try:
+                spacy.cli.download('en_core_web_sm')
+                nlp = spacy.load('en_core_web_sm')
+                logging.info("spaCy model downloaded and loaded successfully")
+            except Exception as e:
+                logging.error(f"Error downloading spaCy model: {str(e)}")
+                raise
+        return nlp
+
+    def _add_rule_component(self, nlp):
+        """Run the rule engine inside the spaCy pipeline so nlp.pipe can parallelize it."""
+        # Importing vision_pipeline registers the component factory with spaCy
+        from vision_pipeline import COMPONENT_NAME
+        if COMPONENT_NAME in nlp.pipe_names:
+            return
+        nlp.add_pipe(COMPONENT_NAME, last=True, config={
+            'phrases': self.symbol_phrases,
+            'keyword_tables': [[table, weight] for table, weight in self.theme_keyword_tables],
+            'emotion_lexicon_path': self.emotion_lexicon_path,
+            'fuzzy_matching': self.fuzzy_matching,
+            'english_words_path': self.english_words_path
+        })
+
+    def reload_model(self):
+        """Load a fresh spaCy pipeline and swap it in.
+
+        Every word ever analyzed stays interned in the pipeline's Vocab and
+        StringStore; a fresh pipeline starts from the model's own vocabulary.
+        Requests already running keep using the pipeline they started with.
+        """
+        nlp = self._load_spacy_model()
+        self._add_rule_component(nlp)
+        self.nlp = nlp
+        return nlp
+
+    def _empty_description_response(self):
+        return {
+            'pattern_insights': ['Please provide a description of your vision.'],
+            'themes': ['guidance'],
+            'scripture_references': [
+                ('James 1:5', 'If any of you lacks wisdom, you should ask God, who gives generously to all without finding fault.')
+            ],
+            'application_points': ['Take time to write down your vision in detail.'],
+            'prayer_points': ['Ask for clarity and understanding in remembering and describing your vision.']
+        }
+
+    def _split_segments(self, description):
+        # Split into separate visions if multiple are present
+        vision_segments = re.split(r'(?i)(?:in another vision|\.(?:\s+|\s*$))', description.strip())
+        return [seg.strip() for seg in vision_segments if seg.strip()]
+
+    def _bounded_segments(self, segments, max_chars=MAX_BUDGETED_SEGMENT_CHARS):
+        """Split segments longer than ``max_chars`` at the last space before the limit."""
+        bounded = []
+        for segment in segments:
+            while len(segment) > max_chars:
+                cut = segment.rfind(' ', 0, max_chars + 1)
+                if cut <= 0:
+                    cut = max_chars
+                bounded.append(segment[:cut].strip())
+                segment = segment[cut:].strip()
+            if segment:
+                bounded.append(segment)
+        return bounded
 
-    def analyze_vision(self, description, context=""):
-        """Analyze a vision description and return structured insights."""
+    def analyze_vision(self, description, context="", time_budget=None):
+        """Analyze a vision description and return structured insights.
+
+        With ``time_budget`` (seconds), long segments are analyzed in bounded
+        chunks and no new chunk is started once the budget is spent; the result
+        is then flagged ``partial`` with its ``coverage``.
+        """
         try:
             # Input validation
             if not description or not description.strip():
-                return {
-                    'pattern_insights': ['Please provide a description of your vision.'],
-                    'themes': ['guidance'],
-                    'scripture_references': [
-                        ('James 1:5', 'If any of you lacks wisdom, you should ask God, who gives generously to all without finding fault.')
-                    ],
-                    'application_points': ['Take time to write down your vision in detail.'],
-                    'prayer_points': ['Ask for clarity and understanding in remembering and describing your vision.']
-                }
+                return self._empty_description_response()
 
             # Process the vision text
-            description = description.strip()
-            
-            # Split into separate visions if multiple are present
-            vision_segments = re.split(r'(?i)(?:in another vision|\.(?:\s+|\s*$))', description)
-            vision_segments = [seg.strip() for seg in vision_segments if seg.strip()]
+            vision_segments = self._split_segments(description)
+            if time_budget is not None:
+                vision_segments = self._bounded_segments(vision_segments)
             
-            # Initialize combined results
-            all_entities = defaultdict(list)
-            all_actions = []
-            all_emotions = defaultdict(int)
-            all_themes = set()
+            deadline = time.monotonic() + time_budget if time_budget is not None else None
+            segment_results = []
             
             # Process each vision segment
             for segment in vision_segments:
+                # Always analyze the first (bounded) segment so a partial result has content
+                if deadline is not None and segment_results and time.monotonic() >= deadline:
+                    break
                 try:
-                    # Process with spaCy
-                    doc = self.nlp(segment.lower())
-                    
-                    # Extract elements from each segment
-                    segment_entities = self._extract_entities(doc)
-                    segment_actions = self._extract_actions(doc)
-                    segment_emotions = self._extract_emotions(doc)
-                    
-                    # Combine results
-                    for key, value in segment_entities.items():
-                        all_entities[key].extend(value)
-                    all_actions.extend(segment_actions)
-                    for emotion, count in segment_emotions.items():
-                        all_emotions[emotion] += count
-                    
-                    # Identify themes for this segment
-                    segment_themes = self._identify_themes(segment, segment_entities, segment_actions, segment_emotions)
-                    all_themes.update(segment_themes)
-                    
+                    segment_results.append(self._analyze_segment(segment))
                 except Exception as e:
-                    logging.error(f"Error processing vision segment '{segment}': {str(e)}")
-                    continue
+                    # Log the segment's position, not its text: descriptions are user content
+                    logging.error(f"Error processing vision segment {len(segment_results) + 1} ({len(segment)} chars): {str(e)}")
+                    segment_results.append(None)
             
-            # Generate insights based on combined results
-            pattern_insights = self._generate_dynamic_insights(all_entities, all_actions, all_emotions, all_themes)
-            scripture_references = self._get_relevant_scriptures(all_themes, all_entities, all_emotions)
-            application_points = self._generate_application_points(all_themes, all_entities, all_actions, all_emotions)
-            prayer_points = self._generate_prayer_points(all_themes, all_entities, all_emotions)
-            
-            # Ensure we have at least some content in each category
-            if not pattern_insights:
-                pattern_insights = ['This vision appears to have spiritual significance. Continue in prayer for further understanding.']
-            if not all_themes:
-                all_themes = {'guidance'}
-            if not scripture_references:
-                scripture_references = [('Proverbs 3:5-6', 'Trust in the LORD with all your heart and lean not on your own understanding.')]
-            if not application_points:
-                application_points = ['Seek wisdom through prayer and meditation on Scripture.']
-            if not prayer_points:
-                prayer_points = ['Lord, grant me wisdom and understanding regarding this vision.']
-            
-            return {
-                'pattern_insights': pattern_insights,
-                'themes': list(all_themes),
-                'scripture_references': scripture_references,
-                'application_points': application_points,
-                'prayer_points': prayer_points
-            }
+            return self._combine_segments(vision_segments, segment_results)
             
         except Exception as e:
             logging.error(f"Error in analyze_vision: {str(e)}")
             raise Exception(f"Vision analysis error: {str(e)}")
 
-    def _extract_entities(self, doc):
-        entities = defaultdict(list)
-        modern_symbols = {
-            'tv': 'screen',
-            'television': 'screen',
-            'monitor': 'screen',
-            'computer': 'screen',
-            'electricity': 'power',
-            'electric': 'power',
-            'power': 'power'
-        }
-        
-        for token in doc:
-            if token.pos_ in ['NOUN', 'PROPN']:
-                # Check for modern symbols and map them
-                word = token.text.lower()
-                if word in modern_symbols:
-                    entities[modern_symbols[word]].append(token.text)
-                else:
-                    entities[token.text].append(token.text)
-        return entities
+    def analyze_batch(self, descriptions, n_process=1, batch_size=64):
+        """Analyze many visions, running their segments through ``nlp.pipe``.
 
-    def _extract_actions(self, doc):
-        actions = []
-        for token in doc:
-            if token.pos_ == 'VERB':
-                actions.append({
-                    'verb': token.text,
-                    'lemma': token.lemma_,
-                })
-        return actions
+        With the rule component in the pipeline every extraction step runs in
+        the pipe workers, so ``n_process`` spreads the whole analysis over cores.
+        """
+        segmented = [self._split_segments(description) if description and description.strip() else []
+                     for description in descriptions]
+        
+        # Send each distinct, uncached segment through the pipeline once
+        computed = {}
+        pending = {}
+        with self._cache_lock:
+            for segments in segmented:
+                for segment in segments:
+                    key = self._segment_key(segment)
+                    if key not in self._segment_cache and key not in pending:
+                        pending[key] = segment
+        texts = [segment.lower() for segment in pending.values()]
+        nlp = self.nlp
+        with self._nlp_lock:
+            docs = list(nlp.pipe(texts, n_process=n_process, batch_size=batch_size))
+        for (key, segment), doc in zip(pending.items(), docs):
+            computed[key] = self._segment_from_doc(doc, segment)
+            self._cache_segment(key, computed[key])
+        
+        results = []
+        for segments in segmented:
+            if not segments:
+                results.append(self._empty_description_response())
+                continue
+            segment_results = []
+            for segment in segments:
+                key = self._segment_key(segment)
+                segment_results.append(computed.get(key) or self._analyze_segment(segment))
+            results.append(self._combine_segments(segments, segment_results))
+        return results
 
-    def _extract_emotions(self, doc):
-        emotion_keywords = {
-            'joy': ['happy', 'joy', 'delight', 'peace', 'glad'],
-            'fear': ['afraid', 'fear', 'terror', 'dread', 'anxiety'],
-            'urgency': ['urgent', 'immediate', 'quick', 'soon', 'hurry'],
-            'peace': ['calm', 'peace', 'quiet', 'rest', 'still']
+    def _combine_segments(self, vision_segments, segment_results):
+        """Merge per-segment results (None for failed segments) into the analysis response."""
+        findings = VisionFindings()
+        for segment_result in segment_results:
+            if segment_result is not None:
+                findings.add(segment_result)
+        all_entities = findings.entities
+        all_actions = findings.actions
+        all_emotions = findings.emotions
+        all_themes = findings.themes
+        all_terms = findings.terms
+        all_symbols = findings.symbols
+        
+        # Generate insights based on combined results
+        pattern_insights = self._generate_dynamic_insights(all_entities, all_actions, all_emotions, all_themes)
+        scripture_references = self._get_relevant_scriptures(all_themes, all_entities, all_emotions)
+        application_points = self._generate_application_points(all_themes, all_entities, all_actions, all_emotions)
+        prayer_points = self._generate_prayer_points(all_themes, all_entities, all_emotions)
+        
+        # Ensure we have at least some content in each category
+        if not pattern_insights:
+            pattern_insights = ['This vision appears to have spiritual significance. Continue in prayer for further understanding.']
+        if not all_themes:
+            all_themes = {'guidance'}
+        if not scripture_references:
+            scripture_references = [('Proverbs 3:5-6', 'Trust in the LORD with all your heart and lean not on your own understanding.')]
+        if not application_points:
+            application_points = ['Seek wisdom through prayer and meditation on Scripture.']
+        if not prayer_points:
+            prayer_points = ['Lord, grant me wisdom and understanding regarding this vision.']
+        
+        result = {
+            'pattern_insights': pattern_insights,
+            'themes': list(all_themes),
+            'theme_scores': self.theme_scorer.rank(all_terms),
+            'emotion_scores': {emotion: round(intensity, 3) for emotion, intensity in all_emotions.most_common()},
+            'found_symbols': [self.symbol_by_name[name] for name in all_symbols],
+            'scripture_references': scripture_references,
+            'application_points': application_points,
+            'prayer_points': prayer_points
         }
         
-        found_emotions = defaultdict(int)
-        for token in doc:
-            for emotion, keywords in emotion_keywords.items():
-                if token.lemma_ in keywords:
-                    found_emotions[emotion] += 1
-        return dict(found_emotions)
+        if len(segment_results) < len(vision_segments):
+            chars_processed = sum(len(segment) for segment in vision_segments[:len(segment_results)])
+            total_chars = sum(len(segment) for segment in vision_segments)
+            result['partial'] = True
+            result['coverage'] = {
+                'segments_processed': len(segment_results),
+                'segments_total': len(vision_segments),
+                'fraction': round(chars_processed / total_chars, 3)
+            }
+        return result
 
-    def _identify_themes(self, description, entities, actions, emotions):
-        themes = set()
-        
-        # Theme detection
-        if any(word in description.lower() for word in ['chase', 'run', 'escape', 'flee']):
-            themes.add('warfare')
-            themes.add('protection')
+    def _segment_key(self, segment):
+        normalized = ' '.join(segment.lower().split())
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+    def _cache_segment(self, key, result):
+        if self.segment_cache_size:
+            with self._cache_lock:
+                self._segment_cache[key] = result
+                if len(self._segment_cache) > self.segment_cache_size:
+                    self._segment_cache.popitem(last=False)
+
+    def _analyze_segment(self, segment):
+        """Extract entities, actions, emotions, terms, themes and symbols for one segment as a SegmentAnalysis.
+
+        Results are memoized by a hash of the normalized segment text, so a
+        resubmitted vision only sends its new or edited segments through spaCy.
+        Cached values are shared between requests and must not be mutated.
+        """
+        key = self._segment_key(segment)
+        with self._cache_lock:
+            cached = self._segment_cache.get(key)
+            if cached is not None:
+                self._segment_cache.move_to_end(key)
+                self.segment_cache_hits += 1
+                return cached
+            self.segment_cache_misses += 1
         
-        if any(word in description.lower() for word in ['power', 'electric', 'flow', 'energy']):
-            themes.add('empowerment')
-            themes.add('spiritual gifts')
+        # Process with spaCy
+        result = self._segment_from_doc(self._make_doc(segment.lower()), segment)
+        self._cache_segment(key, result)
+        return result
+
+    def _make_doc(self, text):
+        # Read self.nlp once: a model reload may swap it while we wait for the lock
+        nlp = self.nlp
+        with self._nlp_lock:
+            return nlp(text)
+
+    def _segment_from_doc(self, doc, segment):
+        # Read what the pipeline component computed, or extract here for other pipelines
+        if getattr(doc, '_', None) is not None and doc._.vision_entities is not None:
+            return SegmentAnalysis(
+                Counter(doc._.vision_entities),
+                Counter(doc._.vision_actions),
+                Counter(doc._.vision_emotions),
+                Counter(doc._.vision_terms),
+                frozenset(doc._.vision_themes),
+                tuple(name for _, _, name in doc._.vision_symbols)
+            )
         
-        if 'cow' in entities:
-            themes.add('provision')
-            themes.add('warning')
+        # Extract elements from the segment
+        entities = self._extract_entities(doc)
+        actions = self._extract_actions(doc)
+        emotions = self._extract_emotions(doc)
         
-        if 'screen' in entities:
-            themes.add('revelation')
-            themes.add('vision')
+        # Identify themes for the segment
+        terms = self._theme_terms(segment, entities, actions)
+        themes = frozenset(self.theme_scorer.identify(terms))
+        symbols = tuple(name for _, _, name in self.symbol_lookup.match(
+            [token.lower_ for token in doc], [token.pos_ for token in doc]
+        ))
+        return SegmentAnalysis(entities, actions, emotions, terms, themes, symbols)
+
+    def _extract_entities(self, doc):
+        return extract_entities(doc, self.modern_fuzzy)
+
+    def _extract_actions(self, doc):
+        return extract_actions(doc)
+
+    def _extract_emotions(self, doc):
+        return extract_emotions(doc, self.emotion_lexicon)
+
+    def _theme_terms(self, description, entities, actions):
+        return theme_terms(self.theme_scorer, description, entities, actions)
+
+    def _identify_themes(self, description, entities, actions, emotions):
+        return self.theme_scorer.identify(self._theme_terms(description, entities, actions))
 
-        return themes
+    def score_themes_batch(self, descriptions):
+        """Rank themes for many visions with a single sparse matrix product."""
+        batch = []
+        nlp = self.nlp
+        with self._nlp_lock:
+            docs = list(nlp.pipe([description.lower() for description in descriptions]))
+        for doc in docs:
+            entities = self._extract_entities(doc)
+            actions = self._extract_actions(doc)
+            batch.append(self._theme_terms(doc.text, entities, actions))
+        return self.theme_scorer.rank_batch(batch)
 
     def _generate_dynamic_insights(self, entities, actions, emotions, themes):
         insights = []
@@ -334,7 +518,9 @@ class VisionAnalyzer:
         
         return prayers
 
-    def _generate_contextual_insight(self, themes):
+    def _generate_contextual_insight(self, themes, rng=None):
+        # Each call draws from its own generator unless one is passed in
+        rng = rng or random.Random()
         general_insights = [
             "This vision appears to be a personal message of {theme} from God",
             "The elements in this vision suggest a season of {theme} in your spiritual journey",
@@ -343,13 +529,14 @@ class VisionAnalyzer:
         ]
         
         if themes:
-            theme = random.choice(list(themes))
+            theme = rng.choice(sorted(themes))
         else:
             theme = "guidance"
         
-        return random.choice(general_insights).format(theme=theme)
+        return rng.choice(general_insights).format(theme=theme)
 
-    def _generate_general_application(self):
+    def _generate_general_application(self, rng=None):
+        rng = rng or random.Random()
         applications = [
             "Set aside dedicated time for prayer and reflection",
             "Share your spiritual experiences with trusted believers",
@@ -357,13 +544,14 @@ class VisionAnalyzer:
             "Practice regular thanksgiving and worship",
             "Maintain a spiritual journal of God's revelations"
         ]
-        return random.choice(applications)
+        return rng.choice(applications)
 
-    def _generate_contextual_prayer(self, themes):
+    def _generate_contextual_prayer(self, themes, rng=None):
+        rng = rng or random.Random()
         if not themes:
             themes = {'guidance'}
         
-        theme = random.choice(list(themes))
+        theme = rng.choice(sorted(themes))
         prayers = {
             'protection': [
                 "Surround me with Your divine protection",
@@ -393,7 +581,7 @@ class VisionAnalyzer:
         }
         
         theme_prayers = prayers.get(theme, prayers['guidance'])
-        return random.choice(theme_prayers)
+        return rng.choice(theme_prayers)
 
     def _generate_fallback_response(self):
         return {
@@ -0,0 +1,94 @@
+"""spaCy pipeline component running the vision rule engine"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc, Span
+
+from emotion_lexicon import load_lexicon
+from theme_scorer import ThemeScorer
+from vision_rules import (
+    english_words, extract_actions, extract_emotions, extract_entities, fuzzy_matching_available,
+    fuzzy_symbol_matches, modern_symbol_index, symbol_fuzzy_index, theme_terms
+)
+
+COMPONENT_NAME = 'vision_rules'
+
+
+class VisionRules:
+    """Runs entity, action, emotion, symbol and theme extraction inside the spaCy pipeline.
+
+    Results are written to ``Doc._.vision_*`` extensions as plain data so docs
+    survive the serialization used by ``nlp.pipe(..., n_process=N)``; matched
+    symbol spans are also exposed through ``Span._.vision_symbol``.
+    """
+
+    def __init__(self, nlp: Language, name: str, phrases: Dict[str, str], keyword_tables: List,
+                 emotion_lexicon_path: str = '', fuzzy_matching: bool = True, english_words_path: str = ''):
+        self.name = name
+        self.emotion_lexicon = load_lexicon(emotion_lexicon_path)
+        # Built while the pipeline's string store still holds only the model's own words
+        known_words = english_words(nlp, english_words_path) if fuzzy_matching else frozenset()
+        fuzzy_matching = fuzzy_matching and fuzzy_matching_available(known_words)
+        self.theme_scorer = ThemeScorer(
+            [(table, weight) for table, weight in keyword_tables], fuzzy=fuzzy_matching, known_words=known_words
+        )
+        # Typo-tolerant lookups, consulted only for tokens the exact lookups miss
+        self.symbol_fuzzy = symbol_fuzzy_index(phrases, known_words) if fuzzy_matching else None
+        self.modern_fuzzy = modern_symbol_index(known_words) if fuzzy_matching else None
+        self.matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        by_symbol = defaultdict(list)
+        for phrase, symbol in phrases.items():
+            by_symbol[symbol].append(nlp.make_doc(phrase))
+        for symbol, patterns in by_symbol.items():
+            self.matcher.add(symbol, patterns)
+
+    def __call__(self, doc: Doc) -> Doc:
+        entities = extract_entities(doc, self.modern_fuzzy)
+        actions = extract_actions(doc)
+        terms = theme_terms(self.theme_scorer, doc.text, entities, actions)
+        strings = doc.vocab.strings
+        spans = self.matcher(doc, as_spans=False)
+        # Keep the longest match where phrases overlap ("tree of life" over "tree")
+        symbols = []
+        covered = set()
+        for match_id, start, end in sorted(spans, key=lambda match: (match[1] - match[2], match[1])):
+            if covered.isdisjoint(range(start, end)):
+                covered.update(range(start, end))
+                symbols.append((start, end, strings[match_id]))
+        if self.symbol_fuzzy is not None:
+            symbols.extend(fuzzy_symbol_matches(
+                self.symbol_fuzzy, [token.lower_ for token in doc], covered, [token.pos_ for token in doc]
+            ))
+
+        doc._.vision_entities = dict(entities)
+        doc._.vision_actions = dict(actions)
+        doc._.vision_emotions = dict(extract_emotions(doc, self.emotion_lexicon))
+        doc._.vision_terms = dict(terms)
+        doc._.vision_themes = sorted(self.theme_scorer.identify(terms))
+        doc._.vision_symbols = sorted(symbols)
+        return doc
+
+
+def _span_symbol(span):
+    for start, end, name in span.doc._.vision_symbols or ():
+        if start == span.start and end == span.end:
+            return name
+    return None
+
+
+for _attribute in ('entities', 'actions', 'emotions', 'terms', 'themes', 'symbols'):
+    if not Doc.has_extension(f'vision_{_attribute}'):
+        Doc.set_extension(f'vision_{_attribute}', default=None)
+if not Span.has_extension('vision_symbol'):
+    Span.set_extension('vision_symbol', getter=_span_symbol)
+
+
+@Language.factory(COMPONENT_NAME, default_config={
+    'phrases': {}, 'keyword_tables': [], 'emotion_lexicon_path': '', 'fuzzy_matching': True, 'english_words_path': ''
+})
+def create_vision_rules(nlp: Language, name: str, phrases: Dict[str, str], keyword_tables: List,
+                        emotion_lexicon_path: str, fuzzy_matching: bool, english_words_path: str):
+    return VisionRules(nlp, name, phrases, keyword_tables, emotion_lexicon_path, fuzzy_matching, english_words_path)
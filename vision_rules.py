@@ -0,0 +1,286 @@
+"""Rule-based extraction of entities, actions, emotions, symbols and theme terms
+
+Functions here work on any token sequence exposing ``text``, ``lower_``,
+``pos_`` and ``lemma_``, so they serve both the spaCy pipeline component and the
+spaCy-free fast analyzer without importing spaCy.
+"""
+
+import functools
+import logging
+import os
+from collections import Counter
+from sys import intern
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from emotion_lexicon import EmotionLexicon, load_lexicon
+from fuzzy_index import FuzzyIndex
+from theme_scorer import ThemeScorer
+
+# Modern objects mapped onto the symbol they stand for
+MODERN_SYMBOLS = {
+    'tv': 'screen',
+    'television': 'screen',
+    'monitor': 'screen',
+    'computer': 'screen',
+    'electricity': 'power',
+    'electric': 'power',
+    'power': 'power'
+}
+
+# Correctly spelled words one edit away from a symbol or keyword; a seed for
+# the English word list below, which is what actually guards the lookups
+COMMON_WORDS = frozenset([
+    'bead', 'beat', 'bind', 'blown', 'bold', 'bone', 'bored', 'break', 'bred', 'broad', 'brown',
+    'cold', 'could', 'cove', 'crow', 'crowd', 'dead', 'deal', 'dine', 'dish', 'dive', 'dock', 'done',
+    'dour', 'dread', 'drown', 'eager', 'eater', 'fill', 'find', 'fine', 'fist', 'five', 'flood',
+    'floor', 'flown', 'fold', 'fountain', 'free', 'frown', 'gild', 'glove', 'good', 'gown', 'grove',
+    'grown', 'halt', 'hand', 'heat', 'hill', 'hire', 'hold', 'kind', 'land', 'lamp', 'later', 'lied',
+    'life', 'lime', 'limb', 'line', 'lock', 'loin', 'lone', 'love', 'malt', 'meal', 'meat',
+    'mild', 'mile', 'mill', 'mind', 'mine', 'money', 'move', 'need', 'none', 'odor', 'phone', 'poor',
+    'proud', 'rack', 'real', 'sale', 'sand', 'seat', 'seem', 'sees', 'sell', 'shone', 'shown',
+    'silk', 'sliver', 'slow', 'sock', 'sold', 'sown', 'speed', 'stare', 'start', 'steel', 'store',
+    'stove', 'table', 'three', 'tide', 'tire', 'told', 'tone', 'town', 'tread', 'trumped',
+    'vine', 'wafer', 'wave', 'weed', 'wife', 'will', 'wire', 'wise', 'wish', 'word', 'words',
+    'wore', 'zone',
+])
+
+DEFAULT_WORD_LIST = '/usr/share/dict/words'
+
+# Typo correction must never touch a correctly spelled word, so it only runs
+# with a real English word list (the spaCy model's vocabulary or a word file)
+MIN_WORD_LIST_SIZE = 10000
+
+# Only these parts of speech are corrected to a catalogue symbol
+SYMBOL_POS = ('NOUN', 'PROPN')
+
+
+@functools.lru_cache(maxsize=None)
+def read_word_list(path: str) -> FrozenSet[str]:
+    """Lowercase alphabetic words of a one-word-per-line file, or nothing if it is missing.
+
+    Capitalized entries are proper nouns ("Lyon") and are skipped, so they
+    can't shield a misspelled symbol from correction.
+    """
+    try:
+        with open(path, encoding='utf-8', errors='ignore') as handle:
+            return frozenset(word for word in (line.strip() for line in handle) if word.isalpha() and word.islower())
+    except OSError:
+        return frozenset()
+
+
+def model_words(nlp) -> FrozenSet[str]:
+    """Words a spaCy pipeline knows: its string store, stop words and lemmatizer word tables.
+
+    Call it on a freshly loaded pipeline; the string store also collects
+    every (misspelled) word the pipeline parses. The store holds the
+    lowercase form of every capitalized word too, so a lowercase string whose
+    capitalized form is also stored ("lyon" next to "Lyon") only counts when
+    the stop words or lemmatizer tables list it.
+    """
+    words = set()
+    vocab = getattr(nlp, 'vocab', None)
+    if vocab is not None:
+        strings = set(vocab.strings)
+        words.update(string for string in strings
+                     if string.isalpha() and string.islower() and string.capitalize() not in strings)
+    words.update(getattr(getattr(nlp, 'Defaults', None), 'stop_words', ()))
+    if 'lemmatizer' in getattr(nlp, 'pipe_names', ()):
+        lookups = nlp.get_pipe('lemmatizer').lookups
+        for name in ('lemma_index', 'lemma_exc', 'lemma_lookup'):
+            if not lookups.has_table(name):
+                continue
+            table = lookups.get_table(name)
+            for pos in ('noun', 'verb', 'adj', 'adv'):
+                entries = table.get(pos) or ()
+                words.update(entries)
+                if isinstance(entries, dict):
+                    words.update(lemma for lemmas in entries.values() for lemma in lemmas)
+    return frozenset(word.lower() for word in words if isinstance(word, str) and word.isalpha())
+
+
+def english_words(nlp=None, path: str = '') -> FrozenSet[str]:
+    """The English word list typo correction must leave alone.
+
+    Combines COMMON_WORDS, the word file at ``path`` (DEFAULT_WORD_LIST when
+    empty) and the vocabulary of ``nlp``.
+    """
+    words = set(COMMON_WORDS)
+    words.update(read_word_list(path or DEFAULT_WORD_LIST))
+    if nlp is not None:
+        words.update(model_words(nlp))
+    return frozenset(words)
+
+
+def fuzzy_matching_available(known_words: FrozenSet[str]) -> bool:
+    """Whether ``known_words`` is a real word list rather than just the seed words."""
+    if len(known_words) >= MIN_WORD_LIST_SIZE:
+        return True
+    logging.warning(f"Typo-tolerant matching needs an English word list (spaCy model vocabulary or "
+                    f"ENGLISH_WORDS_PATH); only {len(known_words)} words available, turning it off")
+    return False
+
+
+def modern_symbol_index(known_words: FrozenSet[str]) -> FuzzyIndex:
+    """Typo-tolerant index of the modern objects ("televison")."""
+    return FuzzyIndex(MODERN_SYMBOLS, min_length=5, known_words=known_words)
+
+
+def extract_entities(doc, fuzzy: Optional[FuzzyIndex] = None) -> Counter:
+    """Count noun entities, keyed by interned text (modern objects by the symbol they stand for)."""
+    entities = Counter()
+    for token in doc:
+        if token.pos_ in ('NOUN', 'PROPN'):
+            # Check for modern symbols and map them
+            word = token.text.lower()
+            mapped = MODERN_SYMBOLS.get(word)
+            if mapped is None and fuzzy is not None:
+                mapped = fuzzy.correct(word)
+            entities[intern(mapped or token.text)] += 1
+    return entities
+
+
+def extract_actions(doc) -> Counter:
+    """Count verbs by interned lemma."""
+    return Counter(intern(token.lemma_) for token in doc if token.pos_ == 'VERB')
+
+
+def extract_emotions(doc, lexicon: Optional[EmotionLexicon] = None) -> Counter:
+    """Emotion intensities from the weighted emotion lexicon, with negated terms discounted."""
+    return (load_lexicon() if lexicon is None else lexicon).score(doc)
+
+
+def theme_terms(scorer: ThemeScorer, description, entities, actions):
+    """Collect the terms a segment is scored on: its words, entities and verb lemmas.
+
+    Misspelled entities and verbs also count for the keyword they most likely
+    meant; untagged words are never corrected.
+    """
+    terms = scorer.tokenize(description)
+    for entity, count in entities.items():
+        terms.setdefault(entity.lower(), count)
+    for lemma in actions:
+        terms.setdefault(lemma.lower(), 1)
+    if scorer.fuzzy is not None:
+        for term in [entity.lower() for entity in entities] + [lemma.lower() for lemma in actions]:
+            keyword = scorer.correct(term)
+            if keyword is not None:
+                terms.setdefault(keyword, terms[term])
+    return terms
+
+
+class SegmentAnalysis:
+    """What the rule engine found in one segment.
+
+    Entities, verb lemmas and emotions are Counters of interned strings;
+    themes is a frozenset and symbols a tuple of catalogue names in order of
+    appearance. Instances are cached and shared between requests, so treat
+    them as read-only.
+    """
+
+    __slots__ = ('entities', 'actions', 'emotions', 'terms', 'themes', 'symbols')
+
+    def __init__(self, entities: Counter, actions: Counter, emotions: Counter, terms: Counter,
+                 themes: FrozenSet[str], symbols: Tuple[str, ...]):
+        self.entities = entities
+        self.actions = actions
+        self.emotions = emotions
+        self.terms = terms
+        self.themes = themes
+        self.symbols = symbols
+
+
+class VisionFindings:
+    """Findings of all segments of one vision, merged without copying per-token data."""
+
+    __slots__ = ('entities', 'actions', 'emotions', 'terms', 'themes', 'symbols')
+
+    def __init__(self):
+        self.entities = Counter()
+        self.actions = Counter()
+        self.emotions = Counter()
+        self.terms = Counter()
+        self.themes = set()
+        # Insertion-ordered set of symbol names
+        self.symbols = {}
+
+    def add(self, segment: SegmentAnalysis):
+        self.entities.update(segment.entities)
+        self.actions.update(segment.actions)
+        self.emotions.update(segment.emotions)
+        self.terms.update(segment.terms)
+        self.themes.update(segment.themes)
+        self.symbols.update(dict.fromkeys(segment.symbols))
+
+
+def symbol_phrases(biblical_symbols, aliases=None) -> Dict[str, str]:
+    """Map lowercase phrases to catalogue symbol names.
+
+    Names like "Serpent/Snake" contribute each alternative, every phrase also
+    matches its plural, and ``aliases`` adds multi-word expressions such as
+    "tree of life".
+    """
+    phrases = {}
+    for symbol in biblical_symbols:
+        name = symbol['symbol']
+        for alternative in name.lower().split('/'):
+            alternative = alternative.strip()
+            phrases.setdefault(alternative, name)
+            if alternative.endswith(('ss', 'sh', 'ch', 'x')):
+                phrases.setdefault(alternative + 'es', name)
+            elif alternative.endswith('s'):
+                phrases.setdefault(alternative[:-1], name)
+            else:
+                phrases.setdefault(alternative + 's', name)
+    for phrase, name in (aliases or {}).items():
+        phrases[phrase.lower()] = name
+    return phrases
+
+
+def symbol_fuzzy_index(phrases: Dict[str, str], known_words: FrozenSet[str]) -> FuzzyIndex:
+    """Typo-tolerant index of the single-word symbol phrases ("lyon" -> Lion)."""
+    return FuzzyIndex({phrase: name for phrase, name in phrases.items() if ' ' not in phrase},
+                      known_words=known_words)
+
+
+def fuzzy_symbol_matches(fuzzy: FuzzyIndex, words: Sequence[str], covered,
+                         pos: Optional[Sequence[str]] = None) -> List[Tuple[int, int, str]]:
+    """Single-word symbol matches for misspelled nouns outside the exact matches in ``covered``."""
+    matches = []
+    for position, word in enumerate(words):
+        if pos is not None and pos[position] not in SYMBOL_POS:
+            continue
+        if position not in covered and word.isalpha():
+            name = fuzzy.correct(word)
+            if name is not None:
+                matches.append((position, position + 1, name))
+    return matches
+
+
+class SymbolLookup:
+    """Longest-match phrase lookup over lowercase token sequences, for docs built without spaCy.
+
+    With a ``fuzzy`` index, words left unmatched are retried allowing typos;
+    given their part-of-speech tags, only nouns are.
+    """
+
+    def __init__(self, phrases: Dict[str, str], fuzzy: Optional[FuzzyIndex] = None):
+        self.phrases = {tuple(phrase.split()): name for phrase, name in phrases.items()}
+        self.max_length = max((len(phrase) for phrase in self.phrases), default=1)
+        self.fuzzy = fuzzy
+
+    def match(self, words: Sequence[str], pos: Optional[Sequence[str]] = None) -> List[Tuple[int, int, str]]:
+        matches = []
+        position = 0
+        while position < len(words):
+            for length in range(min(self.max_length, len(words) - position), 0, -1):
+                name = self.phrases.get(tuple(words[position:position + length]))
+                if name is not None:
+                    matches.append((position, position + length, name))
+                    position += length
+                    break
+            else:
+                position += 1
+        if self.fuzzy is not None:
+            covered = {index for start, end, _ in matches for index in range(start, end)}
+            matches = sorted(matches + fuzzy_symbol_matches(self.fuzzy, words, covered, pos))
+        return matches
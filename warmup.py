@@ -0,0 +1,109 @@
+"""Worker warm-up for the Biblical Vision Analyzer"""
+
+import logging
+import threading
+import time
+
+# Short, varied visions that exercise the tokenizer, the rule component,
+# symbol matching and every theme family
+WARMUP_CORPUS = [
+    "I saw a lion standing on a mountain. It roared and the ground shook",
+    "I was walking by a river of living water and a dove rested on my shoulder",
+    "Angels with swords fought a dark enemy in the sky and won the victory",
+    "A door opened in a dark room and bright light poured in. A voice said to follow the path",
+    "My TV screen glowed and electric power flowed into my body. I felt urgency to pray",
+    "I saw a tree of life with golden fruit and its leaves were healing the nations",
+    "I was afraid in a storm on the sea until the wind stopped and everything was calm",
+    "Fire fell on an altar, oil was poured on my head and I was given a crown",
+]
+
+
+class WarmUp:
+    """Runs a list of named warm-up steps once, in a background thread.
+
+    The worker reports ready only after every step has run. A failing step is
+    logged and recorded but does not block readiness, except for steps marked
+    required: those are retried with exponential backoff, and after
+    ``max_attempts`` the warm-up ends 'failed' so the worker is never ready.
+    """
+
+    def __init__(self, steps, max_attempts=3, backoff=1.0, max_backoff=30.0):
+        self.steps = steps
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.status = 'pending'
+        self.attempts = 0
+        self.errors = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    def start_in_background(self):
+        """Start warming up unless it already started; safe to call from any thread"""
+        with self._lock:
+            if self.status != 'pending':
+                return False
+            self.status = 'running'
+        threading.Thread(target=self._run, name='warm-up', daemon=True).start()
+        return True
+
+    def run(self):
+        """Warm up in the calling thread"""
+        with self._lock:
+            if self.status != 'pending':
+                return self.ready
+            self.status = 'running'
+        self._run()
+        return self.ready
+
+    def _run(self):
+        started = time.monotonic()
+        steps = self.steps
+        while True:
+            self.attempts += 1
+            # Only required steps that failed are run again
+            steps = self._run_steps(steps)
+            if not steps:
+                status = 'ready'
+                break
+            if self.attempts >= self.max_attempts:
+                status = 'failed'
+                break
+            delay = min(self.backoff * 2 ** (self.attempts - 1), self.max_backoff)
+            logging.warning(
+                f"Retrying warm-up steps {[name for name, _, _ in steps]} in {delay:.1f}s "
+                f"(attempt {self.attempts + 1} of {self.max_attempts})"
+            )
+            self.status = 'retrying'
+            time.sleep(delay)
+        self.status = status
+        logging.info(f"Worker warm-up finished in {time.monotonic() - started:.2f}s ({status})")
+
+    def _run_steps(self, steps):
+        """Run steps in order; returns the required ones that failed"""
+        failed = []
+        for name, step, required in steps:
+            step_started = time.monotonic()
+            try:
+                step()
+                self.errors.pop(name, None)
+            except Exception as e:
+                logging.error(f"Warm-up step '{name}' failed: {str(e)}")
+                self.errors[name] = str(e)
+                if required:
+                    failed.append((name, step, required))
+            self.timings[name] = round(time.monotonic() - step_started, 3)
+        return failed
+
+    def report(self):
+        return {
+            'status': self.status,
+            'ready': self.ready,
+            'attempts': self.attempts,
+            'step_seconds': dict(self.timings),
+            'errors': dict(self.errors)
+        }